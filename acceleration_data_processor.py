@@ -1,194 +1,74 @@
 import matplotlib.pyplot as plt
 import numpy as np
-from datetime import datetime
-
-A = input("File path: ") 
-print(' ')
-
-try:
-    with open(A, 'r') as file:
-        mainarray = file.read().replace("   ", " ").replace('\t', ' ').replace('\n', ' ').replace(',', ' ').split(' ')
-except FileNotFoundError:
-    print(f"File not found: {A}")
-    exit(1)
-
-datetime_str = []
-x = []
-y = []
-z = []
-timestamp = []  
-
-for k in range(0, len(mainarray) - 4, 5):  
-    datetime_str.append(mainarray[k] + " " + mainarray[k + 1]) 
-    x.append(float(mainarray[k + 2]))
-    y.append(float(mainarray[k + 3]))
-    z.append(float(mainarray[k + 4]))
-
-datetime_obj = [datetime.strptime(dt, '%H:%M:%S %m/%d/%Y') for dt in datetime_str]
-
-time_in_seconds = [(dt - datetime_obj[0]).total_seconds() for dt in datetime_obj]
-time_in_hours = [t / 3600 for t in time_in_seconds] 
-
-class PathVisualization:
-    def __init__(self, x, y, z):
-        self.x = x
-        self.y = y
-        self.z = z
-
-        self.pathCoords = list(zip(self.x, self.y, self.z))
-        self.num_points = 1000
-
-    def __createSphere(self):
-        golden_r = (np.sqrt(5.0) + 1.0) / 2.0            
-        golden_a = (2.0 - golden_r) * (2.0 * np.pi)     
-
-        Xs, Ys, Zs = [], [], []
-        
-        for i in range(self.num_points):
-            ys = 1 - (i / float(self.num_points - 1)) * 2
-            radius = np.sqrt(1 - ys * ys)
-
-            theta = golden_a * i
-
-            xs = np.cos(theta) * radius
-            zs = np.sin(theta) * radius
-
-            Xs.append(xs)
-            Ys.append(ys)
-            Zs.append(zs)
-
-        return(Xs, Ys, Zs)
-
-    def __splitSphere(self, sphereCoords):
-        octants = {'posI':[], 'posII':[], 'posIII':[], 'posIV':[], 'negI':[], 'negII':[], 'negIII':[], 'negIV':[]}
-        
-        for row in sphereCoords:
-            if (row[2] > 0):
-                if (row[1] > 0):
-                    if (row[0] > 0):
-                        octants['posI'].append(row)
-                    else:
-                        octants['posII'].append(row)
-                elif (row[0] > 0):
-                    octants['posIV'].append(row)
-                else: 
-                    octants['posIII'].append(row)
-            else:
-                if (row[1] > 0):
-                    if (row[0] > 0):
-                        octants['negI'].append(row)
-                    else:
-                        octants['negII'].append(row)
-                elif (row[0] > 0):
-                    octants['negIV'].append(row)
-                else:
-                    octants['negIII'].append(row)
-        
-        return(octants)
-
-    def __getPathOctant(self, pathRow):
-        if (pathRow[2] > 0):
-            if (pathRow[1] > 0):
-                if (pathRow[0] > 0):
-                    return 'posI'
-                else:
-                    return 'posII'
-            elif (pathRow[0] > 0):
-                return 'posIV'
-            else: 
-                return 'posIII'
-        else:
-            if (pathRow[1] > 0):
-                if (pathRow[0] > 0):
-                    return 'negI'
-                else:
-                    return 'negII'
-            elif (pathRow[0] > 0):
-                return 'negIV'
-            else:
-                return 'negIII'
-
-    def __getDistanceBetween(self, pathTupleCoords, sphereTupleCoords):
-        pathX, pathY, pathZ = pathTupleCoords
-        sphereX, sphereY, sphereZ = sphereTupleCoords
-
-        diffX = pathX - sphereX
-        diffY = pathY - sphereY
-        diffZ = pathZ - sphereZ
-
-        sumSquares = diffX ** 2 + diffY ** 2 + diffZ ** 2
-        dist = np.sqrt(sumSquares)
-
-        return dist
-
-    def __getDistributionNum(self, sphereCoords):
-        octants = self.__splitSphere(sphereCoords)
-        
-        pathMap = {} 
-        repeatTime = -1
-
-        for pathRow in self.pathCoords:
-            pathOctant = self.__getPathOctant(pathRow)
-            sphereCoordsSplit = octants[pathOctant]
-            distDict = {}
-            repeatTime += 1
-
-            for sphereRow in sphereCoordsSplit:
-                dist = self.__getDistanceBetween(pathRow, sphereRow) 
-                distDict[sphereRow] = dist 
-                    
-            rankedDist = sorted(distDict.items(), key=lambda x:x[1]) 
-            segmentVertices = (rankedDist[0][0], rankedDist[1][0], rankedDist[2][0]) 
-            
-            pathMap[segmentVertices] = pathMap.get(segmentVertices, []) + [repeatTime] 
-        
-        return(len(pathMap))
-
-    def getDistribution(self):
-        Xsphere, Ysphere, Zsphere = self.__createSphere()
-        sphereCoords = list(zip(Xsphere, Ysphere, Zsphere))
-        score = self.__getDistributionNum(sphereCoords)
-        return score
+import time_weighted
+from dataCompile import PathVisualization
+from records import load_records
+import sphere_density
 
 class PathFigure:
-    def __init__(self, x, y, z):
+    # timeInHours (optional) weights the density view by the time each sample covers.
+    def __init__(self, x, y, z, distributionScore=None, timeInHours=None):
         self.x = x
         self.y = y
         self.z = z
+        self.distributionScore = distributionScore
+        self.timeInHours = timeInHours
+
+    def getDistributionScore(self):
+        if self.distributionScore is None:
+            self.distributionScore = PathVisualization("experimental", self.x, self.y, self.z).getDistribution()
+        return self.distributionScore
+
+    # Fonts are set for this figure only (rc_context) instead of changing the global rcParams.
+    # style='density' draws the dwell time per sphere cell (sphere_density) instead of the
+    # raw polyline, so the drawing cost no longer grows with the number of samples.
+    def createPathFig(self, mode='show', title=True, saveFile='pathFig.png', style='path'):
+        with plt.rc_context({'font.family': 'Calibri'}):
+            fig = plt.figure(figsize=plt.figaspect(0.85))
+
+            if title:
+                fig.suptitle("Acceleration Vector Path")
+
+            ax = fig.add_subplot(1, 1, 1, projection='3d')
+            if style == 'density':
+                timeInSeconds = None if self.timeInHours is None else np.asarray(self.timeInHours, dtype=np.float64) * 3600
+                dwell = sphere_density.dwell_time(self.x, self.y, self.z, timeInSeconds)
+                _, mappable = sphere_density.plot_sphere_density(ax, dwell)
+                fig.colorbar(mappable, ax=ax, shrink=0.6, label='Fraction of run')
+                ax.set_box_aspect((1, 1, 1))
+            else:
+                ax.plot(self.x, self.y, self.z, color='#0032A0', linewidth=1)
 
-    def createPathFig(self, mode='show', title=True):
-        plt.rcParams['font.family'] = 'Calibri'
-        fig = plt.figure(figsize=plt.figaspect(0.85))
-
-        if title:
-            fig.suptitle("Acceleration Vector Path")
-
-        ax = fig.add_subplot(1, 1, 1, projection='3d')
-        ax.plot(self.x, self.y, self.z, color='#0032A0', linewidth=1)
-
-        ax.set_xlabel('X')
-        ax.set_ylabel('Y')
-        ax.set_zlabel('Z')
+            ax.set_xlabel('X')
+            ax.set_ylabel('Y')
+            ax.set_zlabel('Z')
 
-        ticks = np.arange(-1.0, 1.5, 0.5)
-        ax.set_xticks(ticks)
-        ax.set_yticks(ticks)
-        ax.set_zticks(ticks)
+            ticks = np.arange(-1.0, 1.5, 0.5)
+            ax.set_xticks(ticks)
+            ax.set_yticks(ticks)
+            ax.set_zticks(ticks)
 
-        path_visualization = PathVisualization(self.x, self.y, self.z)
-        distribution_score = path_visualization.getDistribution()
-        ax.legend([f"Distribution: {distribution_score}"])
+            ax.legend([f"Distribution: {self.getDistributionScore()}"])
 
-        if mode == 'save':
-            plt.savefig('pathFig.png')
-        elif mode == 'show':
-            plt.show()
-        else:
-            plt.savefig('pathFig.png')
-            plt.show()
+            if mode == 'save':
+                fig.savefig(saveFile)
+            elif mode == 'show':
+                plt.show()
+            else:
+                fig.savefig(saveFile)
+                plt.show()
 
 class AccelerometerDataProcessor:
-    def __init__(self, x, y, z, time_in_hours, startAnalysis, endAnalysis):
+    # compact=True keeps the samples in one contiguous float32 (N, 3) array with x, y and z
+    # as column views; running sums stay float64 (see data_compile_v1.DataProcessor).
+    # timeWeighted=True averages by the time each sample covers (trapezoidal integral over
+    # elapsed time) instead of by sample count, so gaps and rate changes do not skew it.
+    def __init__(self, x, y, z, time_in_hours, startAnalysis, endAnalysis, compact=False, timeWeighted=False):
+        self.compact = compact
+        self.timeWeighted = timeWeighted
+        if compact:
+            self.vectors = np.ascontiguousarray(np.column_stack((x, y, z)), dtype=np.float32)
+            x, y, z = self.vectors[:, 0], self.vectors[:, 1], self.vectors[:, 2]
         self.x = x
         self.y = y
         self.z = z
@@ -198,9 +78,12 @@ class AccelerometerDataProcessor:
         self.endAnalysis = endAnalysis
 
     def _getTimeAvg(self):
-        xTimeAvg = np.cumsum(self.x) / np.arange(1, len(self.x) + 1)
-        yTimeAvg = np.cumsum(self.y) / np.arange(1, len(self.y) + 1)
-        zTimeAvg = np.cumsum(self.z) / np.arange(1, len(self.z) + 1)
+        if self.timeWeighted:
+            timeInSeconds = np.asarray(self.time_in_hours, dtype=np.float64) * 3600
+            return tuple(time_weighted.time_weighted_average(timeInSeconds, values)[0] for values in (self.x, self.y, self.z))
+        xTimeAvg = np.cumsum(self.x, dtype=np.float64) / np.arange(1, len(self.x) + 1)
+        yTimeAvg = np.cumsum(self.y, dtype=np.float64) / np.arange(1, len(self.y) + 1)
+        zTimeAvg = np.cumsum(self.z, dtype=np.float64) / np.arange(1, len(self.z) + 1)
         return xTimeAvg, yTimeAvg, zTimeAvg
 
     def _getMagnitude(self, xTimeAvg, yTimeAvg, zTimeAvg):
@@ -248,11 +131,26 @@ class AccelerometerDataProcessor:
             plt.savefig('timeMagFig.png')
             plt.show()
 
-startAnalysis = float(input("Enter the start time for analysis in hours: "))
-endAnalysis = float(input("Enter the end time for analysis in hours: "))
+if __name__ == "__main__":
+    A = input("File path: ")
+    print(' ')
+
+    try:
+        records = load_records(A)
+    except FileNotFoundError:
+        print(f"File not found: {A}")
+        exit(1)
+    if records.rejected:
+        print(f"Skipped {len(records.rejected)} malformed rows (see {records.quarantine_path})")
+
+    x, y, z = records.x, records.y, records.z
+    time_in_hours = records.time_in_hours
+
+    startAnalysis = float(input("Enter the start time for analysis in hours: "))
+    endAnalysis = float(input("Enter the end time for analysis in hours: "))
 
-processor = AccelerometerDataProcessor(x, y, z, time_in_hours, startAnalysis, endAnalysis)
-processor.createMagFig(mode='show')
+    processor = AccelerometerDataProcessor(x, y, z, time_in_hours, startAnalysis, endAnalysis)
+    processor.createMagFig(mode='show')
 
-path_figure = PathFigure(x, y, z)
-path_figure.createPathFig(mode='show')
+    path_figure = PathFigure(x, y, z, timeInHours=time_in_hours)
+    path_figure.createPathFig(mode='show')
@@ -0,0 +1,321 @@
+import hashlib
+import os
+import time
+import numpy as np
+import kernels
+import fibonacci_sphere
+from records import parse_lines
+
+# Wall-clock seconds between periodic checkpoints.
+CHECKPOINT_SECONDS = 60.0
+
+CHUNK_SIZE = 1 << 16
+
+# Bytes of log file read per step (extended to the end of the last complete line).
+BLOCK_BYTES = 1 << 22
+
+# Bytes at the start of a log and just before the checkpoint offset that identify its content.
+IDENTITY_BYTES = 1 << 16
+
+
+def save_checkpoint(file_path, state):
+    """
+    Write a state dict of arrays to an .npz checkpoint atomically.
+
+    The archive is written to a temporary file, synced and renamed over the previous
+    checkpoint, so a crash while saving leaves the last complete checkpoint in place.
+    """
+    temp_path = file_path + '.tmp'
+    with open(temp_path, 'wb') as file:
+        np.savez(file, **state)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, file_path)
+
+
+def load_checkpoint(file_path):
+    """State dict of arrays saved by save_checkpoint."""
+    with np.load(file_path, allow_pickle=False) as archive:
+        return {name: archive[name] for name in archive.files}
+
+
+def _fingerprint(*parts):
+    """Hex digest identifying a run's inputs, so a checkpoint is never resumed into a different run."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            digest.update(np.ascontiguousarray(part).tobytes())
+        else:
+            digest.update(repr(part).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _speed_identity(rpm):
+    """Fingerprint parts of a constant speed or a speed profile (its knots)."""
+    if np.isscalar(rpm):
+        return (float(rpm),)
+    return (type(rpm).__name__, rpm.times, rpm.rpms)
+
+
+def _encode_frame_carry(carry):
+    """time_weighted.cumulative_integral carry as 6 floats (NaN when there is none)."""
+    if carry is None:
+        return np.full(6, np.nan)
+    last_time, last_value, integral_carry, elapsed_carry = carry
+    return np.array([last_time, last_value, *integral_carry, *elapsed_carry], dtype=np.float64)
+
+
+def _decode_frame_carry(values):
+    if np.isnan(values[0]):
+        return None
+    values = [float(value) for value in values]
+    return values[0], values[1], (values[2], values[3]), (values[4], values[5])
+
+
+class CheckpointedRun:
+    """
+    Streaming computation that can be checkpointed between steps and resumed.
+
+    Subclasses hold all of their progress in a few arrays (state / _restore) and advance
+    by one chunk per step(). Checkpoints are only taken between steps, and a resumed run
+    repeats exactly the steps an uninterrupted run would take from there, so its result
+    is bit-identical.
+    """
+    kind = None
+
+    def __init__(self, checkpoint_path, identity):
+        self.checkpoint_path = checkpoint_path
+        self.identity = identity
+
+    def run(self, cancelled=None, checkpoint_seconds=CHECKPOINT_SECONDS):
+        """
+        Step to the end, checkpointing every checkpoint_seconds, when cancelled and at the end.
+
+        Returns:
+        - summary() of the finished run, or None when cancelled() returned True
+        """
+        cancelled = cancelled or (lambda: False)
+        last_save = time.monotonic()
+        while not self.done():
+            if cancelled():
+                self.save()
+                return None
+            self.step()
+            if time.monotonic() - last_save >= checkpoint_seconds:
+                self.save()
+                last_save = time.monotonic()
+        self.save()
+        return self.summary()
+
+    def resume(self, cancelled=None, checkpoint_seconds=CHECKPOINT_SECONDS):
+        """Continue from the last checkpoint (from the start when there is none) and run to the end."""
+        self.restore()
+        return self.run(cancelled, checkpoint_seconds)
+
+    def save(self):
+        state = self.state()
+        state['kind'] = np.array(self.kind)
+        state['identity'] = np.array(self.identity)
+        save_checkpoint(self.checkpoint_path, state)
+
+    def restore(self):
+        """Load the last checkpoint if one exists; returns whether one was loaded."""
+        if not os.path.exists(self.checkpoint_path):
+            return False
+        state = load_checkpoint(self.checkpoint_path)
+        if str(state['kind']) != self.kind or str(state['identity']) != self.identity:
+            raise ValueError(f"Checkpoint {self.checkpoint_path} belongs to a different run.")
+        self._restore(state)
+        return True
+
+
+class KimRun(CheckpointedRun):
+    kind = 'kim'
+
+    def __init__(self, model, checkpoint_path, time_array=None, chunk_size=CHUNK_SIZE, num_points=1000):
+        """
+        Time averages and gravity-direction distribution of a long KimModel run, checkpointed.
+
+        The run is evaluated chunk by chunk with KimModel.acceleration_chunk. The state is
+        the next time index, the frame-angle carries (speed profiles), the compensated-sum
+        carries of the six g and a components and the visited cells of the gravity
+        direction.
+
+        Parameters:
+        - model: KimModel
+        - checkpoint_path: Checkpoint file (.npz)
+        - time_array: Time points (seconds); defaults to model.default_time_array()
+        - chunk_size: Time points per step
+        - num_points: Sphere size for the distribution score
+        """
+        self.model = model
+        self.time_array = np.asarray(model.default_time_array() if time_array is None else time_array, dtype=np.float64)
+        self.chunk_size = chunk_size
+        self.sphere = fibonacci_sphere.fibonacci_sphere(num_points)
+        identity = _fingerprint(self.kind, *_speed_identity(model.inner_rpm), *_speed_identity(model.outer_rpm),
+                                float(model.delta_x), float(model.delta_y), float(model.delta_z), model.trig,
+                                self.time_array, chunk_size, num_points)
+        super().__init__(checkpoint_path, identity)
+        self.index = 0
+        self.frame_carries = (None, None)
+        self.carries = [(0.0, 0.0)] * 6
+        self.cells = np.empty(0, dtype=np.int64)
+
+    def done(self):
+        return self.index >= len(self.time_array)
+
+    def step(self):
+        chunk = self.time_array[self.index:self.index + self.chunk_size]
+        (_, g_prime, a_prime, _), self.frame_carries = self.model.acceleration_chunk(chunk, self.frame_carries)
+        vectors = np.concatenate((g_prime, a_prime)).astype(np.float64)
+        for i in range(6):
+            _, self.carries[i] = kernels.compensated_cumsum(vectors[i], self.carries[i])
+        directions = vectors[:3].T / np.linalg.norm(vectors[:3], axis=0)[:, None]
+        triangles = kernels.nearest_triangles(directions, self.sphere)
+        self.cells = np.union1d(self.cells, kernels.triangle_ids(triangles, len(self.sphere)))
+        self.index += len(chunk)
+
+    def state(self):
+        return {
+            'index': np.array(self.index),
+            'frame_carries': np.array([_encode_frame_carry(carry) for carry in self.frame_carries]),
+            'carries': np.array(self.carries, dtype=np.float64),
+            'cells': self.cells,
+        }
+
+    def _restore(self, state):
+        self.index = int(state['index'])
+        self.frame_carries = tuple(_decode_frame_carry(values) for values in state['frame_carries'])
+        self.carries = [(float(total), float(comp)) for total, comp in state['carries']]
+        self.cells = state['cells']
+
+    def summary(self):
+        """Time averages (m/s²) over the time points processed so far and the distribution score."""
+        averages = [(total + comp) / self.index if self.index else 0.0 for total, comp in self.carries]
+        return {
+            'samples': self.index,
+            'duration_hours': float(self.time_array[self.index - 1] / 3600) if self.index else 0.0,
+            'g_x': averages[0], 'g_y': averages[1], 'g_z': averages[2],
+            'g_magnitude': float(np.sqrt(sum(a * a for a in averages[:3]))),
+            'a_x': averages[3], 'a_y': averages[4], 'a_z': averages[5],
+            'a_magnitude': float(np.sqrt(sum(a * a for a in averages[3:]))),
+            'distribution': len(self.cells),
+        }
+
+
+class LogAnalysis(CheckpointedRun):
+    kind = 'log'
+
+    def __init__(self, file_path, checkpoint_path=None, block_bytes=BLOCK_BYTES, num_points=1000):
+        """
+        Averages and distribution score of an accelerometer log too large to load, checkpointed.
+
+        The file is read in blocks of whole lines and each block is parsed with
+        records.parse_lines; malformed rows are counted and skipped. The state is the byte
+        offset of the next block, the compensated-sum carries of x, y and z, the sample and
+        rejected counts, the first and last timestamps and the visited cells (sorted cell
+        IDs, as in ingest_service.ChamberAccumulator). A digest of the bytes at the start of
+        the file and just before the offset is saved with it, so a log rewritten in place is
+        not resumed into the old sums; appending to the log is fine.
+
+        Parameters:
+        - file_path: Log file
+        - checkpoint_path: Checkpoint file (default: <name>.checkpoint.npz next to the log)
+        - block_bytes: Bytes read per step
+        - num_points: Sphere size for the distribution score
+        """
+        self.file_path = file_path
+        self.block_bytes = block_bytes
+        self.sphere = fibonacci_sphere.fibonacci_sphere(num_points)
+        self.file_size = os.path.getsize(file_path)
+        checkpoint_path = checkpoint_path or os.path.splitext(file_path)[0] + '.checkpoint.npz'
+        super().__init__(checkpoint_path, _fingerprint(self.kind, os.path.abspath(file_path), block_bytes, num_points))
+        self.offset = 0
+        self.count = 0
+        self.rejected = 0
+        self.carries = [(0.0, 0.0)] * 3
+        self.cells = np.empty(0, dtype=np.int64)
+        self.first_time = None
+        self.last_time = None
+
+    def done(self):
+        return self.offset >= self.file_size
+
+    def _read_block(self):
+        """Bytes from the current offset up to the end of the last complete line in the block."""
+        with open(self.file_path, 'rb') as file:
+            file.seek(self.offset)
+            data = file.read(self.block_bytes)
+            while self.offset + len(data) < self.file_size and b'\n' not in data:
+                data += file.read(self.block_bytes)
+        end = data.rfind(b'\n') + 1
+        return data[:end] if end and self.offset + len(data) < self.file_size else data
+
+    def _content_digest(self, offset):
+        """sha256 of the first IDENTITY_BYTES and the IDENTITY_BYTES before offset (both clipped to [0, offset))."""
+        digest = hashlib.sha256()
+        with open(self.file_path, 'rb') as file:
+            digest.update(file.read(min(IDENTITY_BYTES, offset)))
+            tail = max(0, offset - IDENTITY_BYTES)
+            file.seek(tail)
+            digest.update(file.read(offset - tail))
+        return digest.hexdigest()
+
+    def step(self):
+        data = self._read_block()
+        records = parse_lines(data.decode(errors='replace').split('\n'), source=self.file_path)
+        self.offset += len(data)
+        self.rejected += len(records.rejected)
+        if not len(records):
+            return
+        for i, values in enumerate((records.x, records.y, records.z)):
+            _, self.carries[i] = kernels.compensated_cumsum(values, self.carries[i])
+        triangles = kernels.nearest_triangles(np.column_stack((records.x, records.y, records.z)), self.sphere)
+        self.cells = np.union1d(self.cells, kernels.triangle_ids(triangles, len(self.sphere)))
+        if self.first_time is None:
+            self.first_time = records.timestamps[0]
+        self.last_time = records.timestamps[-1]
+        self.count += len(records)
+
+    def state(self):
+        return {
+            'offset': np.array(self.offset),
+            'content': np.array(self._content_digest(self.offset)),
+            'counts': np.array([self.count, self.rejected]),
+            'carries': np.array(self.carries, dtype=np.float64),
+            'cells': self.cells,
+            'times': np.array([np.datetime64('NaT') if stamp is None else stamp for stamp in (self.first_time, self.last_time)],
+                              dtype='datetime64[us]'),
+        }
+
+    def _restore(self, state):
+        self.offset = int(state['offset'])
+        if self.offset > self.file_size:
+            raise ValueError(f"{self.file_path} is shorter than when checkpoint {self.checkpoint_path} was taken.")
+        if str(state['content']) != self._content_digest(self.offset):
+            raise ValueError(f"{self.file_path} has changed since checkpoint {self.checkpoint_path} was taken.")
+        self.count, self.rejected = (int(value) for value in state['counts'])
+        self.carries = [(float(total), float(comp)) for total, comp in state['carries']]
+        self.cells = state['cells']
+        first_time, last_time = state['times']
+        self.first_time = None if np.isnat(first_time) else first_time
+        self.last_time = None if np.isnat(last_time) else last_time
+
+    def summary(self):
+        """Metrics of the records read so far, with the fields of ChamberAccumulator.snapshot."""
+        averages = [(total + comp) / self.count if self.count else 0.0 for total, comp in self.carries]
+        duration = (self.last_time - self.first_time) / np.timedelta64(1, 's') / 3600 if self.first_time is not None else 0.0
+        return {
+            'samples': self.count,
+            'rejected': self.rejected,
+            'start': str(self.first_time) if self.first_time is not None else None,
+            'last': str(self.last_time) if self.last_time is not None else None,
+            'duration_hours': float(duration),
+            'x_avg': averages[0],
+            'y_avg': averages[1],
+            'z_avg': averages[2],
+            'magnitude': float(np.sqrt(sum(a * a for a in averages))),
+            'distribution': len(self.cells),
+            'progress': self.offset / self.file_size if self.file_size else 1.0,
+        }
@@ -0,0 +1,108 @@
+import numpy as np
+import kernels
+import fibonacci_sphere
+from data_compile_v1 import Sim
+from kim_model import KimModel
+
+CHUNK_SIZE = 1 << 18
+
+
+def theoretical_vectors(time_seconds, inner_rpm, outer_rpm, model='sim', delta=(0.0, 0.0, 0.0)):
+    """
+    Predicted acceleration (g) at the given times.
+
+    Parameters:
+    - time_seconds: Sample times (seconds from the start of the run)
+    - inner_rpm, outer_rpm: Frame velocities (RPM)
+    - model: 'sim' (gravity vector of Sim) or 'kim' (KimModel total acceleration, including
+      the non-gravitational terms at offset delta, converted from m/s² to g)
+    - delta: Sample offset from the clinostat centre (meters), used by 'kim'
+
+    Returns:
+    - (N, 3) array
+    """
+    if model == 'sim':
+        return Sim().gVectorAt(time_seconds, inner_rpm, outer_rpm)
+    if model == 'kim':
+        kim = KimModel(inner_rpm, outer_rpm, *delta, duration_hours=0)
+        _, _, _, a_tot_prime = kim.calculate_acceleration(time_array=time_seconds)
+        return a_tot_prime.T / -kim.g[2, 0]
+    raise ValueError(f"Unknown model: {model}")
+
+
+def resample(time_seconds, values, grid):
+    """Linearly interpolate (N, 3) samples onto a new time grid."""
+    values = np.asarray(values, dtype=np.float64)
+    return np.column_stack([np.interp(grid, time_seconds, values[:, i]) for i in range(values.shape[1])])
+
+
+def compare_runs(time_seconds, x, y, z, inner_rpm, outer_rpm, model='sim', delta=(0.0, 0.0, 0.0),
+                 grid_step=None, num_points=1000, chunk_size=CHUNK_SIZE):
+    """
+    Compare an experimental run with the path predicted for its RPM settings.
+
+    The model is evaluated on the experimental timestamps, or both series are put on a
+    uniform grid of grid_step seconds (experimental data by linear interpolation). All
+    statistics are accumulated chunk by chunk.
+
+    Returns:
+    - dict with
+      'time': comparison times (seconds);
+      'experimental_magnitude', 'theoretical_magnitude': time-averaged magnitudes (g);
+      'residual_magnitude': |experimental - theoretical| per sample (g);
+      'residual_mean', 'residual_max': statistics of residual_magnitude;
+      'rms': component RMS errors (x, y, z);
+      'distribution_experimental', 'distribution_theoretical', 'distribution_difference':
+      distribution scores (octant-restricted scorer from kernels on a num_points sphere)
+    """
+    time_seconds = np.asarray(time_seconds, dtype=np.float64)
+    experimental = np.column_stack((x, y, z)).astype(np.float64)
+    if grid_step is not None:
+        times = np.arange(time_seconds[0], time_seconds[-1] + grid_step / 2, grid_step)
+    else:
+        times = time_seconds
+
+    sphere = fibonacci_sphere.fibonacci_sphere(num_points)
+    n = len(times)
+    experimental_magnitude = np.empty(n)
+    theoretical_magnitude = np.empty(n)
+    residual_magnitude = np.empty(n)
+    squared_error = np.zeros(3)
+    carries = {'experimental': [(0.0, 0.0)] * 3, 'theoretical': [(0.0, 0.0)] * 3}
+    cells = {'experimental': [], 'theoretical': []}
+
+    for start in range(0, n, chunk_size):
+        end = min(start + chunk_size, n)
+        t = times[start:end]
+        if grid_step is not None:
+            measured = resample(time_seconds, experimental, t)
+        else:
+            measured = experimental[start:end]
+        vectors = {'experimental': measured, 'theoretical': theoretical_vectors(t, inner_rpm, outer_rpm, model, delta)}
+
+        residual = vectors['experimental'] - vectors['theoretical']
+        residual_magnitude[start:end] = np.sqrt(np.sum(residual ** 2, axis=1))
+        squared_error += np.sum(residual ** 2, axis=0)
+
+        for name, magnitude in (('experimental', experimental_magnitude), ('theoretical', theoretical_magnitude)):
+            averages = []
+            for i in range(3):
+                average, carries[name][i] = kernels.running_average(vectors[name][:, i], carries[name][i], start)
+                averages.append(average)
+            magnitude[start:end] = np.sqrt(averages[0] ** 2 + averages[1] ** 2 + averages[2] ** 2)
+            triangles = kernels.nearest_triangles(vectors[name], sphere)
+            cells[name].append(np.unique(kernels.triangle_ids(triangles, num_points)))
+
+    scores = {name: len(np.unique(np.concatenate(ids))) if ids else 0 for name, ids in cells.items()}
+    return {
+        'time': times,
+        'experimental_magnitude': experimental_magnitude,
+        'theoretical_magnitude': theoretical_magnitude,
+        'residual_magnitude': residual_magnitude,
+        'residual_mean': float(np.mean(residual_magnitude)) if n else 0.0,
+        'residual_max': float(np.max(residual_magnitude)) if n else 0.0,
+        'rms': tuple(np.sqrt(squared_error / max(n, 1))),
+        'distribution_experimental': scores['experimental'],
+        'distribution_theoretical': scores['theoretical'],
+        'distribution_difference': scores['experimental'] - scores['theoretical'],
+    }
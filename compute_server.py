@@ -0,0 +1,347 @@
+import argparse
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+from urllib.request import Request, urlopen
+import numpy as np
+import parallel_scoring
+from kim_model import KimModel, kim_time_averages
+from records import parse_lines
+from reporting import compute_run_result, compute_sim_result
+
+# Memory budget of the result cache (bytes of cached arrays).
+CACHE_BYTES = 1 << 29
+
+# Jobs queued or running at once; further distinct requests are refused with 503.
+MAX_PENDING = 16
+
+
+class Busy(Exception):
+    """Raised when the worker pool already has MAX_PENDING jobs."""
+
+
+def _run_summary(result):
+    return {
+        'label': result.label,
+        'samples': len(result.time_hours),
+        'duration_hours': float(result.time_hours[-1] - result.time_hours[0]) if len(result.time_hours) else 0.0,
+        'mean_magnitude': result.mean_magnitude,
+        'mean_magnitude_analysis': result.mean_magnitude_analysis,
+        'final_magnitude': float(result.magnitude[-1]) if len(result.magnitude) else None,
+        'distribution': int(result.distribution),
+    }
+
+
+def _run_arrays(result):
+    arrays = {name: getattr(result, name) for name in ('time_hours', 'x', 'y', 'z', 'x_avg', 'y_avg', 'z_avg', 'magnitude')}
+    if result.moving_magnitude is not None:
+        arrays['moving_magnitude'] = result.moving_magnitude
+    return arrays
+
+
+def simulate_job(inner_rpm, outer_rpm, duration_hours, start_analysis, end_analysis, moving_window_hours):
+    """Theoretical (Sim) run: summary and per-sample arrays."""
+    result = compute_sim_result(inner_rpm, outer_rpm, duration_hours, start_analysis, end_analysis,
+                                moving_window_hours=moving_window_hours)
+    return _run_summary(result), _run_arrays(result)
+
+
+def analyse_file_job(content, start_analysis, end_analysis, moving_window_hours):
+    """Accelerometer log (file content as bytes) parsed with records.parse_lines and analysed like a run."""
+    records = parse_lines(content.decode(errors='replace').splitlines())
+    if not len(records):
+        raise ValueError("No valid records in the uploaded file.")
+    if end_analysis is not None and end_analysis > np.max(records.time_in_hours):
+        raise ValueError("Upper bound for analysis period exceeds the final timestamp in the file.")
+    result = compute_run_result("Experimental", records.time_in_hours, records.x, records.y, records.z,
+                                start_analysis, end_analysis, moving_window_hours=moving_window_hours)
+    summary = _run_summary(result)
+    summary['rejected'] = [{'line': line, 'reason': reason} for line, reason, _ in records.rejected]
+    return summary, _run_arrays(result)
+
+
+def kim_job(inner_rpm, outer_rpm, delta_x, delta_y, delta_z, duration_hours):
+    """KimModel run: time-averaged magnitudes and the acceleration series (N, 3) in m/s²."""
+    time_array, g_prime, a_prime, a_tot_prime = KimModel(inner_rpm, outer_rpm, delta_x, delta_y, delta_z, duration_hours).calculate_acceleration()
+    averages = kim_time_averages(g_prime, a_prime)
+    summary = {
+        'samples': len(time_array),
+        'final_g_magnitude': float(averages['g_magnitude'][-1]),
+        'final_a_magnitude': float(averages['a_magnitude'][-1]),
+        'mean_g_magnitude': float(np.mean(averages['g_magnitude'])),
+        'mean_a_magnitude': float(np.mean(averages['a_magnitude'])),
+    }
+    arrays = {'time_seconds': time_array, 'g': g_prime.T, 'a': a_prime.T, 'a_tot': a_tot_prime.T,
+              'g_magnitude': averages['g_magnitude'], 'a_magnitude': averages['a_magnitude']}
+    return summary, arrays
+
+
+def distribution_job(content, num_points, method):
+    """Distribution score of an (N, 3) path sent as .npy bytes."""
+    try:
+        path = np.load(io.BytesIO(content), allow_pickle=False)
+    except (ValueError, EOFError, OSError) as e:
+        raise ValueError(f"Body is not a .npy array: {e}")
+    if path.ndim != 2 or path.shape[1] != 3 or len(path) == 0 or not np.all(np.isfinite(path)):
+        raise ValueError("Path must be a non-empty, finite (N, 3) array.")
+    score = parallel_scoring.distribution_score(path, num_points, method, workers=1)
+    return {'samples': len(path), 'distribution': int(score)}, {}
+
+
+class ComputeService:
+    def __init__(self, workers=None, max_pending=MAX_PENDING, cache_bytes=CACHE_BYTES):
+        """
+        Job execution shared by every client of the server.
+
+        Jobs run in a bounded process pool. Results are kept in an LRU cache bounded by the
+        size of their arrays, and a request identical to one still running waits for that
+        job instead of starting another (in-flight coalescing).
+
+        Parameters:
+        - workers: Worker processes (default: os.cpu_count())
+        - max_pending: Distinct jobs queued or running at once; more raise Busy
+        - cache_bytes: Cache budget in bytes of result arrays
+        """
+        self.pool = ProcessPoolExecutor(workers)
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.cache_bytes = cache_bytes
+        self.cache = OrderedDict()
+        self.cached_bytes = 0
+        self.in_flight = {}
+        self.lock = threading.RLock()
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0}
+
+    def run(self, key, job, *args):
+        """Result (summary, arrays) of job(*args), from the cache, a running identical job or a new one."""
+        with self.lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                self.stats['hits'] += 1
+                return self.cache[key]
+            future = self.in_flight.get(key)
+            if future is not None:
+                self.stats['coalesced'] += 1
+            else:
+                if not self.slots.acquire(blocking=False):
+                    raise Busy("Too many pending jobs; retry later.")
+                self.stats['misses'] += 1
+                future = self.pool.submit(job, *args)
+                self.in_flight[key] = future
+                future.add_done_callback(lambda done: self._finish(key, done))
+        return future.result()
+
+    def _finish(self, key, future):
+        self.slots.release()
+        with self.lock:
+            self.in_flight.pop(key, None)
+            if future.cancelled() or future.exception() is not None:
+                return
+            result = future.result()
+            size = sum(np.asarray(values).nbytes for values in result[1].values())
+            if size > self.cache_bytes:
+                return
+            self.cache[key] = result
+            self.cached_bytes += size
+            while self.cached_bytes > self.cache_bytes:
+                _, (_, arrays) = self.cache.popitem(last=False)
+                self.cached_bytes -= sum(np.asarray(values).nbytes for values in arrays.values())
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.stats, cached=len(self.cache), cached_bytes=self.cached_bytes, running=len(self.in_flight))
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+def _float(query, name, default=None):
+    values = query.get(name)
+    if not values or values[0] == '':
+        if default is None and name not in ('start', 'end', 'window'):
+            raise ValueError(f"Missing parameter: {name}")
+        return default
+    try:
+        value = float(values[0])
+    except ValueError:
+        raise ValueError(f"Parameter {name} must be a number, got {values[0]!r}.")
+    if not np.isfinite(value):
+        raise ValueError(f"Parameter {name} must be finite.")
+    return value
+
+
+def _check_duration(duration_hours):
+    # At least one 1 s sample, as KimModel.default_time_array needs
+    if duration_hours * 3600 < 1:
+        raise ValueError("Simulation duration must be at least 1 s (hours >= 1/3600).")
+
+
+def _check_analysis(start_analysis, end_analysis, moving_window_hours, duration_hours=None):
+    """Validate the analysis period (as gui_v3 does) and the moving-average window; the duration is unknown for uploads."""
+    if (start_analysis is None) != (end_analysis is None):
+        raise ValueError("Give both bounds of the analysis period or neither.")
+    if start_analysis is not None:
+        if start_analysis < 0 or end_analysis < 0:
+            raise ValueError("Time values must be positive.")
+        if end_analysis <= start_analysis:
+            raise ValueError("Upper bound for analysis period must be greater than the lower bound.")
+        if duration_hours is not None and end_analysis > duration_hours:
+            raise ValueError("Upper bound for analysis period must be less than or equal to the simulation duration.")
+    if moving_window_hours is not None and moving_window_hours <= 0:
+        raise ValueError("Moving-average window must be positive.")
+
+
+def _json_safe(value):
+    """Summary with non-finite floats replaced by None, so it serialises as strict JSON."""
+    if isinstance(value, dict):
+        return {key: _json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(item) for item in value]
+    if isinstance(value, (float, np.floating)):
+        return float(value) if np.isfinite(value) else None
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+
+class ComputeRequestHandler(BaseHTTPRequestHandler):
+    # Endpoints (parameters in the query string; 'format=npz' returns the arrays):
+    #   GET  /simulate?inner=&outer=&hours=[&start=&end=&window=]
+    #   GET  /kim?inner=&outer=&hours=[&dx=&dy=&dz=]
+    #   POST /analyse-file[?start=&end=&window=]  body: log file content
+    #   POST /distribution[?points=&method=]      body: (N, 3) path as .npy
+    #   GET  /stats
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self._dispatch(b'')
+
+    def do_POST(self):
+        self._dispatch(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+
+    def _dispatch(self, body):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        service = self.server.service
+        try:
+            if url.path == '/stats':
+                return self._send_json(200, service.snapshot())
+            route = self._job(url.path, query, body)
+            if route is None:
+                return self._send_json(404, {'error': f"Unknown endpoint: {url.path}"})
+            key, job, args = route
+            summary, arrays = service.run(key, job, *args)
+        except Busy as e:
+            return self._send_json(503, {'error': str(e)}, {'Retry-After': '5'})
+        except ValueError as e:
+            return self._send_json(400, {'error': str(e)})
+        except Exception as e:
+            return self._send_json(500, {'error': str(e)})
+        if query.get('format', ['json'])[0] == 'npz':
+            buffer = io.BytesIO()
+            np.savez(buffer, summary=np.array(json.dumps(_json_safe(summary), allow_nan=False)), **arrays)
+            return self._send(200, buffer.getvalue(), 'application/octet-stream')
+        return self._send_json(200, summary)
+
+    def _job(self, path, query, body):
+        analysis = (_float(query, 'start'), _float(query, 'end'), _float(query, 'window'))
+        if path == '/simulate':
+            args = (_float(query, 'inner'), _float(query, 'outer'), _float(query, 'hours'), *analysis)
+            _check_duration(args[2])
+            _check_analysis(*analysis, args[2])
+            return ('simulate',) + args, simulate_job, args
+        if path == '/kim':
+            args = (_float(query, 'inner'), _float(query, 'outer'), _float(query, 'dx', 0.0), _float(query, 'dy', 0.0),
+                    _float(query, 'dz', 0.0), _float(query, 'hours'))
+            _check_duration(args[5])
+            return ('kim',) + args, kim_job, args
+        if path == '/analyse-file':
+            _check_analysis(*analysis)
+            return ('analyse-file', hashlib.sha256(body).hexdigest()) + analysis, analyse_file_job, (body,) + analysis
+        if path == '/distribution':
+            num_points = _float(query, 'points', 1000)
+            if num_points != int(num_points) or num_points < 4:
+                raise ValueError("Parameter points must be an integer of at least 4.")
+            method = query.get('method', ['octant'])[0]
+            if method not in ('octant', 'fibonacci'):
+                raise ValueError(f"Unknown distribution method: {method}")
+            args = (body, int(num_points), method)
+            return ('distribution', hashlib.sha256(body).hexdigest()) + args[1:], distribution_job, args
+        return None
+
+    def _send_json(self, status, payload, headers=None):
+        self._send(status, json.dumps(_json_safe(payload), allow_nan=False).encode(), 'application/json', headers)
+
+    def _send(self, status, content, content_type, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(host='127.0.0.1', port=8766, workers=None, max_pending=MAX_PENDING, cache_bytes=CACHE_BYTES):
+    """ThreadingHTTPServer serving the compute endpoints; call serve_forever() and finally service.close()."""
+    server = ThreadingHTTPServer((host, port), ComputeRequestHandler)
+    server.service = ComputeService(workers, max_pending, cache_bytes)
+    return server
+
+
+class ComputeClient:
+    def __init__(self, base_url='http://127.0.0.1:8766', timeout=None):
+        """Thin client of the compute server; each call returns (summary, arrays)."""
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def _call(self, endpoint, params, body=None):
+        params = {name: value for name, value in params.items() if value is not None}
+        params['format'] = 'npz'
+        request = Request(f"{self.base_url}{endpoint}?{urlencode(params)}", data=body)
+        with urlopen(request, timeout=self.timeout) as response:
+            archive = np.load(io.BytesIO(response.read()), allow_pickle=False)
+        arrays = {name: archive[name] for name in archive.files if name != 'summary'}
+        return json.loads(str(archive['summary'])), arrays
+
+    def simulate(self, inner_rpm, outer_rpm, duration_hours, start_analysis=None, end_analysis=None, moving_window_hours=None):
+        return self._call('/simulate', {'inner': inner_rpm, 'outer': outer_rpm, 'hours': duration_hours,
+                                        'start': start_analysis, 'end': end_analysis, 'window': moving_window_hours})
+
+    def kim(self, inner_rpm, outer_rpm, delta_x, delta_y, delta_z, duration_hours):
+        return self._call('/kim', {'inner': inner_rpm, 'outer': outer_rpm, 'dx': delta_x, 'dy': delta_y, 'dz': delta_z,
+                                   'hours': duration_hours})
+
+    def analyse_file(self, file_path, start_analysis=None, end_analysis=None, moving_window_hours=None):
+        with open(file_path, 'rb') as file:
+            content = file.read()
+        return self._call('/analyse-file', {'start': start_analysis, 'end': end_analysis, 'window': moving_window_hours}, content)
+
+    def distribution(self, x, y, z, num_points=1000, method='octant'):
+        buffer = io.BytesIO()
+        np.save(buffer, np.column_stack((x, y, z)).astype(np.float64))
+        return self._call('/distribution', {'points': num_points, 'method': method}, buffer.getvalue())[0]
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Serve simulations and analyses to local clients.")
+    arg_parser.add_argument('--host', default='127.0.0.1')
+    arg_parser.add_argument('--port', type=int, default=8766)
+    arg_parser.add_argument('--workers', type=int, default=None)
+    args = arg_parser.parse_args()
+    server = make_server(args.host, args.port, args.workers)
+    print(f"Serving on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.close()
@@ -0,0 +1,115 @@
+import numpy as np
+from data_compile_v1 import Sim
+
+
+def _crossing_time(t_above, t_below, mag_above, mag_below, threshold):
+    """Interpolate the threshold crossing between two samples, linearly in log10(magnitude)."""
+    log_above, log_below = np.log10(mag_above), np.log10(mag_below)
+    if not np.isfinite(log_below) or log_above == log_below:
+        return t_above
+    fraction = (log_above - np.log10(threshold)) / (log_above - log_below)
+    return t_above + fraction * (t_below - t_above)
+
+
+def settling_time_from_sums(time, sum_x, sum_y, sum_z, threshold, denominators=None, chunk_size=1 << 16):
+    """
+    Earliest time after which the time-averaged magnitude stays below a threshold.
+
+    Scans the cumulative sums backward in chunks and stops at the last sample at or above
+    the threshold, so only the tail of the magnitude series is ever materialised.
+
+    Parameters:
+    - time: Sample times (any unit; the results use the same unit)
+    - sum_x, sum_y, sum_z: Cumulative sums of the components
+    - threshold: Magnitude threshold (same unit as the components)
+    - denominators: Divisor of each cumulative sum (default: sample count 1..N)
+    - chunk_size: Samples per backward step
+
+    Returns:
+    - settle_time: First sample time after the last exceedance (None if the run ends above the threshold)
+    - last_crossing: Interpolated time of the last downward crossing (None if never above the threshold)
+    """
+    n = len(time)
+
+    def magnitude(start, end):
+        denom = np.arange(start + 1, end + 1) if denominators is None else np.asarray(denominators[start:end])
+        return np.sqrt(np.asarray(sum_x[start:end]) ** 2 + np.asarray(sum_y[start:end]) ** 2 + np.asarray(sum_z[start:end]) ** 2) / denom
+
+    for end in range(n, 0, -chunk_size):
+        start = max(0, end - chunk_size)
+        above = np.flatnonzero(magnitude(start, end) >= threshold)
+        if len(above) == 0:
+            continue
+        last = start + above[-1]
+        if last == n - 1:
+            return None, None
+        mag_above, mag_below = magnitude(last, last + 2)
+        return time[last + 1], _crossing_time(time[last], time[last + 1], mag_above, mag_below, threshold)
+    return (time[0] if n else None), None
+
+
+def settling_time(time, x, y, z, threshold):
+    """Settling and last-crossing times of a sampled (experimental) run; see settling_time_from_sums."""
+    return settling_time_from_sums(time, np.cumsum(x), np.cumsum(y), np.cumsum(z), threshold)
+
+
+def theoretical_settling_time(inner_rpm, outer_rpm, duration_hours, threshold, chunk_size=1 << 16, coarse_step=4096, refine=16):
+    """
+    Settling and last-crossing times (hours) of the theoretical time-averaged magnitude.
+
+    The closed-form average (Sim.gVectorTimeAvg) is first evaluated on a coarse grid. The
+    average of n + 1 unit vectors moves by at most 2 / (n + 1) per sample, so between grid
+    points lo and hi the magnitude never exceeds (mag(lo) + mag(hi)) / 2 + (hi - lo) / (lo + 1);
+    intervals where that bound is below the threshold are certified and never sampled, and
+    intervals before the last grid point at or above the threshold cannot hold the last
+    exceedance. The remaining intervals are split `refine` ways and re-checked until they
+    are at most `refine` samples long, then scanned densely, one vectorized call per chunk,
+    backward from the end of the run.
+    """
+    sim = Sim()
+    end_time = int(duration_hours * 3600)
+
+    def magnitude(times):
+        return sim.gVectorTimeAvg(times, inner_rpm, outer_rpm)[3]
+
+    grid = np.unique(np.append(np.arange(0, end_time, coarse_step), end_time))
+    grid_magnitude = magnitude(grid)
+    if grid_magnitude[-1] >= threshold:
+        return None, None
+    last = -1
+    lo, hi = grid[:-1], grid[1:]
+    mag_lo, mag_hi = grid_magnitude[:-1], grid_magnitude[1:]
+    while True:
+        exceeding = np.flatnonzero(mag_lo >= threshold)
+        if len(exceeding):
+            last = max(last, int(lo[exceeding[-1]]))
+        bound = 0.5 * (mag_lo + mag_hi) + (hi - lo) / (lo + 1)
+        keep = (bound >= threshold) & (hi > last + 1)
+        lo, hi, mag_lo, mag_hi = lo[keep], hi[keep], mag_lo[keep], mag_hi[keep]
+        if len(lo) == 0 or np.max(hi - lo) <= refine:
+            break
+        # Split each remaining interval into `refine` parts (or single samples) and re-check.
+        step = np.maximum(1, -(-(hi - lo) // refine))
+        counts = -(-(hi - lo) // step)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        points = np.repeat(lo, counts) + offsets * np.repeat(step, counts)
+        point_hi = np.minimum(points + np.repeat(step, counts), np.repeat(hi, counts))
+        point_magnitude = magnitude(points)
+        is_last = np.cumsum(counts) - 1
+        next_magnitude = np.append(point_magnitude[1:], 0.0)
+        next_magnitude[is_last] = mag_hi
+        lo, hi, mag_lo, mag_hi = points, point_hi, point_magnitude, next_magnitude
+
+    intervals_per_chunk = max(1, chunk_size // refine)
+    for end in range(len(lo), 0, -intervals_per_chunk):
+        begin = max(0, end - intervals_per_chunk)
+        times = np.concatenate([np.arange(max(a, last + 1), b) for a, b in zip(lo[begin:end], hi[begin:end])])
+        above = np.flatnonzero(magnitude(times) >= threshold)
+        if len(above):
+            last = int(times[above[-1]])
+            break
+    if last < 0:
+        return 0.0, None
+    mag_above, mag_below = magnitude(np.array([last, last + 1]))
+    crossing = _crossing_time(last, last + 1, float(mag_above), float(mag_below), threshold)
+    return (last + 1) / 3600, crossing / 3600
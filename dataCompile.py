@@ -0,0 +1,282 @@
+import math
+import os
+import numpy as np
+import kernels
+import fibonacci_sphere
+import parallel_scoring
+import data_compile_v1
+from data_compile_v1 import Sim
+
+
+class ReferenceBackend:
+    """
+    Pure-Python implementation of the core API, written for clarity rather than speed.
+
+    It is the oracle the other backends are checked against (see check_backends); use it
+    on short runs only.
+    """
+    name = 'reference'
+
+    def simulate(self, inner_rpm, outer_rpm, end_time):
+        time, x, y, z = Sim().gVectorData(0, end_time, inner_rpm, outer_rpm)
+        return np.asarray(time), np.asarray(x), np.asarray(y), np.asarray(z)
+
+    def time_average(self, values):
+        averages, total = [], 0.0
+        for i, value in enumerate(values):
+            total += float(value)
+            averages.append(total / (i + 1))
+        return np.asarray(averages)
+
+    def magnitude(self, x_avg, y_avg, z_avg):
+        return np.asarray([math.sqrt(a * a + b * b + c * c) for a, b, c in zip(x_avg, y_avg, z_avg)])
+
+    def window_mean(self, values, start, end):
+        window = [float(v) for v in values[start:end]]
+        return sum(window) / len(window) if window else float('nan')
+
+    def distribution_score(self, x, y, z, num_points=1000):
+        sphere = fibonacci_sphere.fibonacci_sphere(num_points).tolist()
+        octants = [self._octant(vertex) for vertex in sphere]
+        cells = set()
+        for point in zip(x, y, z):
+            octant = self._octant(point)
+            nearest = sorted((sum((p - v) ** 2 for p, v in zip(point, vertex)), i)
+                             for i, vertex in enumerate(sphere) if octants[i] == octant)[:3]
+            cells.add(tuple(i for _, i in nearest))
+        return len(cells)
+
+    def _octant(self, point):
+        x, y, z = point
+        quadrant = (0 if x > 0 else 1) if y > 0 else (3 if x > 0 else 2)
+        return quadrant if z > 0 else quadrant + 4
+
+
+class NumpyBackend:
+    """Vectorized backend: whole-array Sim evaluation and the kernels module (numba when available)."""
+    name = 'numpy'
+
+    def simulate(self, inner_rpm, outer_rpm, end_time):
+        time, vectors = Sim().gVectorArray(0, end_time, inner_rpm, outer_rpm)
+        return time, vectors[:, 0], vectors[:, 1], vectors[:, 2]
+
+    def time_average(self, values):
+        return kernels.running_average(values)[0]
+
+    def magnitude(self, x_avg, y_avg, z_avg):
+        x_avg, y_avg, z_avg = (np.asarray(v, dtype=np.float64) for v in (x_avg, y_avg, z_avg))
+        return np.sqrt(x_avg ** 2 + y_avg ** 2 + z_avg ** 2)
+
+    def window_mean(self, values, start, end):
+        window = np.asarray(values[start:end], dtype=np.float64)
+        return float(np.mean(window)) if len(window) else float('nan')
+
+    def distribution_score(self, x, y, z, num_points=1000):
+        path = np.column_stack((x, y, z))
+        return kernels.distribution_score(path, fibonacci_sphere.fibonacci_sphere(num_points))
+
+
+class ChunkedBackend(NumpyBackend):
+    """
+    Chunked and parallel backend for very long runs.
+
+    Samples are generated and averaged in fixed-size chunks (bounded temporaries, running
+    sums carried across chunks) and the distribution score is computed by the
+    shared-memory process pool in parallel_scoring.
+    """
+    name = 'chunked'
+
+    def __init__(self, chunk_size=1 << 18, workers=None):
+        self.chunk_size = chunk_size
+        self.workers = workers
+
+    def simulate(self, inner_rpm, outer_rpm, end_time):
+        time = np.arange(0, end_time + 1)
+        vectors = np.empty((len(time), 3))
+        sim = Sim()
+        for start in range(0, len(time), self.chunk_size):
+            vectors[start:start + self.chunk_size] = sim.gVectorAt(time[start:start + self.chunk_size], inner_rpm, outer_rpm)
+        return time, vectors[:, 0], vectors[:, 1], vectors[:, 2]
+
+    def time_average(self, values):
+        averages = np.empty(len(values))
+        carry = (0.0, 0.0)
+        for start in range(0, len(values), self.chunk_size):
+            averages[start:start + self.chunk_size], carry = kernels.running_average(values[start:start + self.chunk_size], carry, start)
+        return averages
+
+    def distribution_score(self, x, y, z, num_points=1000):
+        path = np.column_stack((x, y, z))
+        return parallel_scoring.distribution_score(path, num_points, workers=self.workers, chunk_size=self.chunk_size)
+
+
+BACKENDS = {
+    'reference': ReferenceBackend(),
+    'numpy': NumpyBackend(),
+    'chunked': ChunkedBackend(),
+}
+
+_default_backend = 'numpy'
+
+
+def register_backend(name, backend):
+    """Add or replace a backend (an object implementing the ReferenceBackend methods)."""
+    BACKENDS[name] = backend
+
+
+def set_backend(name):
+    """Select the default backend used when callers do not name one."""
+    global _default_backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown compute backend: {name}")
+    _default_backend = name
+
+
+def get_backend(name=None):
+    """Backend object by name (default: the one chosen with set_backend)."""
+    name = name or _default_backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown compute backend: {name}")
+    return BACKENDS[name]
+
+
+def simulate(inner_rpm, outer_rpm, duration_hours, backend=None):
+    """Theoretical gravity vector at 1 s samples: time (seconds), x, y, z."""
+    return get_backend(backend).simulate(float(inner_rpm), float(outer_rpm), int(duration_hours * 3600))
+
+
+def time_average(x, y, z, backend=None):
+    """Running time averages of the three components."""
+    compute = get_backend(backend)
+    return compute.time_average(x), compute.time_average(y), compute.time_average(z)
+
+
+def magnitude(x_avg, y_avg, z_avg, backend=None):
+    """Magnitude of the time-averaged vector."""
+    return get_backend(backend).magnitude(x_avg, y_avg, z_avg)
+
+
+def window_stats(magnitudes, start, end, full_end=None, backend=None):
+    """
+    Mean magnitude over the run and over the sample window [start, end).
+
+    Returns:
+    - (mean over [0, full_end), mean over [start, end)); the window mean is None without a window
+    """
+    compute = get_backend(backend)
+    full = compute.window_mean(magnitudes, 0, len(magnitudes) if full_end is None else full_end)
+    if start is None or end is None:
+        return full, None
+    return full, compute.window_mean(magnitudes, start, end)
+
+
+def distribution_score(x, y, z, num_points=1000, backend=None):
+    """Number of distinct nearest-vertex triangles the path visits (octant method)."""
+    return get_backend(backend).distribution_score(x, y, z, num_points)
+
+
+class DataProcessor(data_compile_v1.DataProcessor):
+    # Same interface as data_compile_v1.DataProcessor, computed with the selected backend.
+    # Both the camelCase methods and the snake_case names used by the GUIs are available,
+    # and the analysis period is optional.
+    def __init__(self, innerV, outerV, maxSeg, startAnalysis=None, endAnalysis=None, backend=None, compact=False, analytic=False):
+        self.backend = get_backend(backend)
+        self.hasAnalysis = startAnalysis is not None and endAnalysis is not None
+        if not self.hasAnalysis:
+            startAnalysis, endAnalysis = 0, maxSeg
+        super().__init__(innerV, outerV, maxSeg, startAnalysis, endAnalysis, compact=compact, analytic=analytic)
+
+    def _getSimAccelData(self):
+        if self.compact:
+            return super()._getSimAccelData()
+        return self.backend.simulate(float(self.innerV), float(self.outerV), self.endTime)
+
+    def _getTimeAvg(self):
+        if self.analytic:
+            return super()._getTimeAvg()
+        return self.backend.time_average(self.x), self.backend.time_average(self.y), self.backend.time_average(self.z)
+
+    def _getMagnitude(self, xTimeAvg, yTimeAvg, zTimeAvg):
+        return self.backend.magnitude(xTimeAvg, yTimeAvg, zTimeAvg)
+
+    def _getMagSeg(self, magList):
+        startSeg, endSeg = (self.startSeg, self.endSeg) if self.hasAnalysis else (None, None)
+        return window_stats(magList, startSeg, endSeg, self.endTime, backend=self.backend.name)
+
+    def getDistribution(self):
+        return self.backend.distribution_score(self.x, self.y, self.z)
+
+    def _get_time_avg(self):
+        return self._getTimeAvg()
+
+    def _get_magnitude(self, x_time_avg, y_time_avg, z_time_avg):
+        return self._getMagnitude(x_time_avg, y_time_avg, z_time_avg)
+
+    def _get_mag_seg(self, mag_list):
+        return self._getMagSeg(mag_list)
+
+    def get_distribution(self):
+        return self.getDistribution()
+
+
+class PathVisualization(data_compile_v1.PathVisualization):
+    # data_compile_v1.PathVisualization with backend selection and snake_case names.
+    def __init__(self, ID, x, y, z, saveFile='', compact=False, numPoints=1000, backend=None):
+        super().__init__(ID, x, y, z, saveFile=saveFile, compact=compact, numPoints=numPoints)
+        self.backend = get_backend(backend)
+
+    def getDistribution(self, method='octant'):
+        if method != 'octant':
+            return super().getDistribution(method)
+        return self.backend.distribution_score(self.x, self.y, self.z, self.num_points)
+
+    def get_distribution(self, method='octant'):
+        return self.getDistribution(method)
+
+    def format_time(self, time):
+        return self.formatTime(time)
+
+
+def check_backends(inner_rpm=2.0, outer_rpm=3.0, duration_hours=0.5, names=None, rtol=1e-12):
+    """
+    Run the core API on every backend and compare each result with the reference backend.
+
+    Returns:
+    - dict of backend name -> list of the quantities that disagree (empty when equivalent)
+    """
+    names = names or list(BACKENDS)
+    expected = _core_results('reference', inner_rpm, outer_rpm, duration_hours)
+    mismatches = {}
+    for name in names:
+        actual = _core_results(name, inner_rpm, outer_rpm, duration_hours)
+        mismatches[name] = [key for key in expected
+                            if not np.allclose(np.asarray(actual[key], dtype=np.float64), np.asarray(expected[key], dtype=np.float64), rtol=rtol, atol=rtol)]
+    return mismatches
+
+
+def _core_results(name, inner_rpm, outer_rpm, duration_hours):
+    time, x, y, z = simulate(inner_rpm, outer_rpm, duration_hours, backend=name)
+    averages = time_average(x, y, z, backend=name)
+    magnitudes = magnitude(*averages, backend=name)
+    half = len(time) // 2
+    return {
+        'time': time,
+        'x': x,
+        'y': y,
+        'z': z,
+        'x_avg': averages[0],
+        'y_avg': averages[1],
+        'z_avg': averages[2],
+        'magnitude': magnitudes,
+        'window': window_stats(magnitudes, half // 2, half, backend=name),
+        'distribution': distribution_score(x, y, z, backend=name),
+    }
+
+
+if os.environ.get('COMPUTE_BACKEND'):
+    set_backend(os.environ['COMPUTE_BACKEND'])
+
+
+if __name__ == "__main__":
+    for backend_name, failed in check_backends().items():
+        print(f"{backend_name:10s} {'OK' if not failed else 'MISMATCH: ' + ', '.join(failed)}")
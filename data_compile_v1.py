@@ -1,4 +1,7 @@
 import numpy as np
+import kernels
+import fibonacci_sphere
+import trig_tables
 import math
 import sys
 
@@ -31,8 +34,75 @@ class Sim:
         data = timeArray, xArray, yArray, zArray
         return data
 
+    def gVectorArray(self, startTimeInSeconds, endTimeInSeconds, innerRPM, outerRPM, dtype=np.float64, trig='direct'):
+        timeArray = np.arange(startTimeInSeconds, endTimeInSeconds + 1)
+        return timeArray, self.gVectorAt(timeArray, innerRPM, outerRPM, dtype, trig)
+
+    # trig='phasor' takes the frame cos/sin from trig_tables.frame_trig (phasor recurrence on
+    # uniform grids, no per-sample sin/cos calls); 'direct' evaluates them per sample as before.
+    # The output is filled chunkSize samples at a time, so the float64 angle and cos/sin
+    # temporaries stay chunk-sized even when a long run is stored as float32.
+    def gVectorAt(self, timeArray, innerRPM, outerRPM, dtype=np.float64, trig='direct', chunkSize=1 << 18):
+        timeArray = np.asarray(timeArray)
+        vectors = np.empty((len(timeArray), 3), dtype=dtype)
+        for start in range(0, len(timeArray), chunkSize):
+            chunk = timeArray[start:start + chunkSize]
+            if trig == 'direct':
+                innerAngle = self.RPMtoRadSec(innerRPM) * chunk
+                outerAngle = self.RPMtoRadSec(outerRPM) * chunk
+                cosInner, sinInner = np.cos(innerAngle), np.sin(innerAngle)
+                cosOuter, sinOuter = np.cos(outerAngle), np.sin(outerAngle)
+            else:
+                cosInner, sinInner = trig_tables.frame_trig(innerRPM, chunk, trig)
+                cosOuter, sinOuter = trig_tables.frame_trig(outerRPM, chunk, trig)
+            out = vectors[start:start + chunkSize]
+            out[:, 0] = sinOuter * cosInner
+            out[:, 1] = cosOuter
+            out[:, 2] = sinOuter * sinInner
+        return vectors
+
+    # Closed-form time averages. Every component is a sum of sin/cos terms in (outer +/- inner)*t
+    # and outer*t, so the running mean of each term has an O(1) expression:
+    #   discrete (mean of the 1 s samples 0..t, as DataProcessor averages them), with u = w/2
+    #   reduced to [-pi/2, pi/2] and n = t + 1 samples:
+    #     mean cos(w*s) = sinc(n*u) / sinc(u) * cos((n - 1)*u)
+    #     mean sin(w*s) = sinc(n*u) / sinc(u) * sin((n - 1)*u)
+    #   continuous ((1/t) * integral over [0, t]), with u = w*t/2:
+    #     mean cos(w*s) = sinc(2*u),  mean sin(w*s) = sin(u) * sinc(u)
+    # Written with sinc, zero and coinciding frequencies (w = 0) and t = 0 need no special case.
+    def _sinCosMean(self, omega, timeInSeconds, discrete):
+        if discrete:
+            n = np.floor(timeInSeconds) + 1
+            u = 0.5 * (omega - 2 * np.pi * np.round(omega / (2 * np.pi)))
+            ratio = np.sinc(n * u / np.pi) / np.sinc(u / np.pi)
+            return ratio * np.sin((n - 1) * u), ratio * np.cos((n - 1) * u)
+        u = 0.5 * omega * timeInSeconds
+        return np.sin(u) * np.sinc(u / np.pi), np.sinc(2 * u / np.pi)
+
+    def gVectorTimeAvg(self, timeInSeconds, innerRPM, outerRPM, discrete=True):
+        innerInRadSec = self.RPMtoRadSec(innerRPM)
+        outerInRadSec = self.RPMtoRadSec(outerRPM)
+        timeInSeconds = np.asarray(timeInSeconds, dtype=np.float64)
+        sinSum, cosSum = self._sinCosMean(outerInRadSec + innerInRadSec, timeInSeconds, discrete)
+        sinDiff, cosDiff = self._sinCosMean(outerInRadSec - innerInRadSec, timeInSeconds, discrete)
+        sinOuter, cosOuter = self._sinCosMean(outerInRadSec, timeInSeconds, discrete)
+        xAvg = 0.5 * (sinSum + sinDiff)
+        yAvg = cosOuter
+        zAvg = 0.5 * (cosDiff - cosSum)
+        magAvg = np.sqrt(xAvg ** 2 + yAvg ** 2 + zAvg ** 2)
+        return xAvg, yAvg, zAvg, magAvg
+
 class DataProcessor:
-    def __init__(self, innerV, outerV, maxSeg, startAnalysis, endAnalysis):
+    # compact=True stores the samples as one contiguous float32 (N, 3) array (12 bytes per
+    # sample instead of ~100 for three lists of boxed floats); x, y and z are column views.
+    # Running sums are always accumulated in float64, so the only error introduced is the
+    # float32 rounding of each sample (relative 6e-8). That error does not average out
+    # reliably, so time-averaged magnitudes below ~1e-7 g are at the float32 noise floor
+    # in compact mode, while everything above it matches the float64 result.
+    # analytic=True makes _getTimeAvg evaluate Sim.gVectorTimeAvg instead of summing the samples,
+    # and defers generating the samples until x, y or z is first used (path, distribution), so
+    # the time averages and magnitude of a long run never touch the samples at all.
+    def __init__(self, innerV, outerV, maxSeg, startAnalysis, endAnalysis, compact=False, analytic=False):
         self.innerV = innerV
         self.outerV = outerV
         self.minSeg = 0
@@ -42,40 +112,55 @@ class DataProcessor:
         self.endAnalysis = endAnalysis
         self.startSeg = int(self.startAnalysis * 3600)
         self.endSeg = int(self.endAnalysis * 3600)
-        self.time, self.x, self.y, self.z = self._getSimAccelData()
+        self.compact = compact
+        self.analytic = analytic
+        if self.analytic:
+            self.time = np.arange(0, self.endTime + 1)
+        else:
+            self.time, self.x, self.y, self.z = self._getSimAccelData()
+
+    def __getattr__(self, name):
+        if name in ('x', 'y', 'z') and self.__dict__.get('analytic'):
+            _, self.x, self.y, self.z = self._getSimAccelData()
+            return getattr(self, name)
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
 
     def _getSimAccelData(self):
         simInnerV = float(self.innerV)
         simOuterV = float(self.outerV)
         vectorSim = Sim()
+        if self.compact:
+            time, self.vectors = vectorSim.gVectorArray(0, self.endTime, simInnerV, simOuterV, dtype=np.float32)
+            return time, self.vectors[:, 0], self.vectors[:, 1], self.vectors[:, 2]
         time, x, y, z = vectorSim.gVectorData(0, self.endTime, simInnerV, simOuterV)
         return time, x, y, z
 
     def _getTimeAvg(self):
-        xTimeAvg = []
-        xTempList = []
-        for xIter in self.x:
-            xTempList.append(xIter)
-            xTimeAvg.append(np.mean(xTempList))
-        
-        yTimeAvg = []
-        yTempList = []
-        for yIter in self.y:
-            yTempList.append(yIter)
-            yTimeAvg.append(np.mean(yTempList))
-
-        zTimeAvg = []
-        zTempList = []
-        for zIter in self.z:
-            zTempList.append(zIter)
-            zTimeAvg.append(np.mean(zTempList))
-        
+        if self.analytic:
+            xTimeAvg, yTimeAvg, zTimeAvg, _ = Sim().gVectorTimeAvg(self.time, float(self.innerV), float(self.outerV))
+            return xTimeAvg, yTimeAvg, zTimeAvg
+
+        xTimeAvg, _ = kernels.running_average(self.x)
+        yTimeAvg, _ = kernels.running_average(self.y)
+        zTimeAvg, _ = kernels.running_average(self.z)
         return xTimeAvg, yTimeAvg, zTimeAvg
 
+    # numPoints=None evaluates every 1 s sample time, giving the full-resolution curve.
+    def getAnalyticTimeAvg(self, numPoints=2000):
+        if numPoints is None:
+            time = np.arange(0, self.endTime + 1)
+        else:
+            time = np.unique(np.linspace(0, self.endTime, numPoints).round())
+        xTimeAvg, yTimeAvg, zTimeAvg, magAvg = Sim().gVectorTimeAvg(time, float(self.innerV), float(self.outerV))
+        return time, xTimeAvg, yTimeAvg, zTimeAvg, magAvg
+
     def _getMagnitude(self, xTimeAvg, yTimeAvg, zTimeAvg):
+        if self.compact or self.analytic:
+            return np.sqrt(xTimeAvg ** 2 + yTimeAvg ** 2 + zTimeAvg ** 2)
+
         magList = []
 
-        for i in range(len(self.x)):
+        for i in range(len(xTimeAvg)):
             xIter = xTimeAvg[i]
             yIter = yTimeAvg[i]
             zIter = zTimeAvg[i]
@@ -105,20 +190,23 @@ class DataProcessor:
         return avgMagFull, avgMagAnalysis
 
     def getDistribution(self):
-        path = PathVisualization(self.innerV, self.x, self.y, self.z)
+        path = PathVisualization(self.innerV, self.x, self.y, self.z, compact=self.compact)
         disScore = path.getDistribution()
         return disScore
 
 class PathVisualization:
-    def __init__(self, ID, x, y, z, saveFile=''):
+    def __init__(self, ID, x, y, z, saveFile='', compact=False, numPoints=1000):
         self.ID = ID
 
         self.x = x
         self.y = y
         self.z = z
 
-        self.pathCoords = list(zip(self.x, self.y, self.z))
-        self.num_points = 1000
+        if compact:
+            self.pathCoords = np.ascontiguousarray(np.column_stack((x, y, z)), dtype=np.float32)
+        else:
+            self.pathCoords = list(zip(self.x, self.y, self.z))
+        self.num_points = numPoints
 
         self.saveFile = saveFile
 
@@ -143,95 +231,18 @@ class PathVisualization:
 
         return(Xs, Ys, Zs)
 
-    def __splitSphere(self, sphereCoords):
-        octants = {'posI':[], 'posII':[], 'posIII':[], 'posIV':[], 'negI':[], 'negII':[], 'negIII':[], 'negIV':[]}
-        
-        for row in sphereCoords:
-            if (row[2] > 0):
-                if (row[1] > 0):
-                    if (row[0] > 0):
-                        octants['posI'].append(row)
-                    else:
-                        octants['posII'].append(row)
-                elif (row[0] > 0):
-                    octants['posIV'].append(row)
-                else: 
-                    octants['posIII'].append(row)
-            else:
-                if (row[1] > 0):
-                    if (row[0] > 0):
-                        octants['negI'].append(row)
-                    else:
-                        octants['negII'].append(row)
-                elif (row[0] > 0):
-                    octants['negIV'].append(row)
-                else:
-                    octants['negIII'].append(row)
-        
-        return(octants)
-
-    def __getPathOctant(self, pathRow):
-        if (pathRow[2] > 0):
-            if (pathRow[1] > 0):
-                if (pathRow[0] > 0):
-                    return 'posI'
-                else:
-                    return 'posII'
-            elif (pathRow[0] > 0):
-                return 'posIV'
-            else: 
-                return 'posIII'
-        else:
-            if (pathRow[1] > 0):
-                if (pathRow[0] > 0):
-                    return 'negI'
-                else:
-                    return 'negII'
-            elif (pathRow[0] > 0):
-                return 'negIV'
-            else:
-                return 'negIII'
-
-    def __getDistanceBetween(self, pathTupleCoords, sphereTupleCoords):
-        pathX, pathY, pathZ = pathTupleCoords
-        sphereX, sphereY, sphereZ = sphereTupleCoords
-
-        diffX = pathX - sphereX
-        diffY = pathY - sphereY
-        diffZ = pathZ - sphereZ
+    # method='octant' is the original score: 3 nearest vertices within the path point's octant,
+    # O(N * num_points). method='fibonacci' finds the 3 nearest vertices on the whole sphere with
+    # the inverse Fibonacci mapping in O(N) for any mesh size; it can differ from 'octant' for
+    # points whose nearest vertices straddle an octant boundary.
+    def getDistribution(self, method='octant'):
+        if method == 'fibonacci':
+            triangles = fibonacci_sphere.nearest_vertices(self.pathCoords, self.num_points)
+            return len(np.unique(kernels.triangle_ids(triangles, self.num_points)))
 
-        sumSquares = diffX ** 2 + diffY ** 2 + diffZ ** 2
-        dist = np.sqrt(sumSquares)
-
-        return dist
-
-    def __getDistributionNum(self, sphereCoords):
-        octants = self.__splitSphere(sphereCoords)
-        
-        pathMap = {} 
-        repeatTime = -1
-
-        for pathRow in self.pathCoords:
-            pathOctant = self.__getPathOctant(pathRow)
-            sphereCoordsSplit = octants[pathOctant]
-            distDict = {}
-            repeatTime += 1
-
-            for sphereRow in sphereCoordsSplit:
-                dist = self.__getDistanceBetween(pathRow, sphereRow) 
-                distDict[sphereRow] = dist 
-                    
-            rankedDist = sorted(distDict.items(), key=lambda x:x[1]) 
-            segmentVertices = (rankedDist[0][0], rankedDist[1][0], rankedDist[2][0]) 
-            
-            pathMap[segmentVertices] = pathMap.get(segmentVertices, []) + [repeatTime] 
-        
-        return(len(pathMap))
-
-    def getDistribution(self):
         Xsphere, Ysphere, Zsphere = self.__createSphere()
-        sphereCoords = list(zip(Xsphere, Ysphere, Zsphere))
-        score = self.__getDistributionNum(sphereCoords)
+        sphereCoords = np.column_stack((Xsphere, Ysphere, Zsphere))
+        score = kernels.distribution_score(self.pathCoords, sphereCoords)
         return score
     
     def formatTime(self, time):
@@ -0,0 +1,162 @@
+import os
+import shutil
+import tempfile
+import zipfile
+import numpy as np
+import kernels
+import time_weighted
+from rolling import MovingAverage
+
+EXPORT_COLUMNS = (
+    ("Time (hours)", 'time_hours'),
+    ("X (g)", 'x'),
+    ("Y (g)", 'y'),
+    ("Z (g)", 'z'),
+    ("Time-Averaged X (g)", 'x_avg'),
+    ("Time-Averaged Y (g)", 'y_avg'),
+    ("Time-Averaged Z (g)", 'z_avg'),
+    ("Magnitude (g)", 'magnitude'),
+    ("Analysis Period", 'in_analysis'),
+)
+
+# Appended to EXPORT_COLUMNS when a moving-average window is exported.
+MOVING_COLUMNS = (
+    ("Moving-Average X (g)", 'x_moving'),
+    ("Moving-Average Y (g)", 'y_moving'),
+    ("Moving-Average Z (g)", 'z_moving'),
+    ("Moving-Average Magnitude (g)", 'magnitude_moving'),
+)
+
+CHUNK_ROWS = 1 << 18
+
+
+def export_columns(moving_window_hours=None):
+    """(header, key) pairs of the exported columns."""
+    return EXPORT_COLUMNS + (MOVING_COLUMNS if moving_window_hours else ())
+
+
+def iter_export_chunks(time_hours, x, y, z, start_analysis=None, end_analysis=None, chunk_rows=CHUNK_ROWS, time_weighted_avg=False,
+                       moving_window_hours=None):
+    """
+    Yield export rows in chunks, computed from the source arrays.
+
+    Time averages are carried across chunks with the compensated running sums from
+    kernels, so they match DataProcessor._getTimeAvg without materialising full-length
+    derived arrays.
+
+    Parameters:
+    - time_hours, x, y, z: Source series (arrays or lists of equal length)
+    - start_analysis, end_analysis: Analysis period in hours (flag column is 0 without one)
+    - chunk_rows: Rows per chunk
+    - time_weighted_avg: Export time-weighted averages (time_weighted.time_weighted_average)
+      instead of per-sample means
+    - moving_window_hours: Also export moving averages over this window (rolling.MovingAverage)
+
+    Yields:
+    - dict of column key -> array for one chunk (keys as in export_columns)
+    """
+    carries = [None] * 3 if time_weighted_avg else [(0.0, 0.0)] * 3
+    movers = [MovingAverage(moving_window_hours * 3600) for _ in range(3)] if moving_window_hours else None
+    for start in range(0, len(time_hours), chunk_rows):
+        end = min(start + chunk_rows, len(time_hours))
+        chunk = {
+            'time_hours': np.asarray(time_hours[start:end], dtype=np.float64),
+            'x': np.asarray(x[start:end], dtype=np.float64),
+            'y': np.asarray(y[start:end], dtype=np.float64),
+            'z': np.asarray(z[start:end], dtype=np.float64),
+        }
+        for i, name in enumerate(('x', 'y', 'z')):
+            if time_weighted_avg:
+                chunk[name + '_avg'], carries[i] = time_weighted.time_weighted_average(chunk['time_hours'] * 3600, chunk[name], carries[i])
+            else:
+                chunk[name + '_avg'], carries[i] = kernels.running_average(chunk[name], carries[i], start)
+        chunk['magnitude'] = np.sqrt(chunk['x_avg'] ** 2 + chunk['y_avg'] ** 2 + chunk['z_avg'] ** 2)
+        if movers:
+            for mover, name in zip(movers, ('x', 'y', 'z')):
+                chunk[name + '_moving'] = mover.update(chunk['time_hours'] * 3600, chunk[name])
+            chunk['magnitude_moving'] = np.sqrt(chunk['x_moving'] ** 2 + chunk['y_moving'] ** 2 + chunk['z_moving'] ** 2)
+        if start_analysis is not None and end_analysis is not None:
+            t = chunk['time_hours']
+            chunk['in_analysis'] = (t >= start_analysis) & (t < end_analysis)
+        else:
+            chunk['in_analysis'] = np.zeros(end - start, dtype=bool)
+        yield chunk
+
+
+def export_csv(file_path, chunks, precision=10, columns=EXPORT_COLUMNS):
+    """Write export chunks as CSV, formatting each chunk with one vectorized % operation."""
+    keys = [key for _, key in columns]
+    row_format = ','.join("%d" if key == 'in_analysis' else f"%.{precision}g" for key in keys)
+    with open(file_path, 'w', newline='') as file:
+        file.write(','.join(header for header, _ in columns) + '\n')
+        for chunk in chunks:
+            values = np.column_stack([chunk[key] for key in keys]).astype(np.float64)
+            if len(values):
+                file.write('\n'.join([row_format] * len(values)) % tuple(values.ravel()) + '\n')
+
+
+def export_npy(file_path, chunks, num_rows, columns=EXPORT_COLUMNS):
+    """Write export chunks into a memory-mapped structured .npy file (one record per sample)."""
+    dtype = np.dtype([(key, np.bool_ if key == 'in_analysis' else np.float64) for _, key in columns])
+    records = np.lib.format.open_memmap(file_path, mode='w+', dtype=dtype, shape=(num_rows,))
+    row = 0
+    for chunk in chunks:
+        n = len(chunk['time_hours'])
+        for _, key in columns:
+            records[key][row:row + n] = chunk[key]
+        row += n
+    records.flush()
+    del records
+
+
+def export_npz(file_path, chunks, num_rows, columns=EXPORT_COLUMNS):
+    """
+    Write one .npy member per column into an .npz archive, streaming chunk by chunk.
+
+    The chunks are computed once: each column is appended to its own temporary raw file
+    next to the archive, and the files are then copied into the archive behind their .npy
+    headers, so no full-length column is ever held in memory.
+
+    Parameters:
+    - chunks: Iterator of export chunks
+    - num_rows: Total number of rows
+    """
+    dtypes = {key: np.dtype(np.bool_ if key == 'in_analysis' else np.float64) for _, key in columns}
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(file_path))) as temp_dir:
+        parts = {key: open(os.path.join(temp_dir, key + '.raw'), 'w+b') for key in dtypes}
+        try:
+            for chunk in chunks:
+                for key, part in parts.items():
+                    part.write(np.ascontiguousarray(chunk[key], dtype=dtypes[key]).tobytes())
+            with zipfile.ZipFile(file_path, mode='w', compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+                for key, part in parts.items():
+                    header = {'descr': np.lib.format.dtype_to_descr(dtypes[key]), 'fortran_order': False, 'shape': (num_rows,)}
+                    with archive.open(key + '.npy', mode='w', force_zip64=True) as member:
+                        np.lib.format.write_array_header_2_0(member, header)
+                        part.seek(0)
+                        shutil.copyfileobj(part, member, 1 << 20)
+        finally:
+            for part in parts.values():
+                part.close()
+
+
+def export_data(file_path, time_hours, x, y, z, start_analysis=None, end_analysis=None, chunk_rows=CHUNK_ROWS, time_weighted_avg=False,
+                moving_window_hours=None):
+    """
+    Export time, raw x/y/z, time-averaged components, magnitude and the analysis-period flag,
+    plus moving-average columns when moving_window_hours is given.
+
+    The format follows the file extension: .csv (text), .npz (streamed archive of columns)
+    or .npy (memory-mapped structured array).
+    """
+    chunks = iter_export_chunks(time_hours, x, y, z, start_analysis, end_analysis, chunk_rows, time_weighted_avg, moving_window_hours)
+    columns = export_columns(moving_window_hours)
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == '.csv':
+        export_csv(file_path, chunks, columns=columns)
+    elif extension == '.npz':
+        export_npz(file_path, chunks, len(time_hours), columns)
+    elif extension == '.npy':
+        export_npy(file_path, chunks, len(time_hours), columns)
+    else:
+        raise ValueError(f"Unsupported export format: {extension}")
@@ -0,0 +1,117 @@
+import numpy as np
+
+GOLDEN_RATIO = (np.sqrt(5.0) + 1.0) / 2.0
+GOLDEN_ANGLE = (2.0 - GOLDEN_RATIO) * (2.0 * np.pi)
+PSI = (1.0 - np.sqrt(5.0)) / 2.0
+
+# Fibonacci numbers F_0..F_91 (F_92 overflows int64).
+FIBONACCI = np.zeros(92, dtype=np.int64)
+FIBONACCI[1] = 1
+for _n in range(2, len(FIBONACCI)):
+    FIBONACCI[_n] = FIBONACCI[_n - 1] + FIBONACCI[_n - 2]
+
+# Rows of vertices at each pole checked in addition to the cell ring; near the poles the
+# local Fibonacci basis is too coarse for the ring alone to contain the 3 nearest vertices.
+POLAR_ROWS = 4
+
+# Lattice offsets around the parallelogram cell that contains the query point.
+_CELL_OFFSETS = np.array([(a, b) for a in range(-1, 3) for b in range(-1, 3)], dtype=np.int64)
+
+
+def fibonacci_sphere(num_points):
+    """
+    Golden-angle Fibonacci lattice used by PathVisualization.
+
+    Vertex i has y = 1 - 2 i / (num_points - 1), radius sqrt(1 - y²) and angle
+    golden_angle * i in the x-z plane.
+
+    Returns:
+    - (num_points, 3) array of vertices
+    """
+    i = np.arange(num_points, dtype=np.float64)
+    ys = 1 - (i / float(num_points - 1)) * 2
+    radius = np.sqrt(1 - ys * ys)
+    theta = GOLDEN_ANGLE * i
+    return np.column_stack((np.cos(theta) * radius, ys, np.sin(theta) * radius))
+
+
+def _candidates(points, num_points):
+    """Lattice indices of the cell containing each point and its surrounding ring (-1 where invalid)."""
+    dz = 2.0 / (num_points - 1)
+    y = np.clip(points[:, 1], -1.0, 1.0)
+    u = np.mod(np.arctan2(points[:, 2], points[:, 0]) / (2 * np.pi), 1.0)
+
+    # Zone: the pair of Fibonacci steps (F_k, F_k+1) that forms a near-orthogonal basis at this
+    # latitude, from phi^(2k) = pi * sqrt(5) * (1 - y²) * (num_points - 1).
+    spread = np.maximum(np.pi * np.sqrt(5.0) * (1 - y * y) * (num_points - 1), 1.0)
+    k = np.floor(0.5 * np.log(spread) / np.log(GOLDEN_RATIO)).astype(np.int64)
+    k = np.clip(k, 2, len(FIBONACCI) - 2)
+    f_k, f_k1 = FIBONACCI[k], FIBONACCI[k + 1]
+
+    # Basis vectors in (u, y): stepping the index by F_k moves u by psi^k and y by -F_k * dz.
+    psi_k = PSI ** k
+    psi_k1 = PSI ** (k + 1)
+    a, b = psi_k, psi_k1
+    c, d = -f_k * dz, -f_k1 * dz
+    du, dy = u, y - 1.0
+    det = a * d - b * c
+    c1 = np.floor((d * du - b * dy) / det).astype(np.int64)
+    c2 = np.floor((a * dy - c * du) / det).astype(np.int64)
+
+    index = ((c1[:, np.newaxis] + _CELL_OFFSETS[:, 0]) * f_k[:, np.newaxis]
+             + (c2[:, np.newaxis] + _CELL_OFFSETS[:, 1]) * f_k1[:, np.newaxis])
+    index[(index < 0) | (index >= num_points)] = -1
+
+    near_pole = np.abs(y) > 1 - POLAR_ROWS * dz
+    if np.any(near_pole):
+        poles = np.concatenate((np.arange(POLAR_ROWS), num_points - 1 - np.arange(POLAR_ROWS)))
+        poles = poles[(poles >= 0) & (poles < num_points)]
+        extra = np.full((len(points), len(poles)), -1, dtype=np.int64)
+        extra[near_pole] = poles
+        index = np.concatenate((index, extra), axis=1)
+    return index
+
+
+def nearest_vertices(points, num_points, k=3, chunk_size=1 << 16, sphere=None):
+    """
+    Nearest lattice vertices of each direction via the inverse spherical-Fibonacci mapping.
+
+    Each point is mapped to its cell of the local Fibonacci lattice in O(1), and only the
+    vertices around that cell are compared, so the cost is O(N) independent of num_points.
+
+    Parameters:
+    - points: (N, 3) array of directions (need not be normalised)
+    - num_points: Lattice size (as in PathVisualization.num_points)
+    - k: Number of vertices to return per point (1 = nearest only, 3 = triangle)
+    - chunk_size: Rows per block (bounds temporaries)
+    - sphere: Optional precomputed fibonacci_sphere(num_points)
+
+    Returns:
+    - (N, k) int64 array of vertex indices, nearest first
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    if sphere is None:
+        sphere = fibonacci_sphere(num_points)
+    out = np.empty((len(points), k), dtype=np.int64)
+    for start in range(0, len(points), chunk_size):
+        chunk = points[start:start + chunk_size]
+        norms = np.linalg.norm(chunk, axis=1)
+        unit = chunk / np.where(norms > 0, norms, 1.0)[:, np.newaxis]
+        index = _candidates(unit, num_points)
+        vertices = sphere[np.maximum(index, 0)]
+        dist = ((chunk[:, np.newaxis, 0] - vertices[:, :, 0]) ** 2
+                + (chunk[:, np.newaxis, 1] - vertices[:, :, 1]) ** 2
+                + (chunk[:, np.newaxis, 2] - vertices[:, :, 2]) ** 2)
+        dist[index < 0] = np.inf
+        # The ring can list a vertex twice; drop repeats before ranking.
+        order = np.argsort(index, axis=1, kind='stable')
+        sorted_index = np.take_along_axis(index, order, axis=1)
+        repeat = np.zeros_like(index, dtype=bool)
+        repeat[:, 1:] = sorted_index[:, 1:] == sorted_index[:, :-1]
+        np.put_along_axis(dist, order, np.where(repeat, np.inf, np.take_along_axis(dist, order, axis=1)), axis=1)
+        picks = np.arange(len(chunk))
+        for rank in range(k):
+            nearest = np.argmin(dist, axis=1)
+            out[start + picks, rank] = index[picks, nearest]
+            dist[picks, nearest] = np.inf
+    return out
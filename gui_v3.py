@@ -2,6 +2,8 @@
 # This is a computer model that evaluates the efficacy of microgravity simulation devices
 
 import os
+import queue
+import threading
 from tkinter import messagebox, filedialog
 import tkinter as tk
 import tkinter.ttk as ttk
@@ -9,14 +11,26 @@ import webbrowser
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib import rcParams
+from matplotlib.ticker import LogLocator
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from PIL import Image, ImageTk
-from dateutil import parser
-from dataCompile import DataProcessor, PathVisualization  
-import csv 
+from dataCompile import PathVisualization
+from convergence import settling_time_from_sums, theoretical_settling_time
+from pyramid import SeriesPyramid
+from export import export_data
+from comparison import compare_runs
+from time_weighted import time_weighted_average, detect_gaps
+from spectral import welch_psd
+from records import load_records
+from rolling import moving_averages
+from sphere_density import dwell_time, plot_sphere_density
+from progressive import iter_refinements
 
 SCRIPT_DIR = os.path.abspath(os.path.dirname(__file__))
 
+# How often (ms) the Tk loop checks for a finished refinement level.
+REFINE_POLL_MS = 50
+
 
 class CustomToolbar(NavigationToolbar2Tk):
     def __init__(self, canvas, parent, export_command):
@@ -33,7 +47,7 @@ class CustomToolbar(NavigationToolbar2Tk):
         self.export_button.pack(side=tk.LEFT, padx=2, pady=2)
         self.export_button.bind("<Enter>", self._on_enter)
         self.export_button.bind("<Leave>", self._on_leave)
-        self._create_tooltip(self.export_button, "Export data to CSV")
+        self._create_tooltip(self.export_button, "Export data (CSV, NPZ or NPY)")
 
     def _on_enter(self, event):
         event.widget.config(borderwidth=1, relief=tk.FLAT)
@@ -67,6 +81,15 @@ class GUI:
         self.master.title("Computer Model - NASA")
         self.master.configure(bg="#f1f1f1")
 
+        # Bumped whenever a theoretical run is started or superseded; workers of older
+        # generations stop at their next check and their results are dropped.
+        self.refine_generation = 0
+        self.refine_inputs = None
+        # Same scheme for the theoretical convergence readout, which is computed off the Tk thread;
+        # the last result is kept as ((key, threshold), text) so refinement levels reuse it.
+        self.convergence_generation = 0
+        self.convergence_result = None
+
         self._setup_gui_elements()
         self._setup_plot_frames()
 
@@ -127,7 +150,7 @@ class GUI:
 
         tk.Label(mode_frame, text="Mode", font=category_font_style).pack()
         self.mode_var = tk.StringVar(value="Theoretical")
-        self.mode_menu = tk.OptionMenu(mode_frame, self.mode_var, "Theoretical", "Experimental", command=self._switch_mode)
+        self.mode_menu = tk.OptionMenu(mode_frame, self.mode_var, "Theoretical", "Experimental", "Comparison", command=self._switch_mode)
         self.mode_menu.config(font=font_style, bg="#aeb0b5", activebackground="#d6d7d9")
         self.mode_menu["menu"].config(font=("Calibri", 10), bg="#d6d7d9")
         self.mode_menu.pack()
@@ -149,6 +172,8 @@ class GUI:
         self.outer_v_label.pack(side=tk.LEFT, padx=(10, 0))
         self.outer_v_entry = tk.Entry(operating_input_frame, font=font_style, width=10)
         self.outer_v_entry.pack(side=tk.LEFT)
+        for entry in (self.inner_v_entry, self.outer_v_entry):
+            entry.bind("<KeyRelease>", self._on_theoretical_input_changed)
 
     def _create_duration_frame(self, parent, font_style, category_font_style):
         self.duration_frame = tk.Frame(parent, padx=1, pady=1)
@@ -157,6 +182,7 @@ class GUI:
         tk.Label(self.duration_frame, text="Simulation Duration (hours)", font=category_font_style).pack()
         self.max_seg_entry = tk.Entry(self.duration_frame, font=font_style)
         self.max_seg_entry.pack()
+        self.max_seg_entry.bind("<KeyRelease>", self._on_theoretical_input_changed)
 
     def _create_analysis_frame(self, parent, font_style, category_font_style):
         self.analysis_frame = tk.Frame(parent, padx=1, pady=1)
@@ -187,6 +213,9 @@ class GUI:
         self.end_analysis_entry_exp = tk.Entry(analysis_period_frame_exp, font=font_style, width=10)
         self.end_analysis_entry_exp.pack(side=tk.LEFT)
 
+        self.time_weighted_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.analysis_frame_exp, text="Time-weighted average", variable=self.time_weighted_var, font=font_style).pack()
+
     def _create_submit_button(self, parent, font_style):
         self.submit_button = tk.Button(parent, text="Start", command=self._submit, font=font_style, bg="#0066b2", fg="#ffffff", activebackground="#3380cc", activeforeground="#ffffff")
         self.submit_button.grid(row=1, column=0, columnspan=4, pady=(10, 5))
@@ -201,16 +230,18 @@ class GUI:
         plot_frame = tk.Frame(self.master, padx=5, pady=5, bg="#f1f1f1")
         plot_frame.pack(side=tk.BOTTOM, fill=tk.BOTH, expand=True, padx=(5, 5), pady=(0, 5))
 
-        notebook = ttk.Notebook(plot_frame)
-        notebook.pack(fill=tk.BOTH, expand=True)
+        self.notebook = ttk.Notebook(plot_frame)
+        self.notebook.pack(fill=tk.BOTH, expand=True)
 
-        self.magnitude_frame = tk.Frame(notebook, borderwidth=1, relief=tk.SOLID)
-        self.vector_components_frame = tk.Frame(notebook, borderwidth=1, relief=tk.SOLID)
-        self.path_frame = tk.Frame(notebook, borderwidth=0, relief=tk.SOLID)
+        self.magnitude_frame = tk.Frame(self.notebook, borderwidth=1, relief=tk.SOLID)
+        self.vector_components_frame = tk.Frame(self.notebook, borderwidth=1, relief=tk.SOLID)
+        self.spectrum_frame = tk.Frame(self.notebook, borderwidth=1, relief=tk.SOLID)
+        self.path_frame = tk.Frame(self.notebook, borderwidth=0, relief=tk.SOLID)
 
-        notebook.add(self.magnitude_frame, text="Resultant Vector")
-        notebook.add(self.vector_components_frame, text="Vector Components")
-        notebook.add(self.path_frame, text="Vector Path")
+        self.notebook.add(self.magnitude_frame, text="Resultant Vector")
+        self.notebook.add(self.vector_components_frame, text="Vector Components")
+        self.notebook.add(self.spectrum_frame, text="Spectrum")
+        self.notebook.add(self.path_frame, text="Vector Path")
 
         rcParams['font.family'] = 'Calibri'
         rcParams['font.size'] = 10
@@ -218,6 +249,17 @@ class GUI:
         self._setup_magnitude_plot()
         self._setup_path_plots()
         self._setup_components_plot()
+        self._setup_spectrum_plot()
+
+        self.tab_canvases = {
+            str(self.magnitude_frame): [self.canvas],
+            str(self.vector_components_frame): [self.components_canvas],
+            str(self.spectrum_frame): [self.spectrum_canvas],
+            str(self.path_frame): [self.path_canvas, self.path_canvas_analysis],
+        }
+        self.stale_canvases = set()
+        self.current_data = None
+        self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
         self._clear_plots()
 
     def _setup_magnitude_plot(self):
@@ -227,16 +269,55 @@ class GUI:
         self.ax.set_title("Resultant Acceleration Vector")
         self.ax.set_xlabel('Time (hours)')
         self.ax.set_ylabel('Magnitude (g)')
+
+        self.mag_line, = self.ax.plot([], [], color='#0066b2')
+        self.mag_analysis_line, = self.ax.plot([], [], color='#ec1c24', animated=True)
+        self.theory_line, = self.ax.plot([], [], color='#aeb0b5')
+        self.moving_line, = self.ax.plot([], [], color='#0032A0')
+        self.start_vline = self.ax.axvline(x=0, color='#ec1c24', linestyle='--', animated=True)
+        self.end_vline = self.ax.axvline(x=0, color='#ec1c24', linestyle='--', animated=True)
+        self.mag_legend = self.ax.legend([self.mag_line, self.mag_analysis_line, self.theory_line, self.moving_line], ["", "", "", ""])
+        self.mag_legend.set_animated(True)
+        self.mag_overlay = [self.mag_analysis_line, self.start_vline, self.end_vline, self.mag_legend]
+        self.mag_background = None
+
         self.canvas = FigureCanvasTkAgg(self.figure, self.magnitude_frame)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.canvas.mpl_connect('draw_event', self._on_magnitude_draw)
+        self.ax.callbacks.connect('xlim_changed', self._on_magnitude_xlim_changed)
         self.toolbar = CustomToolbar(self.canvas, self.magnitude_frame, self._export_magnitude_data)
         self.toolbar.update()
         self.toolbar.pack(side=tk.BOTTOM, fill=tk.X)
 
+        convergence_frame = tk.Frame(self.magnitude_frame)
+        convergence_frame.pack(side=tk.BOTTOM, fill=tk.X)
+        tk.Label(convergence_frame, text="Threshold (g):", font=("Calibri", 10)).pack(side=tk.LEFT, padx=(5, 0))
+        self.threshold_entry = tk.Entry(convergence_frame, font=("Calibri", 10), width=8)
+        self.threshold_entry.insert(0, "1e-3")
+        self.threshold_entry.pack(side=tk.LEFT)
+        self.threshold_entry.bind("<Return>", lambda e: self._update_convergence_readout())
+        self.moving_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(convergence_frame, text="Moving average (h):", variable=self.moving_var, command=self._update_moving_average,
+                       font=("Calibri", 10)).pack(side=tk.LEFT, padx=(10, 0))
+        self.moving_window_entry = tk.Entry(convergence_frame, font=("Calibri", 10), width=6)
+        self.moving_window_entry.insert(0, "1")
+        self.moving_window_entry.pack(side=tk.LEFT)
+        self.moving_window_entry.bind("<Return>", lambda e: self._update_moving_average())
+        self.convergence_label = tk.Label(convergence_frame, text="", font=("Calibri", 10))
+        self.convergence_label.pack(side=tk.LEFT, padx=5)
+        self.comparison_label = tk.Label(convergence_frame, text="", font=("Calibri", 10))
+        self.comparison_label.pack(side=tk.LEFT, padx=5)
+        self.sampling_label = tk.Label(convergence_frame, text="", font=("Calibri", 10))
+        self.sampling_label.pack(side=tk.RIGHT, padx=5)
+        self.refine_label = tk.Label(convergence_frame, text="", font=("Calibri", 10))
+        self.refine_label.pack(side=tk.RIGHT, padx=5)
+
     def _setup_path_plots(self):
         self.path_figure = plt.Figure()
         self.path_ax = self.path_figure.add_subplot(1, 1, 1, projection='3d')
         self._configure_3d_axes(self.path_ax, "Acceleration Vector Path (Full Duration)")
+        self.path_line, = self.path_ax.plot([], [], [], color='#0066b2', linewidth=1)
+        self.path_legend = self.path_ax.legend([self.path_line], [""])
         self.path_frame_left = tk.Frame(self.path_frame, borderwidth=1, relief=tk.SOLID)
         self.path_canvas = FigureCanvasTkAgg(self.path_figure, self.path_frame_left)
         self.path_canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
@@ -247,6 +328,8 @@ class GUI:
         self.path_figure_analysis = plt.Figure()
         self.path_ax_analysis = self.path_figure_analysis.add_subplot(1, 1, 1, projection='3d')
         self._configure_3d_axes(self.path_ax_analysis, "Acceleration Vector Path (Analysis Period)")
+        self.path_line_analysis, = self.path_ax_analysis.plot([], [], [], color='#ec1c24', linewidth=1)
+        self.path_legend_analysis = self.path_ax_analysis.legend([self.path_line_analysis], [""])
         self.path_frame_right = tk.Frame(self.path_frame, borderwidth=1, relief=tk.SOLID)
         self.path_canvas_analysis = FigureCanvasTkAgg(self.path_figure_analysis, self.path_frame_right)
         self.path_canvas_analysis.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
@@ -254,6 +337,15 @@ class GUI:
         self.path_toolbar_analysis.pack(side=tk.BOTTOM, fill=tk.X)
         self.path_frame_right.grid(row=0, column=1, sticky="nsew")
 
+        path_options = tk.Frame(self.path_frame)
+        path_options.grid(row=1, column=0, columnspan=2, sticky="w")
+        self.density_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(path_options, text="Show dwell-time density", variable=self.density_var, command=self._redraw_path_plots,
+                       font=("Calibri", 10)).pack(side=tk.LEFT, padx=5)
+        # Last data drawn on each path line, and the density surface replacing it when shown
+        self.path_data = {}
+        self.path_surfaces = {}
+
         self.path_frame.grid_columnconfigure(0, weight=1)
         self.path_frame.grid_columnconfigure(1, weight=1)
         self.path_frame.grid_rowconfigure(0, weight=1)
@@ -264,11 +356,70 @@ class GUI:
         self.components_ax.set_title("Acceleration Vector Components")
         self.components_ax.set_xlabel('Time (hours)')
         self.components_ax.set_ylabel('Magnitude (g)')
+        self.components_lines = [
+            self.components_ax.plot([], [], label='X-Component', color='#0066b2')[0],
+            self.components_ax.plot([], [], label='Y-Component', color='#ec1c24')[0],
+            self.components_ax.plot([], [], label='Z-Component', color='#aeb0b5')[0],
+        ]
+        self.components_legend = self.components_ax.legend()
+        self.components_pyramid = None
+        self.components_ax.callbacks.connect('xlim_changed', self._on_components_xlim_changed)
         self.components_canvas = FigureCanvasTkAgg(self.components_figure, self.vector_components_frame)
         self.components_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
         self.components_toolbar = NavigationToolbar2Tk(self.components_canvas, self.vector_components_frame)
         self.components_toolbar.update()
 
+    def _setup_spectrum_plot(self):
+        self.spectrum_figure = plt.Figure()
+        self.spectrum_ax = self.spectrum_figure.add_subplot(1, 1, 1)
+        self.spectrum_ax.set_title("Power Spectral Density")
+        self.spectrum_ax.set_xlabel('Frequency (Hz)')
+        self.spectrum_ax.set_ylabel('PSD (g²/Hz)')
+        self.spectrum_ax.set_xscale('log')
+        self.spectrum_ax.set_yscale('log')
+        self.spectrum_lines = {
+            'x': self.spectrum_ax.plot([], [], label='X-Component', color='#0066b2')[0],
+            'y': self.spectrum_ax.plot([], [], label='Y-Component', color='#ec1c24')[0],
+            'z': self.spectrum_ax.plot([], [], label='Z-Component', color='#aeb0b5')[0],
+            'magnitude': self.spectrum_ax.plot([], [], label='Magnitude', color='#000000')[0],
+        }
+        self.spectrum_markers = [
+            self.spectrum_ax.axvline(1, color='#0066b2', linestyle='--', visible=False),
+            self.spectrum_ax.axvline(1, color='#ec1c24', linestyle='--', visible=False),
+        ]
+        self.spectrum_legend = self.spectrum_ax.legend(handles=list(self.spectrum_lines.values()))
+        self.spectrum_canvas = FigureCanvasTkAgg(self.spectrum_figure, self.spectrum_frame)
+        self.spectrum_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.spectrum_toolbar = NavigationToolbar2Tk(self.spectrum_canvas, self.spectrum_frame)
+        self.spectrum_toolbar.update()
+
+    def _set_spectrum_data(self, time_in_seconds, x, y, z, frame_rpms=None):
+        if len(time_in_seconds) < 2:
+            return
+        freqs, psd = welch_psd(time_in_seconds, x, y, z)
+        for name, line in self.spectrum_lines.items():
+            line.set_data(freqs[1:], psd[name][1:])
+        self._set_spectrum_markers(frame_rpms or ())
+        self.spectrum_legend.set_visible(True)
+        self.spectrum_ax.relim()
+        self.spectrum_ax.autoscale(enable=True)
+        self._draw_canvas(self.spectrum_canvas)
+
+    def _clear_spectrum(self):
+        for line in self.spectrum_lines.values():
+            line.set_data([], [])
+        self._set_spectrum_markers(())
+        self.spectrum_legend.set_visible(False)
+        self._draw_canvas(self.spectrum_canvas)
+
+    def _set_spectrum_markers(self, frame_rpms):
+        # Dashed markers at the inner and outer frame rotation frequencies.
+        for marker in self.spectrum_markers:
+            marker.set_visible(False)
+        for marker, rpm in zip(self.spectrum_markers, frame_rpms):
+            marker.set_xdata([abs(rpm) / 60, abs(rpm) / 60])
+            marker.set_visible(rpm != 0)
+
     def _configure_3d_axes(self, ax, title):
         ax.set_xlabel('X')
         ax.set_ylabel('Y')
@@ -293,11 +444,13 @@ class GUI:
     def _switch_mode(self, mode):
         if mode == "Theoretical":
             self._show_theoretical_inputs()
+        elif mode == "Comparison":
+            self._show_comparison_inputs()
         else:
             self._show_experimental_inputs()
 
     def _show_theoretical_inputs(self):
-        self.operating_frame.grid()
+        self.operating_frame.grid(row=0, column=1, padx=30)
         self.duration_frame.grid()
         self.analysis_frame.grid()
         self.analysis_frame_exp.grid_remove()
@@ -314,114 +467,360 @@ class GUI:
         self.submit_button.grid(row=1, column=0, columnspan=4, pady=(10, 5))
         self._clear_plots()
 
+    def _show_comparison_inputs(self):
+        self.duration_frame.grid_remove()
+        self.analysis_frame.grid_remove()
+        self.accelerometer_frame.grid(row=0, column=1, padx=30)
+        self.operating_frame.grid(row=0, column=2, padx=30)
+        self.analysis_frame_exp.grid(row=0, column=3, padx=30)
+        self.submit_button.grid(row=1, column=0, columnspan=4, pady=(10, 5))
+        self._clear_plots()
+
+    def _draw_canvas(self, canvas):
+        # Only the visible tab is rendered now; the others are redrawn when selected.
+        selected = self.notebook.select()
+        if canvas in self.tab_canvases.get(selected, []):
+            canvas.draw_idle()
+        else:
+            self.stale_canvases.add(canvas)
+
+    def _on_tab_changed(self, event):
+        for canvas in self.tab_canvases.get(self.notebook.select(), []):
+            if canvas in self.stale_canvases:
+                self.stale_canvases.discard(canvas)
+                canvas.draw_idle()
+
+    def _on_magnitude_draw(self, event):
+        self.mag_background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_magnitude_overlay()
+
+    def _draw_magnitude_overlay(self):
+        for artist in self.mag_overlay:
+            if artist.get_visible():
+                self.ax.draw_artist(artist)
+
+    def _blit_magnitude_overlay(self):
+        if self.mag_background is None or self.canvas in self.stale_canvases:
+            self._draw_canvas(self.canvas)
+            return
+        self.canvas.restore_region(self.mag_background)
+        self._draw_magnitude_overlay()
+        self.canvas.blit(self.figure.bbox)
+
     def _clear_plots(self):
-        self.ax.clear()
-        self.ax.set_yscale('log')
-        self.ax.set_title("Resultant Acceleration Vector")
-        self.ax.set_xlabel('Time (hours)')
-        self.ax.set_ylabel('Magnitude (g)')
+        self._cancel_refinement()
+        self.current_data = None
+
+        self.mag_background = None
+        self.mag_line.set_data([], [])
+        self._set_theory_line_visible(False)
+        self._set_moving_line_visible(False)
+        for artist in self.mag_overlay:
+            artist.set_visible(False)
         self.ax.set_yticks([10**(-i) for i in range(0, 17, 2)])
         self.ax.set_ylim(10**-17, 10**0)
-        self.canvas.draw()
+        self._draw_canvas(self.canvas)
+
+        self._clear_path_data(self.path_line, self.path_legend)
+        self._draw_canvas(self.path_canvas)
+
+        self._clear_path_data(self.path_line_analysis, self.path_legend_analysis)
+        self._draw_canvas(self.path_canvas_analysis)
+
+        self.components_pyramid = None
+        for line in self.components_lines:
+            line.set_data([], [])
+        self.components_legend.set_visible(False)
+        self._draw_canvas(self.components_canvas)
+
+        self._clear_spectrum()
+
+        self.convergence_generation += 1
+        self.convergence_label.config(text="")
+        self.comparison_label.config(text="")
+        self.sampling_label.config(text="")
+
+    def _set_theory_line_visible(self, visible):
+        if not visible:
+            self.theory_line.set_data([], [])
+        self.theory_line.set_visible(visible)
+        self.mag_legend.legend_handles[2].set_visible(visible)
+        self.mag_legend.get_texts()[2].set_visible(visible)
+
+    def _set_moving_line_visible(self, visible):
+        if not visible:
+            self.moving_line.set_data([], [])
+        self.moving_line.set_visible(visible)
+        self.mag_legend.legend_handles[3].set_visible(visible)
+        self.mag_legend.get_texts()[3].set_visible(visible)
+
+    def _update_moving_average(self, draw=True):
+        data = self.current_data
+        if data is None:
+            return
+        data['moving_pyramid'] = None
+        data['moving_window_hours'] = None
+        if not self.moving_var.get():
+            self._set_moving_line_visible(False)
+        else:
+            try:
+                window_hours = float(self.moving_window_entry.get())
+                if window_hours <= 0:
+                    raise ValueError
+            except ValueError:
+                messagebox.showerror("Input Error", "Moving-average window must be a positive number of hours.")
+                return
+            time_in_hours = data['time_in_hours']
+            moving = moving_averages(time_in_hours * 3600, data['x'], data['y'], data['z'], window_hours * 3600)[3]
+            data['moving_pyramid'] = SeriesPyramid(time_in_hours, {'moving': moving})
+            data['moving_window_hours'] = window_hours
+            self.moving_line.set_data(*data['moving_pyramid'].envelope('moving', time_in_hours[0], time_in_hours[-1], self._axes_pixels(self.ax)))
+            # Windows that start before the run are partial; the worst-window figure skips them.
+            full = moving[time_in_hours >= time_in_hours[0] + window_hours]
+            worst = f"{np.max(full):.3g}" if len(full) else "n/a"
+            self.mag_legend.get_texts()[3].set_text(f"Moving Average ({window_hours:g} h), worst window: {worst}")
+            self._set_moving_line_visible(True)
+        if draw:
+            self.mag_background = None
+            self._draw_canvas(self.canvas)
+
+    def _update_convergence_readout(self):
+        self.convergence_generation += 1
+        data = self.current_data
+        if data is None:
+            return
+        try:
+            threshold = float(self.threshold_entry.get())
+        except ValueError:
+            self.convergence_label.config(text="Enter a numeric threshold.")
+            return
+
+        if data['key'][0] != "Theoretical":
+            settle, crossing = settling_time_from_sums(data['time_in_hours'], *data['sums'], threshold, data.get('denominators'))
+            self.convergence_label.config(text=self._convergence_text(threshold, settle, crossing))
+            return
+
+        # The closed-form scan of a long run takes up to about a second, so it runs in a worker thread
+        request = (data['key'], threshold)
+        if self.convergence_result is not None and self.convergence_result[0] == request:
+            self.convergence_label.config(text=self.convergence_result[1])
+            return
+        generation = self.convergence_generation
+        results = queue.Queue()
+
+        def work():
+            _, inner_v, outer_v, max_seg = data['key']
+            try:
+                results.put(self._convergence_text(threshold, *theoretical_settling_time(inner_v, outer_v, max_seg, threshold)))
+            except Exception as e:
+                results.put(e)
 
-        self.path_ax.clear()
-        self._configure_3d_axes(self.path_ax, "Acceleration Vector Path (Full Duration)")
-        self.path_canvas.draw()
+        self.convergence_label.config(text="Computing convergence...")
+        threading.Thread(target=work, daemon=True).start()
+        self.master.after(REFINE_POLL_MS, self._poll_convergence, generation, results, request)
 
-        self.path_ax_analysis.clear()
-        self._configure_3d_axes(self.path_ax_analysis, "Acceleration Vector Path (Analysis Period)")
-        self.path_canvas_analysis.draw()
-
-        self.components_ax.clear()
-        self.components_ax.set_title("Acceleration Vector Components")
-        self.components_ax.set_xlabel('Time (hours)')
-        self.components_ax.set_ylabel('Magnitude (g)')
-        self.components_canvas.draw()
+    def _poll_convergence(self, generation, results, request):
+        if generation != self.convergence_generation:
+            return
+        try:
+            item = results.get_nowait()
+        except queue.Empty:
+            self.master.after(REFINE_POLL_MS, self._poll_convergence, generation, results, request)
+            return
+        if isinstance(item, Exception):
+            self.convergence_label.config(text=str(item))
+            return
+        self.convergence_result = (request, item)
+        self.convergence_label.config(text=item)
+
+    def _convergence_text(self, threshold, settle, crossing):
+        if settle is None:
+            return f"Time-averaged magnitude is still above {threshold:.3g} g at the end of the run."
+        if crossing is None:
+            return f"Time-averaged magnitude never exceeds {threshold:.3g} g."
+        return f"Stays below {threshold:.3g} g after {settle:.4g} h (last crossing at {crossing:.4g} h)."
+
+    def _axes_pixels(self, ax):
+        return max(int(ax.bbox.width), 1)
+
+    def _on_magnitude_xlim_changed(self, ax):
+        if self.current_data is None:
+            return
+        t0, t1 = ax.get_xlim()
+        pyramid = self.current_data['pyramid']
+        self.mag_line.set_data(*pyramid.envelope('magnitude', t0, t1, self._axes_pixels(ax)))
+        window = self.current_data.get('window')
+        if window is not None:
+            self.mag_analysis_line.set_data(*pyramid.envelope('magnitude', max(t0, window[0]), min(t1, window[1]), self._axes_pixels(ax)))
+        if 'theory' in pyramid.names:
+            self.theory_line.set_data(*pyramid.envelope('theory', t0, t1, self._axes_pixels(ax)))
+        if self.current_data.get('moving_pyramid') is not None:
+            self.moving_line.set_data(*self.current_data['moving_pyramid'].envelope('moving', t0, t1, self._axes_pixels(ax)))
+
+    def _on_components_xlim_changed(self, ax):
+        if self.components_pyramid is None:
+            return
+        t0, t1 = ax.get_xlim()
+        for line, name in zip(self.components_lines, ('x', 'y', 'z')):
+            line.set_data(*self.components_pyramid.envelope(name, t0, t1, self._axes_pixels(ax)))
+
+    def _set_magnitude_data(self, time_in_hours, magnitude):
+        self.mag_background = None
+        pyramid = SeriesPyramid(time_in_hours, {'magnitude': magnitude})
+        self.current_data['pyramid'] = pyramid
+        self.mag_line.set_data(*pyramid.envelope('magnitude', time_in_hours[0], time_in_hours[-1], self._axes_pixels(self.ax)))
+        self.mag_legend.get_texts()[0].set_text(f"Time-Averaged Magnitude: {np.mean(magnitude):.3g}")
+        self._update_moving_average(draw=False)
+        self.ax.yaxis.set_major_locator(LogLocator())
+        self.ax.relim()
+        self.ax.autoscale(enable=True)
+        self._draw_canvas(self.canvas)
+
+    def _set_path_data(self, line, legend, x, y, z, distribution_score, time_in_seconds=None):
+        self.path_data[line] = (legend, x, y, z, distribution_score, time_in_seconds)
+        self._remove_path_surface(line)
+        if self.density_var.get():
+            # Dwell time per sphere cell; the drawing cost depends on the mesh, not on the samples
+            line.set_data_3d([], [], [])
+            self.path_surfaces[line], _ = plot_sphere_density(line.axes, dwell_time(x, y, z, time_in_seconds))
+            line.axes.auto_scale_xyz([-1, 1], [-1, 1], [-1, 1], had_data=False)
+        else:
+            line.set_data_3d(x, y, z)
+            line.axes.auto_scale_xyz(x, y, z, had_data=False)
+        legend.get_texts()[0].set_text(f"Distribution: {distribution_score}")
+        legend.set_visible(True)
+
+    def _clear_path_data(self, line, legend):
+        self.path_data.pop(line, None)
+        self._remove_path_surface(line)
+        line.set_data_3d([], [], [])
+        legend.set_visible(False)
+
+    def _remove_path_surface(self, line):
+        surface = self.path_surfaces.pop(line, None)
+        if surface is not None:
+            surface.remove()
+
+    def _redraw_path_plots(self):
+        for line, data in list(self.path_data.items()):
+            self._set_path_data(line, *data)
+        self._draw_canvas(self.path_canvas)
+        self._draw_canvas(self.path_canvas_analysis)
+
+    def _update_analysis_window(self, start_analysis, end_analysis):
+        data = self.current_data
+        has_window = start_analysis is not None and end_analysis is not None
+        data['window'] = (start_analysis, end_analysis) if has_window else None
+        if has_window:
+            start_index = np.searchsorted(data['time_in_hours'], start_analysis, side='left')
+            end_index = np.searchsorted(data['time_in_hours'], end_analysis, side='left')
+            mag_segment = data['magnitude'][start_index:end_index]
+            t0, t1 = self.ax.get_xlim()
+            self.mag_analysis_line.set_data(*data['pyramid'].envelope('magnitude', max(t0, start_analysis), min(t1, end_analysis), self._axes_pixels(self.ax)))
+            self.start_vline.set_xdata([start_analysis, start_analysis])
+            self.end_vline.set_xdata([end_analysis, end_analysis])
+            self.mag_legend.get_texts()[1].set_text(f"Time-Averaged Magnitude: {np.mean(mag_segment):.3g}")
+        for artist in self.mag_overlay:
+            artist.set_visible(has_window)
+        self.mag_legend.set_visible(True)
+        self.mag_legend.legend_handles[1].set_visible(has_window)
+        self.mag_legend.get_texts()[1].set_visible(has_window)
+        self._blit_magnitude_overlay()
+
+        if has_window:
+            x_seg = data['x'][start_index:end_index]
+            y_seg = data['y'][start_index:end_index]
+            z_seg = data['z'][start_index:end_index]
+            path_vis_analysis = PathVisualization("experimental", x_seg, y_seg, z_seg)
+            distribution_score_analysis = path_vis_analysis.get_distribution()
+            self._set_path_data(self.path_line_analysis, self.path_legend_analysis, x_seg, y_seg, z_seg, distribution_score_analysis,
+                                data['time_in_hours'][start_index:end_index] * 3600)
+        else:
+            self._clear_path_data(self.path_line_analysis, self.path_legend_analysis)
+        self._draw_canvas(self.path_canvas_analysis)
 
     def _import_data(self):
         file_path = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv")])
         if file_path:
             try:
-                with open(file_path, 'r') as file:
-                    main_array = file.read().replace("   ", " ").replace('\t', ' ').replace('\n', ' ').replace(',', ' ').split(' ')
-                self.experimental_data = main_array
-                messagebox.showinfo("Success", "CSV file uploaded successfully.")
+                records = load_records(file_path)
+                if not len(records):
+                    raise ValueError("No valid records found in the file.")
+                self.experimental_data = records
+                message = f"CSV file uploaded successfully: {len(records)} records."
+                if records.rejected:
+                    message += f"\n{len(records.rejected)} malformed rows were skipped; see {records.quarantine_path}"
+                messagebox.showinfo("Success", message)
             except FileNotFoundError:
                 messagebox.showerror("File Error", f"File not found: {file_path}")
             except Exception as e:
                 messagebox.showerror("Error", str(e))
 
-    def _process_experimental_data(self, main_array, start_analysis, end_analysis):
-        datetime_str = []
-        x, y, z = [], [], []
+    def _process_experimental_data(self, records, start_analysis, end_analysis):
+        key = ("Experimental", id(records))
+        time_weighted = self.time_weighted_var.get()
+        if self.current_data is not None and self.current_data['source'] is records and self.current_data.get('time_weighted') == time_weighted:
+            self._update_analysis_window(start_analysis, end_analysis)
+            return
 
-        for k in range(0, len(main_array) - 4, 5):
-            try:
-                dt = parser.parse(main_array[k] + " " + main_array[k + 1])
-            except ValueError:
-                dt = parser.parse(main_array[k + 1] + " " + main_array[k])
-            datetime_str.append(dt)
-            x.append(float(main_array[k + 2]))
-            y.append(float(main_array[k + 3]))
-            z.append(float(main_array[k + 4]))
-
-        time_in_seconds = [(dt - datetime_str[0]).total_seconds() for dt in datetime_str]
-        time_in_hours = [t / 3600 for t in time_in_seconds]
+        x, y, z = records.x, records.y, records.z
+        time_in_hours = records.time_in_hours
 
         path_vis = PathVisualization("experimental", x, y, z)
         distribution_score = path_vis.get_distribution()
 
-        self._update_experimental_plots(x, y, z, time_in_hours, start_analysis, end_analysis, distribution_score)
-
-    def _update_experimental_plots(self, x, y, z, time_in_hours, start_analysis, end_analysis, distribution_score):
-        rcParams['font.family'] = 'Calibri'
-        self.ax.clear()
-        self.ax.set_yscale('log')
-        self.ax.set_title("Resultant Acceleration Vector")
+        self._update_experimental_plots(x, y, z, time_in_hours, start_analysis, end_analysis, distribution_score, key, time_weighted)
+        self.current_data['source'] = records
 
-        x_time_avg = np.cumsum(x) / np.arange(1, len(x) + 1)
-        y_time_avg = np.cumsum(y) / np.arange(1, len(y) + 1)
-        z_time_avg = np.cumsum(z) / np.arange(1, len(z) + 1)
+    def _update_experimental_plots(self, x, y, z, time_in_hours, start_analysis, end_analysis, distribution_score, key=None, time_weighted=False):
+        time_in_seconds = np.asarray(time_in_hours, dtype=np.float64) * 3600
+        if time_weighted:
+            # The averages are already normalised, so the convergence scan divides them by 1.
+            sums = tuple(time_weighted_average(time_in_seconds, values)[0] for values in (x, y, z))
+            x_time_avg, y_time_avg, z_time_avg = sums
+            denominators = np.ones(len(x))
+        else:
+            sums = (np.cumsum(x), np.cumsum(y), np.cumsum(z))
+            x_time_avg, y_time_avg, z_time_avg = (s / np.arange(1, len(x) + 1) for s in sums)
+            denominators = None
         magnitude = np.sqrt(x_time_avg**2 + y_time_avg**2 + z_time_avg**2)
-        avg_mag_full = np.mean(magnitude)
-
-        self.ax.plot(time_in_hours, magnitude, color='#0066b2', label=f"Time-Averaged Magnitude: {avg_mag_full:.3g}")
-        if start_analysis is not None and end_analysis is not None:
-            start_seg = next(i for i, t in enumerate(time_in_hours) if t >= start_analysis)
-            end_seg = next(i for i, t in enumerate(time_in_hours) if t >= end_analysis)
-            self.ax.axvline(x=start_analysis, color='#ec1c24', linestyle='--')
-            self.ax.axvline(x=end_analysis, color='#ec1c24', linestyle='--')
-            avg_mag_analysis = np.mean(magnitude[start_seg:end_seg])
-            self.ax.plot(time_in_hours[start_seg:end_seg], magnitude[start_seg:end_seg], color='#ec1c24', label=f"Time-Averaged Magnitude: {avg_mag_analysis:.3g}")
-
-        self.ax.legend()
-        self.ax.set_xlabel('Time (hours)')
-        self.ax.set_ylabel('Magnitude (g)')
-        self.canvas.draw()
-
-        self.path_ax.clear()
-        self.path_ax.plot(x, y, z, color='#0066b2', linewidth=1)
-        self._configure_3d_axes(self.path_ax, "Acceleration Vector Path (Full Duration)")
-        self.path_ax.legend([f"Distribution: {distribution_score}"])
-        self.path_canvas.draw()
 
+        self.current_data = {
+            'key': key,
+            'source': None,
+            'time_in_hours': np.asarray(time_in_hours),
+            'magnitude': magnitude,
+            'x': np.asarray(x),
+            'y': np.asarray(y),
+            'z': np.asarray(z),
+            'sums': sums,
+            'denominators': denominators,
+            'time_weighted': time_weighted,
+        }
+        self._set_magnitude_data(self.current_data['time_in_hours'], magnitude)
+        self._update_convergence_readout()
+        self._update_sampling_readout(time_in_seconds)
+        self._set_path_data(self.path_line, self.path_legend, x, y, z, distribution_score, time_in_seconds)
+        self._draw_canvas(self.path_canvas)
         self._create_time_avg_fig(x_time_avg, y_time_avg, z_time_avg, time_in_hours)
-
-        self.path_ax_analysis.clear()
-        if start_analysis is not None and end_analysis is not None:
-            self.path_ax_analysis.plot(x[start_seg:end_seg], y[start_seg:end_seg], z[start_seg:end_seg], color='#ec1c24', linewidth=1)
-            self._configure_3d_axes(self.path_ax_analysis, "Acceleration Vector Path (Analysis Period)")
-            path_vis_analysis = PathVisualization("experimental", x[start_seg:end_seg], y[start_seg:end_seg], z[start_seg:end_seg])
-            distribution_score_analysis = path_vis_analysis.get_distribution()
-            self.path_ax_analysis.legend([f"Distribution: {distribution_score_analysis}"])
-        else:
-            self._configure_3d_axes(self.path_ax_analysis, "Acceleration Vector Path (Analysis Period)")
-        self.path_canvas_analysis.draw()
+        self._set_spectrum_data(time_in_seconds, x, y, z)
+        self._update_analysis_window(start_analysis, end_analysis)
+
+    def _update_sampling_readout(self, time_in_seconds):
+        report = detect_gaps(time_in_seconds)
+        text = f"Sampling: {report['nominal_interval']:.3g} s, gaps: {len(report['gap_index'])}"
+        if len(report['gap_index']):
+            text += f" ({report['total_gap'] / 3600:.3g} h, longest {np.max(report['gap_duration']) / 3600:.3g} h)"
+        if report['repeated'] or report['backward']:
+            text += f", out-of-order timestamps: {report['repeated'] + report['backward']}"
+        self.sampling_label.config(text=text)
 
     def _submit(self):
         try:
             if self.mode_var.get() == "Theoretical":
                 self._process_theoretical_data()
+            elif self.mode_var.get() == "Comparison":
+                self._process_comparison_submission()
             else:
                 self._process_experimental_data_submission()
         except ValueError as ve:
@@ -452,13 +851,85 @@ class GUI:
             if end_analysis > max_seg:
                 raise ValueError("Upper bound for analysis period must be less than or equal to the simulation duration.")
 
-        analysis = DataProcessor(inner_v, outer_v, max_seg, start_analysis, end_analysis)
-        path_vis = PathVisualization(inner_v, analysis.x, analysis.y, analysis.z)
-        x_time_avg, y_time_avg, z_time_avg = analysis._get_time_avg()
-        magnitude = analysis._get_magnitude(x_time_avg, y_time_avg, z_time_avg)
-        avg_mag_seg, avg_mag_analysis = analysis._get_mag_seg(magnitude)
-        dis_score = analysis.get_distribution()
-        self._update_plot(analysis, magnitude, start_analysis, end_analysis, avg_mag_seg, avg_mag_analysis, inner_v, outer_v, dis_score, path_vis)
+        key = ("Theoretical", inner_v, outer_v, max_seg)
+        # A preview level only stands for the run while its refinement is still running
+        refining = self.current_data is not None and self.current_data.get('preview') and self.refine_inputs is not None
+        if self.current_data is not None and self.current_data['key'] == key and (refining or not self.current_data.get('preview')):
+            self._update_analysis_window(start_analysis, end_analysis)
+            return
+
+        self._start_refinement(inner_v, outer_v, max_seg, start_analysis, end_analysis, key)
+
+    def _start_refinement(self, inner_v, outer_v, max_seg, start_analysis, end_analysis, key):
+        # A coarse preview is drawn first and then replaced by denser levels computed in a
+        # background thread; the last level is the full-resolution DataProcessor run. Only
+        # this (Tk) thread touches widgets: the worker hands levels over through a queue
+        # that is polled with master.after.
+        self._cancel_refinement()
+        generation = self.refine_generation
+        self.refine_inputs = (self.inner_v_entry.get(), self.outer_v_entry.get(), self.max_seg_entry.get())
+        results = queue.Queue()
+
+        def cancelled():
+            return generation != self.refine_generation
+
+        def work():
+            try:
+                for level in iter_refinements(inner_v, outer_v, max_seg, start_analysis, end_analysis, cancelled):
+                    results.put(level)
+            except Exception as e:
+                results.put(e)
+            results.put(None)
+
+        self._clear_spectrum()
+        self.refine_label.config(text="Computing preview...")
+        threading.Thread(target=work, daemon=True).start()
+        self.master.after(REFINE_POLL_MS, self._poll_refinement, generation, results, (start_analysis, end_analysis, inner_v, outer_v, key))
+
+    def _poll_refinement(self, generation, results, request):
+        if generation != self.refine_generation:
+            return
+        latest, finished = None, False
+        while True:
+            try:
+                item = results.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                finished = True
+            elif isinstance(item, Exception):
+                self.refine_label.config(text="")
+                messagebox.showerror("Error", str(item))
+                return
+            else:
+                latest = item
+        if latest is not None:
+            self._show_refinement(latest, *request)
+        if finished:
+            self.refine_inputs = None
+        else:
+            self.master.after(REFINE_POLL_MS, self._poll_refinement, generation, results, request)
+
+    def _show_refinement(self, level, start_analysis, end_analysis, inner_v, outer_v, key):
+        stride = level['stride']
+        if self.current_data is not None and self.current_data['key'] == key:
+            # Keep an analysis window set while the run was refining
+            start_analysis, end_analysis = self.current_data.get('window') or (None, None)
+        dis_score = level['distribution'] if stride == 1 else f"{level['distribution']} (preview)"
+        self._update_plot(level['analysis'], level['magnitude'], start_analysis, end_analysis, None, None, inner_v, outer_v,
+                          dis_score, level['path_vis'], key, preview=stride > 1)
+        self.refine_label.config(text="" if stride == 1 else f"Preview: 1 in {stride} samples, refining...")
+
+    def _cancel_refinement(self):
+        self.refine_generation += 1
+        self.refine_inputs = None
+        if hasattr(self, 'refine_label'):
+            self.refine_label.config(text="")
+
+    def _on_theoretical_input_changed(self, event):
+        # Editing the inputs of a run that is still refining supersedes it.
+        if self.refine_inputs is not None and self.refine_inputs != (self.inner_v_entry.get(), self.outer_v_entry.get(), self.max_seg_entry.get()):
+            self._cancel_refinement()
 
     def _process_experimental_data_submission(self):
         if not hasattr(self, 'experimental_data') or not self.experimental_data:
@@ -474,88 +945,86 @@ class GUI:
                 raise ValueError("Time values must be positive.")
             if end_analysis <= start_analysis:
                 raise ValueError("Upper bound for analysis period must be greater than the lower bound.")
-            datetime_str = []
-            for k in range(0, len(self.experimental_data) - 4, 5):
-                try:
-                    dt = parser.parse(self.experimental_data[k] + " " + self.experimental_data[k + 1])
-                except ValueError:
-                    dt = parser.parse(self.experimental_data[k + 1] + " " + self.experimental_data[k])
-                datetime_str.append(dt)
-            time_in_hours = [(dt - datetime_str[0]).total_seconds() / 3600 for dt in datetime_str]
-            if end_analysis > max(time_in_hours):
+            if end_analysis > np.max(self.experimental_data.time_in_hours):
                 raise ValueError("Upper bound for analysis period exceeds the final timestamp in the CSV.")
 
         self._process_experimental_data(self.experimental_data, start_analysis, end_analysis)
 
-    def _update_plot(self, analysis, magnitude, start_analysis, end_analysis, avg_mag_seg, avg_mag_analysis, inner_v, outer_v, dis_score, path_vis):
-        rcParams['font.family'] = 'Calibri'
-        self.ax.clear()
+    def _process_comparison_submission(self):
+        if not all([self.inner_v_entry.get(), self.outer_v_entry.get()]):
+            raise ValueError("Set frame velocities.")
+        inner_v = float(self.inner_v_entry.get())
+        outer_v = float(self.outer_v_entry.get())
+        self._process_experimental_data_submission()
+
+        data = self.current_data
+        result = compare_runs(data['time_in_hours'] * 3600, data['x'], data['y'], data['z'], inner_v, outer_v)
+        data['pyramid'] = SeriesPyramid(data['time_in_hours'], {'magnitude': data['magnitude'], 'theory': result['theoretical_magnitude']})
+        t0, t1 = self.ax.get_xlim()
+        self.theory_line.set_data(*data['pyramid'].envelope('theory', t0, t1, self._axes_pixels(self.ax)))
+        self._set_theory_line_visible(True)
+        self._set_spectrum_markers((inner_v, outer_v))
+        self._draw_canvas(self.spectrum_canvas)
+        self.mag_legend.get_texts()[2].set_text(f"Theoretical ({inner_v:g}/{outer_v:g} rpm): {np.mean(result['theoretical_magnitude']):.3g}")
+        rms_x, rms_y, rms_z = result['rms']
+        self.comparison_label.config(text=(
+            f"Residual RMS X/Y/Z: {rms_x:.3g}/{rms_y:.3g}/{rms_z:.3g} g, "
+            f"mean residual: {result['residual_mean']:.3g} g, "
+            f"distribution: {result['distribution_experimental']} vs. {result['distribution_theoretical']} "
+            f"({result['distribution_difference']:+d})"))
+        self.mag_background = None
+        self._draw_canvas(self.canvas)
+
+    def _update_plot(self, analysis, magnitude, start_analysis, end_analysis, avg_mag_seg, avg_mag_analysis, inner_v, outer_v, dis_score, path_vis, key=None, preview=False):
         f_time = path_vis.format_time(analysis.time)
 
-        self.ax.set_yscale('log')
-        self.ax.set_title("Resultant Acceleration Vector")
-        self.ax.plot(f_time, magnitude, color='#0066b2', label=f"Time-Averaged Magnitude: {avg_mag_seg:.3g}")
-
-        if start_analysis is not None and end_analysis is not None:
-            start_index = next(i for i, t in enumerate(f_time) if t >= start_analysis)
-            end_index = next(i for i, t in enumerate(f_time) if t >= end_analysis)
-            self.ax.axvline(x=start_analysis, color='#ec1c24', linestyle='--')
-            self.ax.axvline(x=end_analysis, color='#ec1c24', linestyle='--')
-            self.ax.plot(f_time[start_index:end_index], magnitude[start_index:end_index], color='#ec1c24', label=f"Time-Averaged Magnitude: {avg_mag_analysis:.3g}")
-
-        self.ax.legend()
-        self.ax.set_xlabel('Time (hours)')
-        self.ax.set_ylabel('Magnitude (g)')
-        self.canvas.draw()
-
-        self.path_ax.clear()
-        self.path_ax.plot(analysis.x, analysis.y, analysis.z, color='#0066b2', linewidth=1)
-        self._configure_3d_axes(self.path_ax, "Acceleration Vector Path (Full Duration)")
-        self.path_ax.legend([f"Distribution: {dis_score}"])
-        self.path_canvas.draw()
+        self.current_data = {
+            'key': key,
+            'preview': preview,
+            'source': None,
+            'time_in_hours': np.asarray(f_time),
+            'magnitude': np.asarray(magnitude),
+            'x': np.asarray(analysis.x),
+            'y': np.asarray(analysis.y),
+            'z': np.asarray(analysis.z),
+        }
+        self._set_magnitude_data(self.current_data['time_in_hours'], self.current_data['magnitude'])
+        self._update_convergence_readout()
+        self._set_path_data(self.path_line, self.path_legend, analysis.x, analysis.y, analysis.z, dis_score, analysis.time)
+        self._draw_canvas(self.path_canvas)
 
         x_time_avg, y_time_avg, z_time_avg = analysis._get_time_avg()
         self._create_time_avg_fig(x_time_avg, y_time_avg, z_time_avg, analysis.time)
-
-        self.path_ax_analysis.clear()
-        if start_analysis is not None and end_analysis is not None:
-            self.path_ax_analysis.plot(analysis.x[start_index:end_index], analysis.y[start_index:end_index], analysis.z[start_index:end_index], color='#ec1c24', linewidth=1)
-            self._configure_3d_axes(self.path_ax_analysis, "Acceleration Vector Path (Analysis Period)")
-            path_vis_analysis = PathVisualization("experimental", analysis.x[start_index:end_index], analysis.y[start_index:end_index], analysis.z[start_index:end_index])
-            distribution_score_analysis = path_vis_analysis.get_distribution()
-            self.path_ax_analysis.legend([f"Distribution: {distribution_score_analysis}"])
-        else:
-            self._configure_3d_axes(self.path_ax_analysis, "Acceleration Vector Path (Analysis Period)")
-        self.path_canvas_analysis.draw()
+        if not preview:
+            self._set_spectrum_data(analysis.time, analysis.x, analysis.y, analysis.z, (inner_v, outer_v))
+        self._update_analysis_window(start_analysis, end_analysis)
 
     def _create_time_avg_fig(self, x_time_avg, y_time_avg, z_time_avg, time_data, legend=True, title=True):
         if self.mode_var.get() == "Theoretical":
-            time_in_hours = [t / 3600 for t in time_data]  
+            time_in_hours = np.asarray(time_data) / 3600
         else:
-            time_in_hours = time_data 
-
-        self.components_ax.clear()
-        if title:
-            self.components_ax.set_title('Acceleration Vector Components')
+            time_in_hours = time_data
 
-        self.components_ax.plot(time_in_hours, x_time_avg, label='X-Component', color='#0066b2')
-        self.components_ax.plot(time_in_hours, y_time_avg, label='Y-Component', color='#ec1c24')
-        self.components_ax.plot(time_in_hours, z_time_avg, label='Z-Component', color='#aeb0b5')
-        self.components_ax.set_xlabel('Time (hours)')
-        self.components_ax.set_ylabel('Magnitude (g)')
-        if legend:
-            self.components_ax.legend()
-        self.components_canvas.draw()
+        self.components_ax.title.set_visible(title)
+        self.components_pyramid = SeriesPyramid(time_in_hours, {'x': x_time_avg, 'y': y_time_avg, 'z': z_time_avg})
+        for line, name in zip(self.components_lines, ('x', 'y', 'z')):
+            line.set_data(*self.components_pyramid.envelope(name, time_in_hours[0], time_in_hours[-1], self._axes_pixels(self.components_ax)))
+        self.components_legend.set_visible(legend)
+        self.components_ax.relim()
+        self.components_ax.autoscale(enable=True)
+        self._draw_canvas(self.components_canvas)
 
     def _export_magnitude_data(self):
-        file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
+        if self.current_data is None:
+            messagebox.showerror("Error", "Run a simulation or analysis before exporting.")
+            return
+        file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv"), ("NumPy archive", "*.npz"), ("NumPy memory map", "*.npy")])
         if file_path:
             try:
-                with open(file_path, mode='w', newline='') as file:
-                    writer = csv.writer(file)
-                    writer.writerow(["Time (hours)", "Magnitude (g)"])
-                    for time, mag in zip(self.ax.lines[0].get_xdata(), self.ax.lines[0].get_ydata()):
-                        writer.writerow([time, mag])
+                data = self.current_data
+                window = data.get('window') or (None, None)
+                export_data(file_path, data['time_in_hours'], data['x'], data['y'], data['z'], *window, time_weighted_avg=data.get('time_weighted', False),
+                            moving_window_hours=data.get('moving_window_hours'))
                 messagebox.showinfo("Success", "Data exported successfully.")
             except Exception as e:
                 messagebox.showerror("Error", str(e))
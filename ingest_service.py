@@ -0,0 +1,230 @@
+import argparse
+import asyncio
+import json
+import os
+import numpy as np
+import kernels
+import fibonacci_sphere
+from records import parse_lines
+
+BATCH_SIZE = 1024
+
+
+class ChamberAccumulator:
+    def __init__(self, name, num_points=1000, batch_size=BATCH_SIZE):
+        """
+        Incremental metrics of one chamber's accelerometer stream.
+
+        Lines are queued as they arrive and parsed and processed in batches: the running sums use the
+        compensated summation from kernels (so the averages match DataProcessor over the same
+        samples) and each batch is classified into distribution cells with the same octant
+        kernel as PathVisualization.getDistribution.
+
+        Parameters:
+        - name: Chamber name
+        - num_points: Sphere size for the distribution score
+        - batch_size: Records per processed batch
+        """
+        self.name = name
+        self.batch_size = batch_size
+        self.sphere = fibonacci_sphere.fibonacci_sphere(num_points)
+        self.pending = []
+        self.carries = [(0.0, 0.0)] * 3
+        self.count = 0
+        self.rejected = 0
+        self.cells = np.empty(0, dtype=np.int64)
+        self.first_time = None
+        self.last_time = None
+        self.last_sample = None
+
+    def feed_line(self, line):
+        """Queue one raw record; it is parsed and validated with the rest of its batch."""
+        if not line.strip():
+            return
+        self.pending.append(line)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Parse the queued lines (records.parse_lines, the file loader's parser) and fold the
+        valid records into the running sums and visited cells; malformed ones are counted.
+        """
+        if not self.pending:
+            return
+        records = parse_lines(self.pending, source=self.name)
+        self.pending = []
+        self.rejected += len(records.rejected)
+        if not len(records):
+            return
+        vectors = np.column_stack((records.x, records.y, records.z))
+        for i in range(3):
+            _, self.carries[i] = kernels.compensated_cumsum(vectors[:, i], self.carries[i])
+        triangles = kernels.nearest_triangles(vectors, self.sphere)
+        self.cells = np.union1d(self.cells, kernels.triangle_ids(triangles, len(self.sphere)))
+        if self.first_time is None:
+            self.first_time = records.timestamps[0].item()
+        self.last_time = records.timestamps[-1].item()
+        self.last_sample = vectors[-1]
+        self.count += len(vectors)
+
+    def snapshot(self):
+        """Current metrics as a JSON-serialisable dict."""
+        self.flush()
+        averages = [(total + comp) / self.count if self.count else 0.0 for total, comp in self.carries]
+        return {
+            'samples': self.count,
+            'rejected': self.rejected,
+            'start': self.first_time.isoformat() if self.first_time else None,
+            'last': self.last_time.isoformat() if self.last_time else None,
+            'duration_hours': (self.last_time - self.first_time).total_seconds() / 3600 if self.first_time else 0.0,
+            'x_avg': averages[0],
+            'y_avg': averages[1],
+            'z_avg': averages[2],
+            'magnitude': float(np.sqrt(sum(a * a for a in averages))),
+            'last_sample': self.last_sample.tolist() if self.last_sample is not None else None,
+            'distribution': len(self.cells),
+        }
+
+
+class _DatagramReceiver(asyncio.DatagramProtocol):
+    def __init__(self, accumulator):
+        self.accumulator = accumulator
+
+    def datagram_received(self, data, addr):
+        for line in data.decode(errors='replace').splitlines():
+            self.accumulator.feed_line(line)
+
+
+class IngestService:
+    def __init__(self, num_points=1000, batch_size=BATCH_SIZE):
+        """
+        Asyncio service ingesting several chamber streams at once.
+
+        Each chamber is fed by its own local TCP port, UDP port or named pipe. All streams
+        run on one event loop; records are folded into per-chamber accumulators in small
+        batches, so a snapshot (snapshot(), or a query connection) only waits for the
+        current batch and never stops the other streams.
+        """
+        self.num_points = num_points
+        self.batch_size = batch_size
+        self.chambers = {}
+        self.servers = []
+        self.transports = []
+        self.tasks = []
+
+    def chamber(self, name):
+        """Accumulator of a chamber, created on first use."""
+        if name not in self.chambers:
+            self.chambers[name] = ChamberAccumulator(name, self.num_points, self.batch_size)
+        return self.chambers[name]
+
+    def snapshot(self):
+        """Current metrics of every chamber, keyed by name."""
+        return {name: accumulator.snapshot() for name, accumulator in self.chambers.items()}
+
+    async def _read_lines(self, reader, accumulator):
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            accumulator.feed_line(line.decode(errors='replace'))
+
+    async def add_tcp(self, name, host='127.0.0.1', port=0):
+        """Accept line streams for a chamber on a TCP port; returns the bound port."""
+        accumulator = self.chamber(name)
+
+        async def handle(reader, writer):
+            try:
+                await self._read_lines(reader, accumulator)
+            finally:
+                accumulator.flush()
+                writer.close()
+
+        server = await asyncio.start_server(handle, host, port)
+        self.servers.append(server)
+        return server.sockets[0].getsockname()[1]
+
+    async def add_udp(self, name, host='127.0.0.1', port=0):
+        """
+        Accept datagrams (one or more records each) for a chamber; returns the bound port.
+
+        UDP has no flow control: datagrams the OS drops while the loop is busy are lost, so
+        use TCP or a pipe where every sample matters.
+        """
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(lambda: _DatagramReceiver(self.chamber(name)), local_addr=(host, port))
+        self.transports.append(transport)
+        return transport.get_extra_info('sockname')[1]
+
+    async def add_pipe(self, name, path):
+        """Read a chamber's records from a named pipe (created if missing)."""
+        if not os.path.exists(path):
+            os.mkfifo(path)
+        accumulator = self.chamber(name)
+        loop = asyncio.get_running_loop()
+        # Opened read-write so opening never waits for a writer and the stream does not end
+        # when a writer disconnects; successive writers simply continue the stream.
+        pipe = os.fdopen(os.open(path, os.O_RDWR | os.O_NONBLOCK), 'rb', buffering=0)
+        reader = asyncio.StreamReader()
+        transport, _ = await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), pipe)
+        self.transports.append(transport)
+        self.tasks.append(asyncio.ensure_future(self._read_lines(reader, accumulator)))
+
+    async def add_query(self, host='127.0.0.1', port=0):
+        """Serve snapshot() as one line of JSON to every connection; returns the bound port."""
+        async def handle(reader, writer):
+            writer.write((json.dumps(self.snapshot()) + "\n").encode())
+            await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(handle, host, port)
+        self.servers.append(server)
+        return server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        for task in self.tasks:
+            task.cancel()
+        for server in self.servers:
+            server.close()
+            await server.wait_closed()
+        for transport in self.transports:
+            transport.close()
+        for accumulator in self.chambers.values():
+            accumulator.flush()
+
+
+def _endpoint(text):
+    name, _, target = text.partition('=')
+    if not target:
+        raise argparse.ArgumentTypeError(f"Expected CHAMBER=PORT or CHAMBER=PATH, got {text!r}")
+    return name, target
+
+
+async def _serve(args):
+    service = IngestService()
+    for name, port in args.tcp:
+        print(f"{name}: TCP {args.host}:{await service.add_tcp(name, args.host, int(port))}")
+    for name, port in args.udp:
+        print(f"{name}: UDP {args.host}:{await service.add_udp(name, args.host, int(port))}")
+    for name, path in args.pipe:
+        await service.add_pipe(name, path)
+        print(f"{name}: pipe {path}")
+    print(f"Snapshots: TCP {args.host}:{await service.add_query(args.host, args.query)}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await service.close()
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Ingest accelerometer streams from several chambers.")
+    arg_parser.add_argument('--host', default='127.0.0.1')
+    arg_parser.add_argument('--tcp', type=_endpoint, action='append', default=[], metavar='CHAMBER=PORT')
+    arg_parser.add_argument('--udp', type=_endpoint, action='append', default=[], metavar='CHAMBER=PORT')
+    arg_parser.add_argument('--pipe', type=_endpoint, action='append', default=[], metavar='CHAMBER=PATH')
+    arg_parser.add_argument('--query', type=int, default=8765, help="Port serving JSON snapshots")
+    try:
+        asyncio.run(_serve(arg_parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
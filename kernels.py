@@ -0,0 +1,236 @@
+import os
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+NUMBA_AVAILABLE = numba is not None
+BACKENDS = ('numba', 'numpy')
+
+# Octant order used by PathVisualization: posI, posII, posIII, posIV, negI, negII, negIII, negIV
+NUM_OCTANTS = 8
+
+_backend = 'numba' if NUMBA_AVAILABLE else 'numpy'
+
+
+def set_backend(name):
+    """
+    Select the kernel backend at runtime.
+
+    Parameters:
+    - name: 'numba', 'numpy' or 'auto' (numba when installed, otherwise numpy)
+    """
+    global _backend
+    if name == 'auto':
+        name = 'numba' if NUMBA_AVAILABLE else 'numpy'
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown kernel backend: {name}")
+    if name == 'numba' and not NUMBA_AVAILABLE:
+        raise ValueError("The numba backend requires the numba package.")
+    _backend = name
+
+
+def get_backend():
+    """Return the name of the active kernel backend."""
+    return _backend
+
+
+def octant_index(coords):
+    """Octant of each (x, y, z) row, using the same > 0 tests as PathVisualization."""
+    x_pos = coords[:, 0] > 0
+    y_pos = coords[:, 1] > 0
+    z_pos = coords[:, 2] > 0
+    quadrant = np.where(y_pos, np.where(x_pos, 0, 1), np.where(x_pos, 3, 2))
+    return np.where(z_pos, 0, 4) + quadrant
+
+
+def split_sphere(sphere):
+    """
+    Group sphere vertices by octant.
+
+    Returns:
+    - order: Vertex indices sorted by octant (stable, so vertex order is kept within an octant)
+    - offsets: Octant o owns order[offsets[o]:offsets[o + 1]]
+    """
+    octants = octant_index(sphere)
+    order = np.argsort(octants, kind='stable')
+    offsets = np.searchsorted(octants[order], np.arange(NUM_OCTANTS + 1))
+    return order.astype(np.int64), offsets.astype(np.int64)
+
+
+def nearest_triangles(path, sphere, chunk_size=8192):
+    """
+    Three nearest sphere vertices of every path point, searching only the point's octant.
+
+    Parameters:
+    - path: (N, 3) array of path coordinates
+    - sphere: (M, 3) array of sphere vertices
+    - chunk_size: Rows per block for the numpy backend (bounds the distance temporaries)
+
+    Returns:
+    - (N, 3) int64 array of vertex indices, nearest first
+    """
+    path = np.asarray(path, dtype=np.float64).reshape(-1, 3)
+    sphere = np.ascontiguousarray(sphere, dtype=np.float64)
+    order, offsets = split_sphere(sphere)
+    out = np.empty((len(path), 3), dtype=np.int64)
+    if _backend == 'numba':
+        _nearest_triangles_numba(np.ascontiguousarray(path), sphere, order, offsets, out)
+        return out
+
+    for start in range(0, len(path), chunk_size):
+        chunk = path[start:start + chunk_size]
+        chunk_octants = octant_index(chunk)
+        for octant in range(NUM_OCTANTS):
+            rows = np.flatnonzero(chunk_octants == octant)
+            if len(rows) == 0:
+                continue
+            vertices = order[offsets[octant]:offsets[octant + 1]]
+            points = chunk[rows]
+            dist = ((points[:, 0, np.newaxis] - sphere[vertices, 0]) ** 2
+                    + (points[:, 1, np.newaxis] - sphere[vertices, 1]) ** 2
+                    + (points[:, 2, np.newaxis] - sphere[vertices, 2]) ** 2)
+            # Three passes of argmin (first occurrence wins) match a stable sort's tie order.
+            picks = np.arange(len(rows))
+            for rank in range(3):
+                nearest = np.argmin(dist, axis=1)
+                out[start + rows, rank] = vertices[nearest]
+                dist[picks, nearest] = np.inf
+    return out
+
+
+def triangle_ids(triangles, num_vertices):
+    """Encode ordered vertex triples as single int64 cell IDs."""
+    return (triangles[:, 0] * num_vertices + triangles[:, 1]) * num_vertices + triangles[:, 2]
+
+
+def first_visits(cell_ids):
+    """
+    Distinct cells of a path and the sample index at which each was first visited.
+
+    Returns:
+    - cells: Sorted unique cell IDs
+    - first_index: Index of the first sample in each cell
+    """
+    cell_ids = np.asarray(cell_ids, dtype=np.int64)
+    if _backend == 'numba':
+        return _first_visits_numba(cell_ids)
+    return np.unique(cell_ids, return_index=True)
+
+
+def distribution_score(path, sphere):
+    """Number of distinct (octant-restricted) nearest-vertex triangles visited by a path."""
+    triangles = nearest_triangles(path, sphere)
+    cells, first_index = first_visits(triangle_ids(triangles, len(sphere)))
+    return len(cells)
+
+
+def compensated_cumsum(values, carry=(0.0, 0.0)):
+    """
+    Kahan-compensated (TwoSum) running sum of a 1-D series.
+
+    Parameters:
+    - values: 1-D array, accumulated in float64
+    - carry: (sum, compensation) from a previous chunk
+
+    Returns:
+    - sums: Compensated running sums
+    - carry: (sum, compensation) to pass with the next chunk
+    """
+    values = np.asarray(values, dtype=np.float64)
+    sum_start, comp_start = float(carry[0]), float(carry[1])
+    if len(values) == 0:
+        return values.copy(), (sum_start, comp_start)
+    if _backend == 'numba':
+        sums = np.empty_like(values)
+        carry = _compensated_cumsum_numba(values, sum_start, comp_start, sums)
+        return sums, carry
+
+    partial = np.cumsum(np.concatenate(([sum_start], values)))
+    previous, partial = partial[:-1], partial[1:]
+    b_virtual = partial - previous
+    a_virtual = partial - b_virtual
+    error = (previous - a_virtual) + (values - b_virtual)
+    comp = np.cumsum(np.concatenate(([comp_start], error)))[1:]
+    return partial + comp, (float(partial[-1]), float(comp[-1]))
+
+
+def running_average(values, carry=(0.0, 0.0), count=0):
+    """
+    Compensated cumulative mean of a 1-D series, optionally continuing a previous chunk.
+
+    Returns:
+    - averages: Running mean after each sample
+    - carry: (sum, compensation) for the next chunk
+    """
+    sums, carry = compensated_cumsum(values, carry)
+    return sums / np.arange(count + 1, count + len(sums) + 1), carry
+
+
+if NUMBA_AVAILABLE:
+    @numba.njit(cache=True)
+    def _nearest_triangles_numba(path, sphere, order, offsets, out):
+        for n in range(path.shape[0]):
+            px = path[n, 0]
+            py = path[n, 1]
+            pz = path[n, 2]
+            if py > 0:
+                quadrant = 0 if px > 0 else 1
+            else:
+                quadrant = 3 if px > 0 else 2
+            octant = quadrant if pz > 0 else quadrant + 4
+
+            best_0 = best_1 = best_2 = np.inf
+            index_0 = index_1 = index_2 = -1
+            for k in range(offsets[octant], offsets[octant + 1]):
+                v = order[k]
+                dx = px - sphere[v, 0]
+                dy = py - sphere[v, 1]
+                dz = pz - sphere[v, 2]
+                dist = dx * dx + dy * dy + dz * dz
+                if dist < best_0:
+                    best_2, index_2 = best_1, index_1
+                    best_1, index_1 = best_0, index_0
+                    best_0, index_0 = dist, v
+                elif dist < best_1:
+                    best_2, index_2 = best_1, index_1
+                    best_1, index_1 = dist, v
+                elif dist < best_2:
+                    best_2, index_2 = dist, v
+            out[n, 0] = index_0
+            out[n, 1] = index_1
+            out[n, 2] = index_2
+
+    @numba.njit(cache=True)
+    def _compensated_cumsum_numba(values, total, comp, out):
+        for i in range(values.shape[0]):
+            value = values[i]
+            partial = total + value
+            b_virtual = partial - total
+            a_virtual = partial - b_virtual
+            comp += (total - a_virtual) + (value - b_virtual)
+            total = partial
+            out[i] = total + comp
+        return total, comp
+
+    @numba.njit(cache=True)
+    def _first_visits_numba(cell_ids):
+        seen = dict()
+        for i in range(cell_ids.shape[0]):
+            if cell_ids[i] not in seen:
+                seen[cell_ids[i]] = i
+        cells = np.empty(len(seen), dtype=np.int64)
+        first_index = np.empty(len(seen), dtype=np.int64)
+        k = 0
+        for cell, index in seen.items():
+            cells[k] = cell
+            first_index[k] = index
+            k += 1
+        order = np.argsort(cells)
+        return cells[order], first_index[order]
+
+
+if os.environ.get('KERNEL_BACKEND'):
+    set_backend(os.environ['KERNEL_BACKEND'])
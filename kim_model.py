@@ -2,17 +2,31 @@ import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.ticker import ScalarFormatter
 from mpl_toolkits.mplot3d import Axes3D
+from time_weighted import cumulative_integral
+from trig_tables import frame_trig
 
 class KimModel:
-    def __init__(self, inner_rpm, outer_rpm, delta_x, delta_y, delta_z, duration_hours):
+    # Time steps evaluated in float64 per chunk when filling the compact float32 outputs.
+    COMPACT_CHUNK = 1 << 16
+
+    def __init__(self, inner_rpm, outer_rpm, delta_x, delta_y, delta_z, duration_hours, compact=False, trig='direct'):
         """
         Initialize the 3D clinostat model.
         
         Parameters:
-        - inner_rpm: Inner frame rotation speed (RPM) 
-        - outer_rpm: Outer frame rotation speed (RPM)
+        - inner_rpm: Inner frame rotation speed (RPM), or a speed profile with rpm(t) and
+          rpm_dot(t) methods (see speed_profiles) for ramped or random-walk runs
+        - outer_rpm: Outer frame rotation speed (RPM), or a speed profile
         - delta_x, delta_y, delta_z: Position deviations from clinostat center (meters)
         - duration_hours: Simulation duration (hours)
+        - compact: Return acceleration vectors as float32. Each (3, N) result is a view
+          of a contiguous (N, 3) array filled chunk by chunk, so float64 is only used
+          for the working set of one chunk. Time averages are still accumulated in
+          float64, so the time-averaged magnitude is only limited by the float32
+          rounding of the samples (~6e-8 relative, i.e. ~6e-7 m/s² for gravity).
+        - trig: 'direct' (np.cos/np.sin of the frame angles) or 'phasor' (trig_tables
+          phasor recurrence for constant speeds on uniform time grids; agrees with
+          'direct' to ~1e-12 relative and does not lose accuracy as ω t grows)
         """
         self.inner_rpm = inner_rpm  
         self.outer_rpm = outer_rpm 
@@ -20,6 +34,8 @@ class KimModel:
         self.delta_y = delta_y      # Δy
         self.delta_z = delta_z      # Δz
         self.duration_hours = duration_hours
+        self.compact = compact
+        self.trig = trig
         self.pi_over_30 = np.pi / 30  # Conversion factor from RPM to rad/s
         self.g = np.array([[0], [0], [-9.8]])  # Shape: (3, 1)
 
@@ -27,44 +43,205 @@ class KimModel:
         """Convert RPM to radians per second."""
         return rpm * self.pi_over_30
 
-    def calculate_acceleration(self):
+    def default_time_array(self):
+        """Uniform time grid (seconds) over the simulation duration."""
+        return np.linspace(0, self.duration_hours * 3600, num=int(self.duration_hours * 3600))
+
+    def _frame_motion(self, rpm, time_array, carry=None):
+        """
+        Angle, angular velocity and angular acceleration of one frame.
+
+        Constant speeds give θ = ω t exactly. Profiles are integrated with the cumulative
+        trapezoid rule from the first time point (θ = 0 there); carry continues the
+        integral from a previous chunk.
+
+        Returns:
+        - (cos θ, sin θ), omega, omega_dot (scalars or arrays), and the carry for the next chunk
+        """
+        if np.isscalar(rpm):
+            return frame_trig(rpm, time_array, self.trig), self.rpm_to_rad_sec(rpm), 0.0, None
+        omega = self.rpm_to_rad_sec(rpm.rpm(time_array))
+        theta, _, carry = cumulative_integral(time_array, omega, carry)
+        return (np.cos(theta), np.sin(theta)), omega, self.rpm_to_rad_sec(rpm.rpm_dot(time_array)), carry
+
+    def calculate_acceleration(self, time_array=None):
         """
         Calculate total acceleration in Local 2 frame over time.
+
+        Parameters:
+        - time_array: Optional time points (seconds); defaults to the uniform grid over the duration
         
         Returns:
         - time_array: Time points (seconds)
         - ax, ay, az: Acceleration components in Local 2 frame (m/s²)
         """
-        # Convert RPM to rad/s
-        inner_rad_sec = self.rpm_to_rad_sec(self.inner_rpm)  # θ₁ (inner frame)
-        outer_rad_sec = self.rpm_to_rad_sec(self.outer_rpm)  # θ₂ (outer frame)
-
         # Time array in seconds
-        time_array = np.linspace(0, self.duration_hours * 3600, num=int(self.duration_hours * 3600))
+        if time_array is None:
+            time_array = self.default_time_array()
+        time_array = np.asarray(time_array, dtype=np.float64)
+
+        if not self.compact:
+            trig, w, w_dot, _ = self._motion(time_array)
+            return self._acceleration(time_array, trig, w, w_dot)
 
-        # Angles as function of time
-        theta_1 = inner_rad_sec * time_array  # θ₁ (inner frame angle)
-        theta_2 = outer_rad_sec * time_array  # θ₂ (outer frame angle)
+        outputs = [np.empty((len(time_array), 3), dtype=np.float32) for _ in range(3)]
+        carries = (None, None)
+        for start in range(0, len(time_array), self.COMPACT_CHUNK):
+            chunk = time_array[start:start + self.COMPACT_CHUNK]
+            trig, w, w_dot, carries = self._motion(chunk, carries)
+            for output, vectors in zip(outputs, self._acceleration(chunk, trig, w, w_dot)[1:]):
+                output[start:start + len(chunk)] = vectors.T
+        return (time_array, *(output.T for output in outputs))
+
+    def iter_acceleration(self, time_array=None, chunk_size=1 << 18):
+        """
+        Yield calculate_acceleration results chunk by chunk, carrying the frame angles across
+        chunks so the concatenated output equals a single call.
+        """
+        if time_array is None:
+            time_array = self.default_time_array()
+        carries = (None, None)
+        for start in range(0, len(time_array), chunk_size):
+            result, carries = self.acceleration_chunk(time_array[start:start + chunk_size], carries)
+            yield result
+
+    def acceleration_chunk(self, time_array, carries=(None, None)):
+        """
+        calculate_acceleration for one chunk of a longer run.
+
+        Parameters:
+        - time_array: Time points of the chunk (seconds)
+        - carries: Frame-angle carries returned with the previous chunk ((None, None) for the first)
+
+        Returns:
+        - the calculate_acceleration tuple, and the carries for the next chunk
+        """
+        time_array = np.asarray(time_array, dtype=np.float64)
+        trig, w, w_dot, carries = self._motion(time_array, carries)
+        time_array, g_prime, a_prime, a_tot_prime = self._acceleration(time_array, trig, w, w_dot)
+        if self.compact:
+            g_prime, a_prime, a_tot_prime = (self._to_compact(v) for v in (g_prime, a_prime, a_tot_prime))
+        return (time_array, g_prime, a_prime, a_tot_prime), carries
+
+    def position_operator(self, time_array=None):
+        """
+        Linear map from a sample offset to its non-gravitational acceleration.
+
+        a_prime is linear in (Δx, Δy, Δz), so for each time step a 3x3 matrix A(t) gives
+        a_prime(t) = A(t) @ (Δx, Δy, Δz) for any offset. The operator depends only on the
+        frame speeds; the offsets given to the constructor are not used.
+
+        Returns:
+        - time_array: Time points (seconds)
+        - operator: (N, 3, 3) array (m/s² per meter); column j is a_prime for a unit offset along axis j
+        """
+        if time_array is None:
+            time_array = self.default_time_array()
+        time_array = np.asarray(time_array, dtype=np.float64)
+        trig, w, w_dot, _ = self._motion(time_array)
+        return time_array, self._operator(trig, w, w_dot)
+
+    def evaluate_positions(self, positions, time_array=None, operator=None, chunk_size=1 << 14):
+        """
+        Residual (non-gravitational) acceleration statistics for many sample positions at once.
+
+        Each chunk of time steps is applied to all positions with one batched matmul. Without
+        a precomputed operator, it is built chunk by chunk so memory stays bounded.
+
+        Parameters:
+        - positions: (P, 3) array of offsets from the clinostat center (meters)
+        - time_array: Optional time points (seconds)
+        - operator: Optional (N, 3, 3) result of position_operator; all N steps are used, and a
+          time_array given with it must have the same length
+        - chunk_size: Time steps per batch
+
+        Returns:
+        - dict of (P,) arrays (m/s²): 'mean' and 'max' of |a_prime| over time, and
+          'time_avg', the magnitude of the time-averaged a_prime vector
+        """
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        if operator is not None:
+            if time_array is not None and len(time_array) != len(operator):
+                raise ValueError(f"Operator has {len(operator)} time steps but time_array has {len(time_array)}.")
+            num_steps = len(operator)
+        else:
+            if time_array is None:
+                time_array = self.default_time_array()
+            num_steps = len(time_array)
+        total = np.zeros(len(positions))
+        peak = np.zeros(len(positions))
+        operator_sum = np.zeros((3, 3))
+        count = 0
+        carries = (None, None)
+        for start in range(0, num_steps, chunk_size):
+            if operator is None:
+                chunk = np.asarray(time_array[start:start + chunk_size], dtype=np.float64)
+                trig, w, w_dot, carries = self._motion(chunk, carries)
+                block = self._operator(trig, w, w_dot)
+            else:
+                block = operator[start:start + chunk_size]
+            magnitude = np.linalg.norm(block @ positions.T, axis=1)  # (n, P)
+            total += magnitude.sum(axis=0)
+            peak = np.maximum(peak, magnitude.max(axis=0))
+            operator_sum += block.sum(axis=0)
+            count += len(block)
+        return {
+            'mean': total / max(count, 1),
+            'max': peak,
+            'time_avg': np.linalg.norm(positions @ (operator_sum / max(count, 1)).T, axis=1),
+        }
+
+    def _motion(self, time_array, carries=(None, None)):
+        """
+        Shared cos/sin of the frame angles, total angular velocity w and its derivative ẇ,
+        plus the integration carries.
+
+        The frame-angle trig values are computed once here, as trig = (cos θ₁, sin θ₁,
+        cos θ₂, sin θ₂), and reused by every formula below.
+        """
+        (cos_1, sin_1), inner_rad_sec, inner_rad_sec2, inner_carry = self._frame_motion(self.inner_rpm, time_array, carries[0])  # θ₁ (inner frame)
+        (cos_2, sin_2), outer_rad_sec, outer_rad_sec2, outer_carry = self._frame_motion(self.outer_rpm, time_array, carries[1])  # θ₂ (outer frame)
 
         # Total angular velocity w = w₁ + w₂
         w = np.array([
             inner_rad_sec * np.ones_like(time_array),          # w_x = θ₁̇
-            outer_rad_sec * np.cos(theta_1),                   # w_y = θ₂̇ cos(θ₁)
-            outer_rad_sec * np.sin(theta_1)                    # w_z = θ₂̇ sin(θ₁)
+            outer_rad_sec * cos_1,                             # w_y = θ₂̇ cos(θ₁)
+            outer_rad_sec * sin_1                              # w_z = θ₂̇ sin(θ₁)
         ])  # Shape: (3, len(time_array))
 
-        # Angular acceleration (derivative of w)
+        # Angular acceleration (derivative of w); θ̈ terms vanish for constant speeds
         w_dot = np.array([
-            np.zeros_like(time_array),                         # ẇ_x = 0 (constant θ₁̇)
-            -inner_rad_sec * outer_rad_sec * np.sin(theta_1),  # ẇ_y = -θ₁̇ θ₂̇ sin(θ₁)
-            inner_rad_sec * outer_rad_sec * np.cos(theta_1)    # ẇ_z = θ₁̇ θ₂̇ cos(θ₁)
+            inner_rad_sec2 + np.zeros_like(time_array),                           # ẇ_x = θ₁̈
+            outer_rad_sec2 * cos_1 - inner_rad_sec * outer_rad_sec * sin_1,       # ẇ_y = θ₂̈ cos(θ₁) - θ₁̇ θ₂̇ sin(θ₁)
+            outer_rad_sec2 * sin_1 + inner_rad_sec * outer_rad_sec * cos_1        # ẇ_z = θ₂̈ sin(θ₁) + θ₁̇ θ₂̇ cos(θ₁)
         ])  # Shape: (3, len(time_array))
+        return (cos_1, sin_1, cos_2, sin_2), w, w_dot, (inner_carry, outer_carry)
+
+    def _rotations(self, trig):
+        """Transposed frame rotations R_y^T(θ₁) and R_x^T(θ₂), each of shape (3, 3, N)."""
+        cos_1, sin_1, cos_2, sin_2 = trig
+        zeros, ones = np.zeros_like(cos_1), np.ones_like(cos_1)
+        R_y_T = np.array([
+            [cos_1, zeros, -sin_1],
+            [zeros, ones, zeros],
+            [sin_1, zeros, cos_1]
+        ])  # R_y^T(θ₁)
 
+        R_x_T = np.array([
+            [ones, zeros, zeros],
+            [zeros, cos_2, sin_2],
+            [zeros, -sin_2, cos_2]
+        ])  # R_x^T(θ₂)
+        return R_y_T, R_x_T
+
+    def _non_gravitational(self, trig, w, w_dot, R_y_T, R_x_T, delta_x, delta_y, delta_z):
+        """Non-gravitational acceleration a(t)'' in Local 2 frame for one offset, shape (3, N)."""
+        cos_1, sin_1, cos_2, sin_2 = trig
         # Position in global frame
         r = np.array([
-            self.delta_x * np.cos(theta_2) + self.delta_z * np.sin(theta_2),
-            self.delta_y * np.cos(theta_1) + self.delta_x * np.sin(theta_1) * np.sin(theta_2) - self.delta_z * np.sin(theta_1) * np.cos(theta_2),
-            self.delta_y * np.sin(theta_1) - self.delta_x * np.cos(theta_1) * np.sin(theta_2) + self.delta_z * np.cos(theta_1) * np.cos(theta_2)
+            delta_x * cos_2 + delta_z * sin_2,
+            delta_y * cos_1 + delta_x * sin_1 * sin_2 - delta_z * sin_1 * cos_2,
+            delta_y * sin_1 - delta_x * cos_1 * sin_2 + delta_z * cos_1 * cos_2
         ])
 
         # Acceleration components
@@ -73,21 +250,19 @@ class KimModel:
         w_dot_cross_r = np.cross(w_dot.T, r.T).T
         a = -(w_dot_cross_r + w_cross_w_cross_r)  # a(t) = -{ẇ × r + w × (w × r)}
 
-        # Rotation matrices (transposed)
-        R_y_T = np.array([
-            [np.cos(theta_1), np.zeros_like(theta_1), -np.sin(theta_1)],
-            [np.zeros_like(theta_1), np.ones_like(theta_1), np.zeros_like(theta_1)],
-            [np.sin(theta_1), np.zeros_like(theta_1), np.cos(theta_1)]
-        ])  # R_y^T(θ₁)
+        # Transform accelerations to Local 2 frame
+        return np.einsum('ijk,jk->ik', R_y_T, np.einsum('ijk,jk->ik', R_x_T, a))  # a(t)''
 
-        R_x_T = np.array([
-            [np.ones_like(theta_2), np.zeros_like(theta_2), np.zeros_like(theta_2)],
-            [np.zeros_like(theta_2), np.cos(theta_2), np.sin(theta_2)],
-            [np.zeros_like(theta_2), -np.sin(theta_2), np.cos(theta_2)]
-        ])  # R_x^T(θ₂)
+    def _operator(self, trig, w, w_dot):
+        """(N, 3, 3) operator whose columns are a(t)'' for unit offsets along x, y and z."""
+        R_y_T, R_x_T = self._rotations(trig)
+        columns = [self._non_gravitational(trig, w, w_dot, R_y_T, R_x_T, *unit) for unit in np.eye(3)]
+        return np.stack(columns, axis=-1).transpose(1, 0, 2)
 
-        # Transform accelerations to Local 2 frame
-        a_prime = np.einsum('ijk,jk->ik', R_y_T, np.einsum('ijk,jk->ik', R_x_T, a))  # a(t)''
+    def _acceleration(self, time_array, trig, w, w_dot):
+        """Gravitational, non-gravitational and total acceleration (float64) from the frame motion."""
+        R_y_T, R_x_T = self._rotations(trig)
+        a_prime = self._non_gravitational(trig, w, w_dot, R_y_T, R_x_T, self.delta_x, self.delta_y, self.delta_z)  # a(t)''
         g_prime = np.einsum('ijk,jk->ik', R_y_T, np.einsum('ijk,jk->ik', R_x_T, self.g))  # g(t)''
 
         # Total acceleration in Local 2 frame
@@ -95,74 +270,121 @@ class KimModel:
 
         return time_array, g_prime, a_prime, a_tot_prime
 
-def plot_kim_results(time_array, g_prime, a_prime, a_tot_prime):
+    def _to_compact(self, vectors):
+        """Store a (3, N) vector series as a contiguous float32 (N, 3) array, returned as its (3, N) view."""
+        return np.ascontiguousarray(vectors.T, dtype=np.float32).T
+
+def kim_time_averages(g_prime, a_prime):
+    """
+    Running time averages of the gravitational and non-gravitational accelerations.
+
+    Returns:
+    - dict with 'g_x', 'g_y', 'g_z', 'g_magnitude', 'a_x', 'a_y', 'a_z', 'a_magnitude' (m/s²)
+    """
+    averages = {}
+    for prefix, vectors in (('g', g_prime), ('a', a_prime)):
+        for i, axis in enumerate('xyz'):
+            averages[f'{prefix}_{axis}'] = np.cumsum(vectors[i], dtype=np.float64) / np.arange(1, len(vectors[i]) + 1)
+        averages[f'{prefix}_magnitude'] = np.sqrt(averages[f'{prefix}_x']**2 + averages[f'{prefix}_y']**2 + averages[f'{prefix}_z']**2)
+    return averages
+
+def draw_kim_results(axes, time_array, averages, a_tot_prime):
+    """
+    Draw the four Kim model plots into existing axes.
+
+    Parameters:
+    - axes: Four axes; the last one must be a 3D axes for the vector path
+    - time_array: Time points (seconds)
+    - averages: Result of kim_time_averages
+    - a_tot_prime: Total acceleration (3, N), drawn as a unit-vector path
+    """
     time_hours = time_array / 3600
+    g_ax, g_components_ax, a_components_ax, path_ax = axes
 
     # Time-averaged gravitational acceleration
-    g_x_avg = np.cumsum(g_prime[0]) / np.arange(1, len(g_prime[0]) + 1)
-    g_y_avg = np.cumsum(g_prime[1]) / np.arange(1, len(g_prime[1]) + 1)
-    g_z_avg = np.cumsum(g_prime[2]) / np.arange(1, len(g_prime[2]) + 1)
-    g_magnitude_avg = np.sqrt(g_x_avg**2 + g_y_avg**2 + g_z_avg**2)
-
-    # Time-averaged non-gravitational acceleration
-    plt.figure()
-    plt.plot(time_hours, g_magnitude_avg, color='blue')
-    plt.title("Time-Averaged Gravitational Acceleration")
-    plt.xlim(left=0, right=time_hours[-1])
-    plt.ylim(bottom=0)
-    plt.xlabel("Time (h)")
-    plt.ylabel("Acceleration (m/s²)")
-    plt.show()
-
-    plt.figure()
-    plt.plot(time_hours, g_x_avg, label="X", color='red')
-    plt.plot(time_hours, g_y_avg, label="Y", color='lime')
-    plt.plot(time_hours, g_z_avg, label="Z", color='blue')
-    plt.plot(time_hours, g_magnitude_avg, label="X+Y+Z", color='black')
-    plt.title("Time-Averaged Gravitational Acceleration")
-    plt.xlim(left=0, right=time_hours[-1])
-    plt.xlabel("Time (h)")
-    plt.ylabel("Acceleration (m/s²)")
-    plt.legend()
-    plt.show()
+    g_ax.plot(time_hours, averages['g_magnitude'], color='blue')
+    g_ax.set_title("Time-Averaged Gravitational Acceleration")
+    g_ax.set_xlim(left=0, right=time_hours[-1])
+    g_ax.set_ylim(bottom=0)
+    g_ax.set_xlabel("Time (h)")
+    g_ax.set_ylabel("Acceleration (m/s²)")
 
-    # Time-averaged non-gravitational acceleration
-    a_x_avg = np.cumsum(a_prime[0]) / np.arange(1, len(a_prime[0]) + 1)
-    a_y_avg = np.cumsum(a_prime[1]) / np.arange(1, len(a_prime[1]) + 1)
-    a_z_avg = np.cumsum(a_prime[2]) / np.arange(1, len(a_prime[2]) + 1)
-    a_magnitude_avg = np.sqrt(a_x_avg**2 + a_y_avg**2 + a_z_avg**2)
-
-    plt.figure()
-    plt.plot(time_hours, a_x_avg, label="X", color='red')
-    plt.plot(time_hours, a_y_avg, label="Y", color='lime')
-    plt.plot(time_hours, a_z_avg, label="Z", color='blue')
-    plt.plot(time_hours, a_magnitude_avg, label="X+Y+Z", color='black')
-    plt.title("Time-Averaged Non-Gravitational Acceleration")
-    plt.xlim(left=0, right=time_hours[-1])
-    plt.xlabel("Time (h)")
-    plt.ylabel("Acceleration (m/s²)")
-    plt.gca().yaxis.set_major_formatter(ScalarFormatter(useMathText=True))
-    plt.gca().ticklabel_format(style='sci', axis='y', scilimits=(0,0))
-    plt.legend()
-    plt.show()
+    for ax, prefix, title in ((g_components_ax, 'g', "Time-Averaged Gravitational Acceleration"),
+                              (a_components_ax, 'a', "Time-Averaged Non-Gravitational Acceleration")):
+        ax.plot(time_hours, averages[f'{prefix}_x'], label="X", color='red')
+        ax.plot(time_hours, averages[f'{prefix}_y'], label="Y", color='lime')
+        ax.plot(time_hours, averages[f'{prefix}_z'], label="Z", color='blue')
+        ax.plot(time_hours, averages[f'{prefix}_magnitude'], label="X+Y+Z", color='black')
+        ax.set_title(title)
+        ax.set_xlim(left=0, right=time_hours[-1])
+        ax.set_xlabel("Time (h)")
+        ax.set_ylabel("Acceleration (m/s²)")
+        ax.legend()
+    a_components_ax.yaxis.set_major_formatter(ScalarFormatter(useMathText=True))
+    a_components_ax.ticklabel_format(style='sci', axis='y', scilimits=(0,0))
 
-    # Acceleration vector path plot
-    fig = plt.figure()
-    ax = fig.add_subplot(111, projection='3d')
-    
-    # Normalize the acceleration vectors to unit vectors
+    # Acceleration vector path plot, normalized to unit vectors
     a_tot_prime_magnitude = np.linalg.norm(a_tot_prime, axis=0)
     a_tot_prime_unit = a_tot_prime / a_tot_prime_magnitude
-    
-    ax.plot(a_tot_prime_unit[0], a_tot_prime_unit[1], a_tot_prime_unit[2], color='blue', linewidth=1)
-    ax.set_xlabel('X')
-    ax.set_ylabel('Y')
-    ax.set_zlabel('Z')
+
+    path_ax.plot(a_tot_prime_unit[0], a_tot_prime_unit[1], a_tot_prime_unit[2], color='blue', linewidth=1)
+    path_ax.set_xlabel('X')
+    path_ax.set_ylabel('Y')
+    path_ax.set_zlabel('Z')
     ticks = np.arange(-1.0, 1.5, 0.5)
-    ax.set_xticks(ticks)
-    ax.set_yticks(ticks)
-    ax.set_zticks(ticks)
-    ax.set_title("Acceleration Vector Path")
+    path_ax.set_xticks(ticks)
+    path_ax.set_yticks(ticks)
+    path_ax.set_zticks(ticks)
+    path_ax.set_title("Acceleration Vector Path")
+
+def plot_kim_results(time_array, g_prime, a_prime, a_tot_prime, mode='show', file_prefix='kimFig'):
+    """
+    Plot the Kim model results as four figures.
+
+    Parameters:
+    - mode: 'show' (one plt.show() for all figures), 'save' (file_prefix1.png .. file_prefix4.png) or both
+    """
+    figures = [plt.figure() for _ in range(4)]
+    axes = [fig.add_subplot(111) for fig in figures[:3]] + [figures[3].add_subplot(111, projection='3d')]
+    draw_kim_results(axes, time_array, kim_time_averages(g_prime, a_prime), a_tot_prime)
+
+    if mode != 'show':
+        for i, fig in enumerate(figures, start=1):
+            fig.savefig(f"{file_prefix}{i}.png")
+    if mode != 'save':
+        plt.show()
+
+def chamber_grid(extent_x, extent_y, extent_z, num=11):
+    """
+    Regular grid of sample offsets covering the chamber volume.
+
+    Parameters:
+    - extent_x, extent_y, extent_z: Half-widths of the volume along each axis (meters)
+    - num: Grid points per axis
+
+    Returns:
+    - axes: (xs, ys, zs) grid coordinates
+    - positions: (num**3, 3) offsets in 'ij' order, so values reshape to (num, num, num)
+    """
+    axes = tuple(np.linspace(-extent, extent, num) for extent in (extent_x, extent_y, extent_z))
+    grid = np.meshgrid(*axes, indexing='ij')
+    return axes, np.column_stack([g.ravel() for g in grid])
+
+def plot_position_map(axes, values, title="Residual Acceleration", max_slices=5):
+    """Heatmap of a per-position statistic: one X-Y slice per Z level (up to max_slices)."""
+    xs, ys, zs = axes
+    values = np.asarray(values).reshape(len(xs), len(ys), len(zs))
+    slices = np.unique(np.linspace(0, len(zs) - 1, min(max_slices, len(zs))).round().astype(int))
+    fig, axs = plt.subplots(1, len(slices), figsize=(3 * len(slices) + 1, 3.4), squeeze=False)
+    extent = [ys[0], ys[-1], xs[0], xs[-1]]
+    vmin, vmax = np.min(values), np.max(values)
+    for ax, k in zip(axs[0], slices):
+        image = ax.imshow(values[:, :, k], origin='lower', extent=extent, vmin=vmin, vmax=vmax, aspect='auto', cmap='viridis')
+        ax.set_title(f"Δz = {zs[k]:.3g} m")
+        ax.set_xlabel("Δy (m)")
+    axs[0][0].set_ylabel("Δx (m)")
+    fig.colorbar(image, ax=axs[0].tolist(), label="Acceleration (m/s²)")
+    fig.suptitle(title)
     plt.show()
 
 if __name__ == "__main__":
@@ -0,0 +1,131 @@
+import os
+import sys
+import time
+import numpy as np
+from multiprocessing import Pool, shared_memory
+import kernels
+import fibonacci_sphere
+from data_compile_v1 import Sim
+
+CHUNK_SIZE = 1 << 18
+
+# Set in each worker by _init_worker: the shared path and the sphere it is scored against.
+_worker = {}
+
+
+def cell_ids(points, sphere, method='octant'):
+    """Sphere-cell ID of every point, as in PathVisualization.getDistribution."""
+    if method == 'fibonacci':
+        triangles = fibonacci_sphere.nearest_vertices(points, len(sphere), sphere=sphere)
+    else:
+        triangles = kernels.nearest_triangles(points, sphere)
+    return kernels.triangle_ids(triangles, len(sphere))
+
+
+def _visits(cell_ids, offset=0):
+    """Visited cells of one chunk with their hit counts and first-visit sample indices."""
+    cells, first_index, counts = np.unique(cell_ids, return_index=True, return_counts=True)
+    return cells, first_index + offset, counts
+
+
+def merge_visits(parts):
+    """
+    Merge per-chunk (cells, first_visit, counts) results into those of the whole path.
+
+    Counts are summed and the earliest first visit is kept, so the result does not depend
+    on how the path was split.
+    """
+    cells = np.concatenate([part[0] for part in parts])
+    first_visit = np.concatenate([part[1] for part in parts])
+    counts = np.concatenate([part[2] for part in parts])
+    order = np.lexsort((first_visit, cells))
+    cells, first_visit, counts = cells[order], first_visit[order], counts[order]
+    starts = np.flatnonzero(np.concatenate(([True], cells[1:] != cells[:-1])))
+    if len(cells) == 0:
+        return cells, first_visit, counts
+    return cells[starts], first_visit[starts], np.add.reduceat(counts, starts)
+
+
+def _init_worker(name, shape, sphere, method, backend):
+    memory = shared_memory.SharedMemory(name=name)
+    _worker['memory'] = memory
+    _worker['path'] = np.ndarray(shape, dtype=np.float64, buffer=memory.buf)
+    _worker['sphere'] = sphere
+    _worker['method'] = method
+    kernels.set_backend(backend)
+
+
+def _classify_chunk(bounds):
+    start, end = bounds
+    return _visits(cell_ids(_worker['path'][start:end], _worker['sphere'], _worker['method']), start)
+
+
+def path_visits(path, num_points=1000, method='octant', workers=None, chunk_size=CHUNK_SIZE):
+    """
+    Visited sphere cells of a path, with hit counts and first visits, scored in parallel.
+
+    The (N, 3) path is copied once into shared memory. Workers read disjoint chunks of it
+    in place, classify them into cell IDs and return only the visited cells of their chunk,
+    which are merged here. With workers=1 the same chunks are scored in this process.
+
+    Visited cells are kept as sorted unique ID arrays rather than bitsets: with the
+    default 1000-vertex sphere the triangle IDs span 10⁹ values, while a path visits at
+    most a few thousand of them.
+
+    Parameters:
+    - path: (N, 3) array of path coordinates
+    - num_points: Sphere size (as in PathVisualization)
+    - method: 'octant' or 'fibonacci' (see PathVisualization.getDistribution)
+    - workers: Number of processes (default: os.cpu_count())
+    - chunk_size: Samples per task
+
+    Returns:
+    - cells: Sorted unique cell IDs
+    - first_visit: Index of the first sample in each cell
+    - counts: Number of samples in each cell
+    """
+    path = np.asarray(path, dtype=np.float64).reshape(-1, 3)
+    sphere = fibonacci_sphere.fibonacci_sphere(num_points)
+    bounds = [(start, min(start + chunk_size, len(path))) for start in range(0, len(path), chunk_size)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(bounds) <= 1:
+        return merge_visits([_visits(cell_ids(path[start:end], sphere, method), start) for start, end in bounds]
+                            or [_visits(np.empty(0, dtype=np.int64))])
+
+    memory = shared_memory.SharedMemory(create=True, size=path.nbytes)
+    try:
+        shared = np.ndarray(path.shape, dtype=np.float64, buffer=memory.buf)
+        shared[:] = path
+        with Pool(workers, initializer=_init_worker, initargs=(memory.name, path.shape, sphere, method, kernels.get_backend())) as pool:
+            parts = pool.map(_classify_chunk, bounds)
+        del shared
+    finally:
+        memory.close()
+        memory.unlink()
+    return merge_visits(parts)
+
+
+def distribution_score(path, num_points=1000, method='octant', workers=None, chunk_size=CHUNK_SIZE):
+    """Parallel equivalent of PathVisualization.getDistribution for one long path."""
+    cells, _, _ = path_visits(path, num_points, method, workers, chunk_size)
+    return len(cells)
+
+
+if __name__ == "__main__":
+    # Benchmark: score one long Sim path with 1..16 workers and check every result
+    # against the serial one. Usage: python parallel_scoring.py [hours]
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 200.0
+    _, vectors = Sim().gVectorArray(0, int(hours * 3600), 2.3, 3.7)
+    print(f"{len(vectors)} samples, {os.cpu_count()} CPUs, kernel backend: {kernels.get_backend()}")
+
+    path_visits(vectors[:1000], workers=1)  # compile the numba kernels before timing
+    start = time.perf_counter()
+    reference = path_visits(vectors, workers=1)
+    serial = time.perf_counter() - start
+    print(f"workers  1: {serial:7.2f} s  score {len(reference[0])}")
+    for workers in (2, 4, 8, 16):
+        start = time.perf_counter()
+        result = path_visits(vectors, workers=workers)
+        elapsed = time.perf_counter() - start
+        same = all(np.array_equal(a, b) for a, b in zip(result, reference))
+        print(f"workers {workers:2d}: {elapsed:7.2f} s  speedup {serial / elapsed:5.2f}x  {'identical' if same else 'MISMATCH'}")
@@ -0,0 +1,299 @@
+import math
+from fractions import Fraction
+import numpy as np
+import kernels
+import fibonacci_sphere
+from data_compile_v1 import Sim
+
+# Longest period (in samples) worth simulating on its own; 2**22 s is about 48 days.
+MAX_PERIOD = 1 << 22
+
+# Largest accumulated frame-angle error (radians) over a run that still counts as periodic.
+ANGLE_TOLERANCE = 1e-9
+
+# A period sum below this (per sample) is rounding noise of a zero-mean period.
+PERIOD_SUM_TOLERANCE = 1e-12
+
+# Periods summed directly by mean_running_magnitude before switching to Euler-Maclaurin.
+DIRECT_PERIODS = 256
+
+CHUNK_SIZE = 1 << 18
+
+
+def detect_period(rpms, num_samples, step=1.0, max_period=MAX_PERIOD, tolerance=ANGLE_TOLERANCE):
+    """
+    Number of samples after which every frame is back at the same angle.
+
+    Each frame turns rpm * step / 60 revolutions per sample. When that is (within the
+    tolerance) a fraction p / q, the frame repeats every q samples, and all frames repeat
+    after the least common multiple of their denominators. The smallest denominator that
+    keeps the accumulated angle error over num_samples below the tolerance is used.
+
+    Parameters:
+    - rpms: Frame speeds (RPM)
+    - num_samples: Length of the run in samples (bounds the accumulated error)
+    - step: Sample spacing (seconds)
+    - max_period: Longest period accepted
+    - tolerance: Largest accumulated angle error (radians)
+
+    Returns:
+    - Period in samples, or None when there is no period up to max_period
+    """
+    frames = _frame_fractions(rpms, num_samples, step, max_period, tolerance)
+    return None if frames is None else frames[1]
+
+
+def _frame_fractions(rpms, num_samples, step, max_period, tolerance):
+    """Revolutions per sample of each frame as Fractions and their common period (see detect_period), or None."""
+    fractions = []
+    period = 1
+    for rpm in rpms:
+        revolutions = Fraction(float(rpm) * step / 60)
+        limit = 1
+        while True:
+            fraction = revolutions.limit_denominator(limit)
+            if abs(float(revolutions - fraction)) * 2 * np.pi * num_samples <= tolerance:
+                break
+            if limit >= max_period:
+                return None
+            limit = min(2 * limit, max_period)
+        fractions.append(fraction)
+        period = period * fraction.denominator // math.gcd(period, fraction.denominator)
+        if period > max_period:
+            return None
+    return fractions, period
+
+
+def _exact_phase(fraction, period):
+    """cos and sin of a frame angle at samples 0..period-1, from the exact reduced phase (p * k mod q) / q."""
+    k = np.arange(period, dtype=np.int64)
+    angle = 2 * np.pi * ((fraction.numerator * k) % fraction.denominator) / fraction.denominator
+    return np.cos(angle), np.sin(angle)
+
+
+class PeriodicSeries:
+    def __init__(self, vectors, period):
+        """
+        Running sums of a vector series that repeats every `period` samples.
+
+        Only one period is stored. The sum of the first n samples is
+        (n // period) * (sum over one period) + (sum of the first n % period samples),
+        so any time average of the infinite series costs O(1) after O(period) setup.
+
+        Parameters:
+        - vectors: (period, 3) samples of one period
+        - period: Period in samples
+        """
+        self.vectors = np.asarray(vectors, dtype=np.float64).reshape(period, 3)
+        self.period = period
+        self.prefix = np.zeros((period + 1, 3))
+        np.cumsum(self.vectors, axis=0, out=self.prefix[1:])
+        self.total = self.prefix[-1]
+
+    def sums(self, counts):
+        """(len(counts), 3) sums of the first n samples for each n in counts."""
+        counts = np.asarray(counts, dtype=np.int64)
+        whole, rest = np.divmod(counts, self.period)
+        return whole[:, np.newaxis] * self.total + self.prefix[rest]
+
+    def time_average(self, counts):
+        """
+        Time-averaged components and magnitude after n samples, for each n in counts (n >= 1).
+
+        Returns:
+        - xAvg, yAvg, zAvg, magAvg arrays
+        """
+        counts = np.asarray(counts, dtype=np.int64)
+        averages = self.sums(counts) / counts[:, np.newaxis]
+        return averages[:, 0], averages[:, 1], averages[:, 2], np.linalg.norm(averages, axis=1)
+
+    def samples(self, indices):
+        """Vectors at the given sample indices."""
+        return self.vectors[np.asarray(indices, dtype=np.int64) % self.period]
+
+    def distribution(self, sphere):
+        """Distribution score (octant method) of the repeating path; later periods revisit the cells of the first."""
+        return kernels.distribution_score(self.vectors, sphere)
+
+
+def sim_periodic_series(inner_rpm, outer_rpm, duration_hours, max_period=MAX_PERIOD, tolerance=ANGLE_TOLERANCE):
+    """
+    One period of the Sim gravity vector (1 s samples 0..duration), or None when the
+    motion does not repeat at least twice within the run.
+
+    The frame angles are taken from the exact reduced phase of each sample rather than
+    from omega * t, so every period is the same path and samples on an octant boundary or
+    halfway between vertices fall on the same side in all of them.
+    """
+    num_samples = int(duration_hours * 3600) + 1
+    frames = _frame_fractions((inner_rpm, outer_rpm), num_samples, 1.0, max_period, tolerance)
+    if frames is None or 2 * frames[1] > num_samples:
+        return None
+    (inner, outer), period = frames
+    cos_inner, sin_inner = _exact_phase(inner, period)
+    cos_outer, sin_outer = _exact_phase(outer, period)
+    # Same components as Sim.gVectorAt
+    vectors = np.column_stack((sin_outer * cos_inner, cos_outer, sin_outer * sin_inner))
+    return PeriodicSeries(vectors, period)
+
+
+def kim_periodic_series(model, time_array=None, **kwargs):
+    """
+    One period of KimModel's total acceleration (a_tot_prime, m/s²) on a uniform time grid.
+
+    Returns None for speed profiles, non-uniform grids and motions that do not repeat at
+    least twice within the run. The default grid (np.linspace over the duration) usually has a
+    step slightly different from 1 s, so it only repeats for special speeds.
+    """
+    if not (np.isscalar(model.inner_rpm) and np.isscalar(model.outer_rpm)):
+        return None
+    if time_array is None:
+        time_array = model.default_time_array()
+    time_array = np.asarray(time_array, dtype=np.float64)
+    if len(time_array) < 2:
+        return None
+    step = time_array[1] - time_array[0]
+    if not np.allclose(np.diff(time_array), step, rtol=1e-12, atol=0):
+        return None
+    period = detect_period((model.inner_rpm, model.outer_rpm), len(time_array), step, **kwargs)
+    if period is None or 2 * period > len(time_array):
+        return None
+    _, _, _, a_tot_prime = model.calculate_acceleration(time_array[:period])
+    return PeriodicSeries(np.asarray(a_tot_prime, dtype=np.float64).T, period)
+
+
+def _iter_sim_chunks(inner_rpm, outer_rpm, end_time, chunk_size=CHUNK_SIZE):
+    """Yield (start, (n, 3) float64 Sim vectors) for the 1 s samples 0..end_time, chunk by chunk."""
+    sim = Sim()
+    for start in range(0, end_time + 1, chunk_size):
+        yield start, sim.gVectorAt(np.arange(start, min(start + chunk_size, end_time + 1)), inner_rpm, outer_rpm)
+
+
+def _residue_magnitudes(total, q, v):
+    """|v T + q_r| / v for v of shape (R, M) and q of shape (R, 3)."""
+    return np.linalg.norm(v[..., np.newaxis] * total + q[:, np.newaxis], axis=-1) / v
+
+
+def _residue_slopes(total, q, v):
+    """Derivative in v of |v T + q_r| / v = |T + q_r / v| for v of shape (R,)."""
+    h = total + q / v[:, np.newaxis]
+    size = np.linalg.norm(h, axis=1)
+    return np.divide(-np.sum(h * q, axis=1) / v ** 2, size, out=np.zeros_like(size), where=size > 0)
+
+
+def _residue_sums(total, q, a, b, nodes=16):
+    """
+    Euler-Maclaurin sums of |v T + q_r| / v over v = a_r, a_r + 1, ..., b_r for each residue.
+
+    The integral is evaluated by Gauss-Legendre quadrature in u = ln v, where the integrand
+    |e^u T + q_r| is smooth, on segments at most 1 long.
+    """
+    x, w = np.polynomial.legendre.leggauss(nodes)
+    segments = max(1, int(np.ceil(np.max(np.log(b / a)))))
+    edges = np.linspace(np.log(a), np.log(b), segments + 1, axis=1)
+    mid, half = 0.5 * (edges[:, 1:] + edges[:, :-1]), 0.5 * (edges[:, 1:] - edges[:, :-1])
+    u = (mid[..., np.newaxis] + half[..., np.newaxis] * x).reshape(len(a), -1)
+    weights = (half[..., np.newaxis] * w).reshape(len(a), -1)
+    integral = np.sum(weights * np.linalg.norm(np.exp(u)[..., np.newaxis] * total + q[:, np.newaxis], axis=-1), axis=1)
+    ends = np.column_stack((a, b))
+    f_a, f_b = _residue_magnitudes(total, q, ends).T
+    return integral + 0.5 * (f_a + f_b) + (_residue_slopes(total, q, b) - _residue_slopes(total, q, a)) / 12
+
+
+def mean_running_magnitude(series, num_samples, direct_periods=DIRECT_PERIODS):
+    """
+    Mean over n = 1..num_samples of the time-averaged magnitude |S(n)| / n of a PeriodicSeries.
+
+    With n = w * period + r and v = w + r / period, S(n) = v T + q_r, where T is the sum
+    over one period and q_r = S(r) - (r / period) T, so residue r contributes the smooth
+    sequence |v T + q_r| / (period * v) at unit steps of v. The terms with
+    n < direct_periods * period are summed directly; the rest of every residue's sequence
+    is summed with the Euler-Maclaurin formula (through the first-derivative term, which
+    agrees with the per-sample sum to ~1e-13 relative). When T is not negligible the
+    direct part extends to |v T| >= 4 |q_r|, away from the kink of |v T + q_r| at zero.
+    The work is O(period * direct_periods) however long the run.
+    """
+    period = series.period
+    total = series.total
+    if np.linalg.norm(total) <= PERIOD_SUM_TOLERANCE * period:
+        total = np.zeros(3)
+    residues = np.arange(period)
+    q = series.prefix[:-1] - (residues / period)[:, np.newaxis] * total
+    direct = direct_periods
+    if np.any(total):
+        direct = max(direct, int(np.ceil(4 * np.max(np.linalg.norm(q, axis=1)) / np.linalg.norm(total))))
+    direct_samples = min(num_samples, direct * period - 1)
+    mag_sum = 0.0
+    for start in range(1, direct_samples + 1, CHUNK_SIZE):
+        mag_sum += np.sum(series.time_average(np.arange(start, min(start + CHUNK_SIZE, direct_samples + 1)))[3])
+    last = (num_samples - residues) // period
+    # Residues per quadrature batch; each takes a few hundred nodes of 3 components.
+    block = max(1, CHUNK_SIZE // 256)
+    for start in range(0, period, block):
+        r = residues[start:start + block]
+        r = r[last[r] >= direct]
+        if len(r):
+            mag_sum += np.sum(_residue_sums(total, q[r], direct + r / period, last[r] + r / period)) / period
+    return mag_sum / num_samples
+
+
+def _visited_cells(vectors, sphere, cells):
+    """Union of cells with the octant-method cells (as PathVisualization.getDistribution) of vectors."""
+    return np.union1d(cells, kernels.triangle_ids(kernels.nearest_triangles(vectors, sphere), len(sphere)))
+
+
+def long_run_summary(inner_rpm, outer_rpm, duration_hours, num_points=2000, sphere_points=1000):
+    """
+    Time-averaged gravity vector and distribution score of a long Sim run.
+
+    With a period shorter than the run, only that period is simulated (sim_periodic_series):
+    the averages come from its prefix sums, the mean magnitude from mean_running_magnitude
+    and the distribution from the cells of the one period, all in O(period). Samples on an
+    octant boundary or halfway between vertices are thereby scored on the exact path; a
+    sampled run whose angles drift by ~1e-12 rad over many periods can visit a few more
+    cells (72 instead of 58 over a day at 2/3 rpm). Otherwise the run is evaluated chunk
+    by chunk in float64 with the compensated running averages of DataProcessor, and the
+    distribution is scored on every sample.
+
+    Returns:
+    - dict with 'period' (samples or None), 'time' (seconds, up to num_points samples),
+      'x', 'y', 'z', 'magnitude' (time averages at those times), 'mean_magnitude'
+      (mean of the time-averaged magnitude over the whole run) and 'distribution'
+    """
+    end_time = int(duration_hours * 3600)
+    time = np.unique(np.linspace(0, end_time, num_points).round()).astype(np.int64)
+    sphere = fibonacci_sphere.fibonacci_sphere(sphere_points)
+    series = sim_periodic_series(inner_rpm, outer_rpm, duration_hours)
+    if series is None:
+        sampled = np.empty((len(time), 3))
+        carries = [(0.0, 0.0)] * 3
+        total = 0.0
+        cells = np.empty(0, dtype=np.int64)
+        for start, vectors in _iter_sim_chunks(inner_rpm, outer_rpm, end_time):
+            averages = np.empty_like(vectors)
+            for i in range(3):
+                averages[:, i], carries[i] = kernels.running_average(vectors[:, i], carries[i], start)
+            total += np.sum(np.sqrt(averages[:, 0] ** 2 + averages[:, 1] ** 2 + averages[:, 2] ** 2))
+            picked = (time >= start) & (time < start + len(vectors))
+            sampled[picked] = averages[time[picked] - start]
+            cells = _visited_cells(vectors, sphere, cells)
+        x, y, z = sampled.T
+        magnitude = np.sqrt(x ** 2 + y ** 2 + z ** 2)
+        mean_magnitude = total / (end_time + 1)
+        distribution = len(cells)
+        period = None
+    else:
+        x, y, z, magnitude = series.time_average(time + 1)
+        mean_magnitude = mean_running_magnitude(series, end_time + 1)
+        distribution = series.distribution(sphere)
+        period = series.period
+    return {
+        'period': period,
+        'time': time,
+        'x': x,
+        'y': y,
+        'z': z,
+        'magnitude': magnitude,
+        'mean_magnitude': mean_magnitude,
+        'distribution': int(distribution),
+    }
@@ -0,0 +1,91 @@
+import numpy as np
+import kernels
+import fibonacci_sphere
+from data_compile_v1 import Sim
+from dataCompile import DataProcessor, PathVisualization
+
+# Samples in the first (preview) level; at 1 s sampling it is drawn in well under 100 ms.
+PREVIEW_SAMPLES = 2048
+
+# Each refinement level uses this many times more samples than the previous one.
+REFINE_FACTOR = 8
+
+
+class PreviewRun:
+    def __init__(self, innerV, outerV, maxSeg, stride, numPoints=1000):
+        """
+        Every stride-th 1 s sample of a theoretical run, with the DataProcessor interface used by the GUI.
+
+        The time averages are the closed-form means of the full 1 s series
+        (Sim.gVectorTimeAvg), so the magnitude curve is exact at the kept samples; only the
+        path and the distribution score (a lower bound) use the subset.
+
+        Parameters:
+        - innerV, outerV: Frame velocities (RPM)
+        - maxSeg: Duration (hours)
+        - stride: Keep every stride-th sample (the last sample is always kept)
+        """
+        self.innerV = float(innerV)
+        self.outerV = float(outerV)
+        self.stride = stride
+        self.numPoints = numPoints
+        end_time = int(maxSeg * 3600)
+        self.time = np.unique(np.append(np.arange(0, end_time + 1, stride), end_time))
+        vectors = Sim().gVectorAt(self.time, self.innerV, self.outerV)
+        self.x, self.y, self.z = vectors[:, 0], vectors[:, 1], vectors[:, 2]
+
+    def _get_time_avg(self):
+        x_avg, y_avg, z_avg, _ = Sim().gVectorTimeAvg(self.time, self.innerV, self.outerV)
+        return x_avg, y_avg, z_avg
+
+    def _get_magnitude(self, x_time_avg, y_time_avg, z_time_avg):
+        return np.sqrt(x_time_avg ** 2 + y_time_avg ** 2 + z_time_avg ** 2)
+
+    def get_distribution(self):
+        path = np.column_stack((self.x, self.y, self.z))
+        return kernels.distribution_score(path, fibonacci_sphere.fibonacci_sphere(self.numPoints))
+
+
+def refinement_strides(num_samples, preview_samples=PREVIEW_SAMPLES, factor=REFINE_FACTOR):
+    """Sample strides of the refinement levels, coarsest first and ending with 1 (full resolution)."""
+    strides = []
+    stride = num_samples // preview_samples
+    while stride > 1:
+        strides.append(stride)
+        stride //= factor
+    return strides + [1]
+
+
+def iter_refinements(inner_v, outer_v, max_seg, start_analysis=None, end_analysis=None, cancelled=None):
+    """
+    Evaluate a theoretical run progressively: a coarse preview first, then denser levels.
+
+    Every level but the last is a PreviewRun. The last is a full-resolution DataProcessor
+    run in analytic mode: its magnitude curve is the closed-form time average at every 1 s
+    sample (getAnalyticTimeAvg), and the samples are only generated for the path and the
+    distribution score. cancelled() is checked between levels and between the steps of the
+    final level; when it returns True the generator stops without yielding further levels.
+
+    Yields:
+    - dict with 'stride' (1 for the final level), 'analysis', 'path_vis', 'magnitude'
+      and 'distribution'
+    """
+    cancelled = cancelled or (lambda: False)
+    for stride in refinement_strides(int(max_seg * 3600) + 1):
+        if cancelled():
+            return
+        if stride > 1:
+            analysis = PreviewRun(inner_v, outer_v, max_seg, stride)
+            magnitude = analysis._get_magnitude(*analysis._get_time_avg())
+        else:
+            analysis = DataProcessor(inner_v, outer_v, max_seg, start_analysis, end_analysis, analytic=True)
+            magnitude = analysis.getAnalyticTimeAvg(numPoints=None)[4]
+        if cancelled():
+            return
+        yield {
+            'stride': stride,
+            'analysis': analysis,
+            'path_vis': PathVisualization(inner_v, analysis.x, analysis.y, analysis.z),
+            'magnitude': magnitude,
+            'distribution': analysis.get_distribution(),
+        }
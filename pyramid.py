@@ -0,0 +1,76 @@
+import numpy as np
+
+
+class SeriesPyramid:
+    def __init__(self, time, series):
+        """
+        Min/max/mean pyramid of one or more series sharing a time axis.
+
+        Level k summarises blocks of 2**k consecutive samples and is built from level k - 1
+        by pairwise reduction, so the whole pyramid costs O(n) time and at most ~2n extra
+        values per statistic. Level 0 holds views of the original arrays.
+
+        Parameters:
+        - time: Monotonic sample times
+        - series: Mapping of name -> array with one value per sample
+        """
+        self.time = np.asarray(time, dtype=np.float64)
+        self.names = tuple(series)
+        self.levels = [{
+            'start': self.time,
+            'end': self.time,
+            'count': np.ones(len(self.time)),
+            'series': {name: self._leaf(values) for name, values in series.items()},
+        }]
+        while len(self.levels[-1]['start']) > 1:
+            self.levels.append(self._reduce(self.levels[-1]))
+
+    def _leaf(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        return {'min': values, 'max': values, 'sum': values}
+
+    def _reduce(self, level):
+        pairs = np.arange(0, len(level['start']), 2)
+        return {
+            'start': level['start'][pairs],
+            'end': np.maximum.reduceat(level['end'], pairs),
+            'count': np.add.reduceat(level['count'], pairs),
+            'series': {
+                name: {
+                    'min': np.minimum.reduceat(stats['min'], pairs),
+                    'max': np.maximum.reduceat(stats['max'], pairs),
+                    'sum': np.add.reduceat(stats['sum'], pairs),
+                }
+                for name, stats in level['series'].items()
+            },
+        }
+
+    def view(self, name, t0, t1, pixels):
+        """
+        Blocks covering [t0, t1] from the level closest to the screen resolution.
+
+        The coarsest level that still has at least `pixels` blocks in the range is used,
+        so the result has between `pixels` and 2 * `pixels` entries (fewer only when the
+        range holds fewer raw samples).
+
+        Returns:
+        - start, end: Time of the first and last sample of each block
+        - low, high, mean: Per-block minimum, maximum and mean of the series
+        """
+        i0 = np.searchsorted(self.time, t0, side='left')
+        i1 = np.searchsorted(self.time, t1, side='right')
+        count = max(i1 - i0, 1)
+        k = int(np.clip(np.floor(np.log2(count / max(pixels, 1))), 0, len(self.levels) - 1))
+        level = self.levels[k]
+        b0 = i0 >> k
+        b1 = -(-i1 // (1 << k))
+        stats = level['series'][name]
+        mean = stats['sum'][b0:b1] / level['count'][b0:b1]
+        return level['start'][b0:b1], level['end'][b0:b1], stats['min'][b0:b1], stats['max'][b0:b1], mean
+
+    def envelope(self, name, t0, t1, pixels):
+        """
+        Plot-ready (x, y) polyline tracing each block's min and max, so spikes survive decimation.
+        """
+        start, end, low, high, mean = self.view(name, t0, t1, pixels)
+        return np.column_stack((start, end)).ravel(), np.column_stack((low, high)).ravel()
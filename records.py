@@ -0,0 +1,188 @@
+import csv
+import os
+import numpy as np
+from dateutil import parser
+
+# Timestamp layout of the chamber loggers ('%H:%M:%S %m/%d/%Y'), validated and converted in
+# bulk; anything else falls back to dateutil one row at a time.
+_STAMP_LENGTH = 19
+_STAMP_DIGITS = [0, 1, 3, 4, 6, 7, 9, 10, 12, 13, 15, 16, 17, 18]
+_STAMP_SEPARATORS = {2: ':', 5: ':', 8: ' ', 11: '/', 14: '/'}
+# Byte positions of 'YYYY-MM-DDTHH:MM:SS' in the logger layout (None: separator written below)
+_ISO_ORDER = [15, 16, 17, 18, None, 9, 10, None, 12, 13, None, 0, 1, 2, 3, 4, 5, 6, 7]
+_ISO_SEPARATORS = {4: '-', 7: '-', 10: 'T'}
+_DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+# Characters of a plain decimal number ('-1.5', '2e-3'). float() rejects every other arrangement
+# of them, but on its own also accepts '1_0', 'nan', 'inf' and non-ASCII digits.
+_NUMBER_CHARACTERS = np.zeros(128, dtype=bool)
+_NUMBER_CHARACTERS[[ord(c) for c in '0123456789+-.eE']] = True
+_NUMBER_CHARACTERS[0] = True  # padding of shorter strings in a fixed-width array
+
+
+class RecordSet:
+    def __init__(self, timestamps, x, y, z, line_numbers, rejected, source=None):
+        """
+        Valid records of an accelerometer log, in file order, plus the rows set aside.
+
+        Parameters:
+        - timestamps: datetime64[us] array
+        - x, y, z: float64 arrays
+        - line_numbers: 1-based line number of each record in the source
+        - rejected: List of (line_number, reason, text) for the quarantined rows
+        - source: Path of the parsed file, if any
+        """
+        self.timestamps = timestamps
+        self.x = x
+        self.y = y
+        self.z = z
+        self.line_numbers = line_numbers
+        self.rejected = rejected
+        self.source = source
+        self.quarantine_path = None
+        if len(timestamps):
+            self.time_in_seconds = (timestamps - timestamps[0]) / np.timedelta64(1, 's')
+        else:
+            self.time_in_seconds = np.empty(0)
+        self.time_in_hours = self.time_in_seconds / 3600
+
+    def __len__(self):
+        return len(self.x)
+
+
+def _parse_values(columns):
+    """float64 values of a (N, 3) string table and a per-row mask of rows that parsed as finite numbers."""
+    columns = np.asarray(columns, dtype=str)
+    if columns.size:
+        codes = columns.view(np.uint32).reshape(columns.shape + (-1,))
+        plain = np.all(_NUMBER_CHARACTERS[np.minimum(codes, 127)] & (codes < 128), axis=-1)
+        if not plain.all():
+            columns = np.where(plain, columns, 'nan')
+    try:
+        values = columns.astype(np.float64)
+    except ValueError:
+        # Slow path, only taken when some field is not a number
+        values = np.full(columns.shape, np.nan)
+        for index, token in np.ndenumerate(columns):
+            try:
+                values[index] = float(token)
+            except ValueError:
+                pass
+    return values, np.all(np.isfinite(values), axis=1)
+
+
+def _fixed_layout_stamps(stamps):
+    """
+    Convert 'HH:MM:SS MM/DD/YYYY' stamps in bulk.
+
+    Returns:
+    - datetime64[us] array (NaT where the layout or a field range does not match), and the match mask
+    """
+    result = np.full(len(stamps), np.datetime64('NaT'), dtype='datetime64[us]')
+    matches = np.char.str_len(stamps) == _STAMP_LENGTH
+    if not np.any(matches):
+        return result, matches
+    raw = np.frombuffer(np.char.encode(stamps[matches], 'ascii', 'replace').astype(f'S{_STAMP_LENGTH}').tobytes(),
+                        dtype=np.uint8).reshape(-1, _STAMP_LENGTH)
+    digits = raw[:, _STAMP_DIGITS].astype(np.int64) - ord('0')
+    valid = np.all((digits >= 0) & (digits <= 9), axis=1)
+    for position, separator in _STAMP_SEPARATORS.items():
+        valid &= raw[:, position] == ord(separator)
+    hour, minute, second = (10 * digits[:, i] + digits[:, i + 1] for i in (0, 2, 4))
+    month, day = (10 * digits[:, i] + digits[:, i + 1] for i in (6, 8))
+    year = digits[:, 10:14] @ np.array([1000, 100, 10, 1])
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    month_ok = (month >= 1) & (month <= 12)
+    days_in_month = _DAYS_IN_MONTH[np.where(month_ok, month, 1) - 1] + (leap & (month == 2))
+    # Every field is range-checked here, so the cast below never fails (a failing string to
+    # datetime64 cast of a large array crashes some numpy versions).
+    valid &= (hour < 24) & (minute < 60) & (second < 60) & month_ok & (day >= 1) & (day <= days_in_month)
+
+    iso = raw[:, [0 if i is None else i for i in _ISO_ORDER]]
+    for position, separator in _ISO_SEPARATORS.items():
+        iso[:, position] = ord(separator)
+    converted = np.ascontiguousarray(iso[valid]).view(f'S{_STAMP_LENGTH}').ravel().astype('datetime64[s]')
+
+    indices = np.flatnonzero(matches)
+    matches[indices[~valid]] = False
+    result[indices[valid]] = converted
+    return result, matches
+
+
+def _parse_stamp(first, second):
+    """dateutil fallback for one record: 'time date', or 'date time' when that fails."""
+    try:
+        try:
+            stamp = parser.parse(first + " " + second)
+        except ValueError:
+            stamp = parser.parse(second + " " + first)
+    except (ValueError, OverflowError):
+        return np.datetime64('NaT')
+    return np.datetime64(stamp.replace(tzinfo=None), 'us')
+
+
+def parse_lines(lines, source=None):
+    """
+    Parse `time date x y z` records line by line, setting malformed rows aside.
+
+    Every line is one record (fields separated by whitespace or commas); blank lines are
+    skipped. Field counts, numbers and timestamps are validated in bulk with masks. A row
+    with the wrong number of fields (a header, a truncated write), a field that is not a
+    finite number or a timestamp that cannot be read is quarantined with its line number
+    and the rest of the file is still read, so one bad row can no longer shift every later
+    record or abort the load.
+
+    Returns:
+    - RecordSet
+    """
+    lines = [line.rstrip('\r\n') for line in lines]
+    tokens = [line.replace(',', ' ').split() for line in lines]
+    counts = np.fromiter(map(len, tokens), dtype=np.int64, count=len(tokens))
+    rejected = [(int(i) + 1, f"expected 5 fields, got {counts[i]}", lines[i]) for i in np.flatnonzero((counts != 5) & (counts != 0))]
+
+    rows = np.flatnonzero(counts == 5)
+    table = np.array([tokens[i] for i in rows], dtype=str).reshape(-1, 5)
+    values, valid = _parse_values(table[:, 2:5])
+    rejected += [(int(i) + 1, "non-numeric or non-finite value", lines[i]) for i in rows[~valid]]
+    rows, table, values = rows[valid], table[valid], values[valid]
+
+    timestamps, parsed = _fixed_layout_stamps(np.char.add(np.char.add(table[:, 0], ' '), table[:, 1]))
+    for i in np.flatnonzero(~parsed):
+        timestamps[i] = _parse_stamp(table[i, 0], table[i, 1])
+    valid = ~np.isnat(timestamps)
+    rejected += [(int(i) + 1, "unreadable timestamp", lines[i]) for i in rows[~valid]]
+
+    rejected.sort()
+    return RecordSet(timestamps[valid], *values[valid].T.copy(), rows[valid] + 1, rejected, source)
+
+
+def quarantine_path_for(file_path):
+    """Sidecar report path of a log file: <name>.quarantine.csv next to it."""
+    return os.path.splitext(file_path)[0] + '.quarantine.csv'
+
+
+def write_quarantine(file_path, rejected):
+    """Write quarantined rows as CSV (line, reason, record)."""
+    with open(file_path, 'w', newline='') as report:
+        writer = csv.writer(report)
+        writer.writerow(['line', 'reason', 'record'])
+        writer.writerows(rejected)
+
+
+def load_records(file_path, quarantine_path=None):
+    """
+    Parse an accelerometer log file (see parse_lines).
+
+    Parameters:
+    - file_path: Log file
+    - quarantine_path: Where rejected rows are reported (default: quarantine_path_for(file_path));
+      False disables the report. The report is only written when rows were rejected.
+
+    Returns:
+    - RecordSet; its quarantine_path is set when a report was written
+    """
+    with open(file_path, 'r', errors='replace') as file:
+        records = parse_lines(file, source=file_path)
+    if records.rejected and quarantine_path is not False:
+        records.quarantine_path = quarantine_path or quarantine_path_for(file_path)
+        write_quarantine(records.quarantine_path, records.rejected)
+    return records
@@ -0,0 +1,240 @@
+import os
+import re
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import matplotlib
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.backends.backend_pdf import PdfPages
+import kernels
+import fibonacci_sphere
+from data_compile_v1 import Sim
+from kim_model import KimModel, kim_time_averages, draw_kim_results
+from periodicity import sim_periodic_series
+from pyramid import SeriesPyramid
+from rolling import moving_averages
+
+# Horizontal resolution the time series are decimated to (min/max envelope) before drawing.
+PLOT_PIXELS = 1600
+
+# Path points drawn in the 3D plot; the distribution score always uses every sample.
+PATH_POINTS = 20000
+
+REPORT_STYLE = {'font.family': 'sans-serif', 'font.sans-serif': ['Calibri', 'DejaVu Sans'], 'font.size': 10}
+
+
+class RunResult:
+    def __init__(self, label, time_hours, x, y, z, x_avg, y_avg, z_avg, magnitude, distribution,
+                 start_analysis=None, end_analysis=None, moving_magnitude=None, moving_window_hours=None):
+        """
+        Computed metrics of one run, independent of any plotting.
+
+        Parameters:
+        - label: Run name (used for the page title and the output file name)
+        - time_hours, x, y, z: Samples
+        - x_avg, y_avg, z_avg, magnitude: Running time averages and their magnitude
+        - distribution: Distribution score of the path
+        - start_analysis, end_analysis: Optional analysis period (hours)
+        - moving_magnitude: Optional moving-average magnitude over moving_window_hours
+        """
+        self.label = label
+        self.time_hours = time_hours
+        self.x = x
+        self.y = y
+        self.z = z
+        self.x_avg = x_avg
+        self.y_avg = y_avg
+        self.z_avg = z_avg
+        self.magnitude = magnitude
+        self.distribution = distribution
+        self.start_analysis = start_analysis
+        self.end_analysis = end_analysis
+        self.moving_magnitude = moving_magnitude
+        self.moving_window_hours = moving_window_hours
+        self.mean_magnitude = float(np.mean(magnitude)) if len(magnitude) else float('nan')
+        self.mean_magnitude_analysis = None
+        if start_analysis is not None and end_analysis is not None:
+            window = (time_hours >= start_analysis) & (time_hours < end_analysis)
+            if np.any(window):
+                self.mean_magnitude_analysis = float(np.mean(magnitude[window]))
+
+
+def compute_run_result(label, time_hours, x, y, z, start_analysis=None, end_analysis=None, num_points=1000, moving_window_hours=None):
+    """Time averages, magnitude, distribution score and optional moving-average magnitude of a sampled run (no plotting)."""
+    time_hours = np.asarray(time_hours, dtype=np.float64)
+    components = [np.asarray(values, dtype=np.float64) for values in (x, y, z)]
+    averages = [kernels.running_average(values)[0] for values in components]
+    magnitude = np.sqrt(averages[0] ** 2 + averages[1] ** 2 + averages[2] ** 2)
+    sphere = fibonacci_sphere.fibonacci_sphere(num_points)
+    distribution = kernels.distribution_score(np.column_stack(components), sphere)
+    return RunResult(label, time_hours, *components, *averages, magnitude, distribution, start_analysis, end_analysis,
+                     _moving_magnitude(time_hours, components, moving_window_hours), moving_window_hours)
+
+
+def _moving_magnitude(time_hours, components, moving_window_hours):
+    if not moving_window_hours:
+        return None
+    return moving_averages(time_hours * 3600, *components, moving_window_hours * 3600)[3]
+
+
+def compute_sim_result(inner_rpm, outer_rpm, duration_hours, start_analysis=None, end_analysis=None, label=None, moving_window_hours=None,
+                       num_points=1000):
+    """
+    RunResult of a theoretical (Sim) run with 1 s samples.
+
+    When the motion repeats within the run (periodicity.sim_periodic_series), only one period
+    is simulated: the samples are copies of it, the time averages come from its prefix sums
+    and the distribution is scored on the one period.
+    """
+    label = label or f"Sim {inner_rpm:g}-{outer_rpm:g} rpm, {duration_hours:g} h"
+    series = sim_periodic_series(inner_rpm, outer_rpm, duration_hours)
+    if series is None:
+        time, vectors = Sim().gVectorArray(0, int(duration_hours * 3600), inner_rpm, outer_rpm)
+        return compute_run_result(label, time / 3600, *vectors.T, start_analysis, end_analysis, num_points, moving_window_hours)
+    time = np.arange(int(duration_hours * 3600) + 1)
+    time_hours = time / 3600
+    components = list(series.samples(time).T)
+    distribution = series.distribution(fibonacci_sphere.fibonacci_sphere(num_points))
+    return RunResult(label, time_hours, *components, *series.time_average(time + 1), distribution, start_analysis, end_analysis,
+                     _moving_magnitude(time_hours, components, moving_window_hours), moving_window_hours)
+
+
+def _envelope(time_hours, series, pixels=PLOT_PIXELS):
+    pyramid = SeriesPyramid(time_hours, {'values': series})
+    return pyramid.envelope('values', time_hours[0], time_hours[-1], pixels)
+
+
+def draw_run_report(fig, result):
+    """Draw a one-page report of a RunResult: magnitude, components and vector path."""
+    fig.suptitle(result.label)
+    mag_ax = fig.add_subplot(2, 2, 1)
+    components_ax = fig.add_subplot(2, 2, 3)
+    path_ax = fig.add_subplot(1, 2, 2, projection='3d')
+
+    mag_ax.set_yscale('log')
+    mag_ax.plot(*_envelope(result.time_hours, result.magnitude), color='#0066b2',
+                label=f"Time-Averaged Magnitude: {result.mean_magnitude:.3g}")
+    if result.mean_magnitude_analysis is not None:
+        mag_ax.axvline(result.start_analysis, color='#ec1c24', linestyle='--')
+        mag_ax.axvline(result.end_analysis, color='#ec1c24', linestyle='--')
+        mag_ax.plot([], [], color='#ec1c24', linestyle='--', label=f"Analysis Period: {result.mean_magnitude_analysis:.3g}")
+    if result.moving_magnitude is not None:
+        mag_ax.plot(*_envelope(result.time_hours, result.moving_magnitude), color='#aeb0b5',
+                    label=f"Moving Average ({result.moving_window_hours:g} h)")
+    mag_ax.set_title("Magnitude vs. Time")
+    mag_ax.set_xlabel('Time (hours)')
+    mag_ax.set_ylabel('Magnitude (g)')
+    mag_ax.legend()
+
+    for values, label, color in ((result.x_avg, 'X-Component', '#0066b2'), (result.y_avg, 'Y-Component', '#ec1c24'),
+                                 (result.z_avg, 'Z-Component', '#aeb0b5')):
+        components_ax.plot(*_envelope(result.time_hours, values), label=label, color=color)
+    components_ax.set_title("Acceleration Vector Components")
+    components_ax.set_xlabel('Time (hours)')
+    components_ax.set_ylabel('Magnitude (g)')
+    components_ax.legend()
+
+    step = max(1, len(result.x) // PATH_POINTS)
+    path_ax.plot(result.x[::step], result.y[::step], result.z[::step], color='#0032A0', linewidth=1)
+    path_ax.set_xlabel('X')
+    path_ax.set_ylabel('Y')
+    path_ax.set_zlabel('Z')
+    ticks = np.arange(-1.0, 1.5, 0.5)
+    path_ax.set_xticks(ticks)
+    path_ax.set_yticks(ticks)
+    path_ax.set_zticks(ticks)
+    path_ax.set_title("Acceleration Vector Path")
+    path_ax.legend([f"Distribution: {result.distribution}"])
+
+
+def draw_kim_report(fig, time_array, g_prime, a_prime, a_tot_prime, label="Kim Model"):
+    """Draw the four Kim model plots (see kim_model.draw_kim_results) on one page."""
+    fig.suptitle(label)
+    axes = [fig.add_subplot(2, 2, i) for i in (1, 2, 3)] + [fig.add_subplot(2, 2, 4, projection='3d')]
+    time_hours = np.asarray(time_array, dtype=np.float64) / 3600
+    pyramid = SeriesPyramid(time_hours, kim_time_averages(g_prime, a_prime))
+    # Block edges depend only on the time axis, so every envelope shares the same x values.
+    envelopes = {name: pyramid.envelope(name, time_hours[0], time_hours[-1], PLOT_PIXELS) for name in pyramid.names}
+    envelope_hours = next(iter(envelopes.values()))[0]
+    averages = {name: values for name, (_, values) in envelopes.items()}
+    step = max(1, a_tot_prime.shape[1] // PATH_POINTS)
+    draw_kim_results(axes, envelope_hours * 3600, averages, a_tot_prime[:, ::step])
+
+
+def save_figure(fig, file_path):
+    """Write a figure with the Agg canvas (PNG) or as a one-page PDF, chosen by extension."""
+    if file_path.lower().endswith('.pdf'):
+        with PdfPages(file_path) as pdf:
+            pdf.savefig(fig)
+    else:
+        FigureCanvasAgg(fig)
+        fig.savefig(file_path)
+
+
+def render_run_report(result, file_path):
+    """Render one RunResult page to PNG or PDF without pyplot (safe in worker processes)."""
+    with matplotlib.rc_context(REPORT_STYLE):
+        fig = Figure(figsize=(13, 7))
+        draw_run_report(fig, result)
+        save_figure(fig, file_path)
+    return file_path
+
+
+def unique_report_path(output_dir, label, fmt='png'):
+    """Output path derived from the run label plus a random suffix, so parallel runs never collide."""
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', label).strip('_') or 'run'
+    return os.path.join(output_dir, f"{slug}_{uuid.uuid4().hex[:8]}.{fmt}")
+
+
+def _report_sim_run(task):
+    spec, file_path = task
+    return render_run_report(compute_sim_result(**spec), file_path)
+
+
+def _report_kim_run(task):
+    spec, file_path = task
+    model = KimModel(**spec)
+    with matplotlib.rc_context(REPORT_STYLE):
+        fig = Figure(figsize=(13, 9))
+        draw_kim_report(fig, *model.calculate_acceleration(),
+                        label=f"Kim Model {spec['inner_rpm']}-{spec['outer_rpm']} rpm, {spec['duration_hours']:g} h")
+        save_figure(fig, file_path)
+    return file_path
+
+
+def render_reports(results, output_dir, fmt='png', workers=None):
+    """
+    Render precomputed RunResults in a process pool.
+
+    Returns:
+    - List of output paths, in the order of results
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    paths = [unique_report_path(output_dir, result.label, fmt) for result in results]
+    with ProcessPoolExecutor(workers) as pool:
+        return list(pool.map(render_run_report, results, paths))
+
+
+def report_sim_runs(specs, output_dir, fmt='png', workers=None):
+    """
+    Compute and render many Sim runs in a process pool (one page per run).
+
+    Each worker computes its run and renders it, so only the small spec is sent to it.
+
+    Parameters:
+    - specs: Dicts of compute_sim_result arguments (inner_rpm, outer_rpm, duration_hours, ...)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = [(spec, unique_report_path(output_dir, spec.get('label') or f"sim_{spec['inner_rpm']}_{spec['outer_rpm']}", fmt))
+             for spec in specs]
+    with ProcessPoolExecutor(workers) as pool:
+        return list(pool.map(_report_sim_run, tasks))
+
+
+def report_kim_runs(specs, output_dir, fmt='png', workers=None):
+    """Compute and render many KimModel runs in a process pool; specs are KimModel keyword arguments."""
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = [(spec, unique_report_path(output_dir, f"kim_{spec['inner_rpm']}_{spec['outer_rpm']}", fmt)) for spec in specs]
+    with ProcessPoolExecutor(workers) as pool:
+        return list(pool.map(_report_kim_run, tasks))
@@ -0,0 +1,64 @@
+import numpy as np
+import kernels
+
+
+class MovingAverage:
+    def __init__(self, window_seconds):
+        """
+        Trailing moving average over a fixed time window, fed chunk by chunk.
+
+        The mean at sample i covers samples up to i with t > t_i - window. Each window sum
+        is the difference of two compensated prefix sums (kernels.compensated_cumsum) and
+        the window starts are found with one searchsorted per chunk, so a run costs O(n)
+        whatever the window length. Only the samples still inside the last window are kept
+        between chunks; concatenating the results of successive update() calls gives the
+        same values as a single call on the whole series.
+
+        Parameters:
+        - window_seconds: Window length (seconds); sample times must be non-decreasing
+        """
+        if window_seconds <= 0:
+            raise ValueError("Moving-average window must be positive.")
+        self.window_seconds = float(window_seconds)
+        self.carry = (0.0, 0.0)
+        self.tail_time = np.empty(0)
+        self.tail_before = np.empty(0)  # prefix sum before each tail sample
+
+    def update(self, time_seconds, values):
+        """Moving averages at the samples of one chunk."""
+        time_seconds = np.asarray(time_seconds, dtype=np.float64)
+        before = np.array([self.carry[0] + self.carry[1]])
+        after, self.carry = kernels.compensated_cumsum(values, self.carry)
+        if len(after) == 0:
+            return after
+
+        times = np.concatenate((self.tail_time, time_seconds))
+        prefix_before = np.concatenate((self.tail_before, before, after[:-1]))
+        index = np.arange(len(self.tail_time), len(times))
+        starts = np.searchsorted(times, time_seconds - self.window_seconds, side='right')
+        averages = (after - prefix_before[starts]) / (index - starts + 1)
+
+        keep = np.searchsorted(times, times[-1] - self.window_seconds, side='right')
+        self.tail_time = times[keep:]
+        self.tail_before = prefix_before[keep:]
+        return averages
+
+
+def moving_average(time_seconds, values, window_seconds):
+    """Trailing moving average of one series (see MovingAverage)."""
+    return MovingAverage(window_seconds).update(time_seconds, values)
+
+
+def moving_averages(time_seconds, x, y, z, window_seconds):
+    """
+    Moving averages of the three components and the magnitude of the averaged vector.
+
+    Unlike the cumulative time average, which is dominated by the start of a long run,
+    these show how well each recent window of the run (e.g. the last 10 min or 1 h)
+    cancelled gravity.
+
+    Returns:
+    - x_avg, y_avg, z_avg, magnitude
+    """
+    averages = [moving_average(time_seconds, values, window_seconds) for values in (x, y, z)]
+    return (*averages, np.sqrt(averages[0] ** 2 + averages[1] ** 2 + averages[2] ** 2))
@@ -0,0 +1,97 @@
+import numpy as np
+from time_weighted import nominal_interval, resample_uniform
+
+SEGMENT_SIZE = 4096
+CHUNK_SIZE = 1 << 18
+CHANNELS = ('x', 'y', 'z', 'magnitude')
+
+
+class WelchAccumulator:
+    def __init__(self, sample_rate, segment_size=SEGMENT_SIZE, overlap=0.5, channels=CHANNELS):
+        """
+        Streaming Welch power spectral density.
+
+        Samples are fed in chunks of any size. Every complete segment (Hann window, mean
+        removed) is transformed as soon as it is available and only the running sum of its
+        periodogram is kept, so memory is bounded by one segment plus the current chunk,
+        whatever the length of the run. The result matches a one-sided, density-scaled
+        Welch estimate over the whole series.
+
+        Parameters:
+        - sample_rate: Samples per second
+        - segment_size: FFT length per segment
+        - overlap: Fraction of a segment shared with the next one (0 <= overlap < 1)
+        - channels: Names of the series passed to update()
+        """
+        self.sample_rate = float(sample_rate)
+        self.segment_size = int(segment_size)
+        self.hop = max(1, int(round(self.segment_size * (1 - overlap))))
+        self.channels = tuple(channels)
+        self.window = np.hanning(self.segment_size + 1)[:-1] if self.segment_size > 1 else np.ones(1)
+        self.scale = 1.0 / (self.sample_rate * np.sum(self.window ** 2))
+        self.buffer = {name: np.empty(0) for name in self.channels}
+        self.power = {name: np.zeros(self.segment_size // 2 + 1) for name in self.channels}
+        self.num_segments = 0
+
+    def update(self, **chunk):
+        """Add the next samples of every channel (equal-length arrays, keyed by channel name)."""
+        for name in self.channels:
+            self.buffer[name] = np.concatenate((self.buffer[name], np.asarray(chunk[name], dtype=np.float64)))
+        available = len(self.buffer[self.channels[0]])
+        if available < self.segment_size:
+            return
+        count = (available - self.segment_size) // self.hop + 1
+        for name in self.channels:
+            segments = np.lib.stride_tricks.sliding_window_view(self.buffer[name], self.segment_size)[::self.hop][:count]
+            segments = (segments - segments.mean(axis=1, keepdims=True)) * self.window
+            self.power[name] += np.sum(np.abs(np.fft.rfft(segments, axis=1)) ** 2, axis=0)
+            self.buffer[name] = self.buffer[name][count * self.hop:].copy()
+        self.num_segments += count
+
+    def frequencies(self):
+        """Frequency of each PSD bin in Hz."""
+        return np.fft.rfftfreq(self.segment_size, d=1.0 / self.sample_rate)
+
+    def psd(self):
+        """
+        Returns:
+        - freqs: Bin frequencies in Hz
+        - psd: dict of channel -> one-sided PSD in (unit)² / Hz (zeros before the first segment)
+        """
+        psd = {}
+        for name in self.channels:
+            density = self.power[name] * self.scale / max(self.num_segments, 1)
+            density[1:-1 if self.segment_size % 2 == 0 else None] *= 2
+            psd[name] = density
+        return self.frequencies(), psd
+
+
+def welch_psd(time_seconds, x, y, z, segment_size=SEGMENT_SIZE, overlap=0.5, chunk_size=CHUNK_SIZE):
+    """
+    Welch PSD of x, y, z and the instantaneous magnitude of a sampled acceleration series.
+
+    Works for Sim / DataProcessor output (time in seconds and g components), KimModel
+    output (time_array and the rows of a_tot_prime) and ingested accelerometer data.
+    Irregularly sampled input is first interpolated onto a uniform grid at its nominal
+    sampling interval; both stages run chunk by chunk.
+
+    Parameters:
+    - time_seconds: Sample times in seconds
+    - x, y, z: Acceleration components
+    - segment_size: FFT length (reduced to the number of samples for short series)
+    - overlap: Segment overlap fraction
+    - chunk_size: Samples per streamed chunk
+
+    Returns:
+    - freqs: Bin frequencies in Hz
+    - psd: dict with 'x', 'y', 'z' and 'magnitude' PSDs
+    """
+    time_seconds = np.asarray(time_seconds, dtype=np.float64)
+    step = nominal_interval(time_seconds)
+    if step <= 0:
+        raise ValueError("At least two distinct timestamps are needed for a spectrum.")
+    num_points = int(np.floor((time_seconds[-1] - time_seconds[0]) / step)) + 1
+    accumulator = WelchAccumulator(1.0 / step, min(segment_size, num_points), overlap)
+    for _, (x_chunk, y_chunk, z_chunk) in resample_uniform(time_seconds, (x, y, z), step, chunk_size):
+        accumulator.update(x=x_chunk, y=y_chunk, z=z_chunk, magnitude=np.sqrt(x_chunk ** 2 + y_chunk ** 2 + z_chunk ** 2))
+    return accumulator.psd()
@@ -0,0 +1,65 @@
+import numpy as np
+
+
+class PiecewiseLinearProfile:
+    def __init__(self, times, rpms):
+        """
+        Frame speed that varies linearly between knots.
+
+        Per-sample speed arrays are passed the same way, with one knot per sample.
+
+        Parameters:
+        - times: Knot times (seconds, increasing)
+        - rpms: Speed at each knot (RPM, signed; negative reverses the direction)
+
+        Before the first and after the last knot the speed is held constant.
+        """
+        self.times = np.asarray(times, dtype=np.float64)
+        self.rpms = np.asarray(rpms, dtype=np.float64)
+        if self.times.shape != self.rpms.shape or len(self.times) == 0:
+            raise ValueError("Profile times and speeds must be non-empty arrays of equal length.")
+        if np.any(np.diff(self.times) <= 0):
+            raise ValueError("Profile times must be strictly increasing.")
+        # Slope of each segment, padded with zeros for the constant ends.
+        self.slopes = np.concatenate(([0.0], np.diff(self.rpms) / np.diff(self.times), [0.0]))
+
+    def rpm(self, time_array):
+        """Speed (RPM) at each time."""
+        return np.interp(time_array, self.times, self.rpms)
+
+    def rpm_dot(self, time_array):
+        """Rate of change of the speed (RPM per second) at each time."""
+        return self.slopes[np.searchsorted(self.times, time_array, side='right')]
+
+
+class RandomWalkProfile(PiecewiseLinearProfile):
+    def __init__(self, base_rpm, duration_seconds, step_rpm, interval_seconds=60.0, max_rpm=None, seed=None):
+        """
+        Seeded random-walk speed, as used by random positioning machines.
+
+        Every interval_seconds the speed takes a normally distributed step, and it is
+        interpolated linearly in between. The same seed always gives the same profile.
+
+        Parameters:
+        - base_rpm: Speed at t = 0 (RPM)
+        - duration_seconds: Length of the profile
+        - step_rpm: Standard deviation of each step (RPM)
+        - interval_seconds: Time between steps
+        - max_rpm: Optional bound on |speed| (the walk is clipped to it)
+        - seed: Random seed
+        """
+        rng = np.random.default_rng(seed)
+        times = np.arange(0.0, duration_seconds + interval_seconds, interval_seconds)
+        steps = rng.normal(0.0, step_rpm, len(times))
+        steps[0] = 0.0
+        rpms = base_rpm + np.cumsum(steps)
+        if max_rpm is not None:
+            rpms = np.clip(rpms, -max_rpm, max_rpm)
+        super().__init__(times, rpms)
+
+
+def ramp_profile(target_rpm, ramp_seconds, duration_seconds):
+    """Spin-up from rest to target_rpm over ramp_seconds, then constant until duration_seconds."""
+    if ramp_seconds <= 0:
+        return PiecewiseLinearProfile([0.0], [target_rpm])
+    return PiecewiseLinearProfile([0.0, ramp_seconds, max(duration_seconds, ramp_seconds + 1)], [0.0, target_rpm, target_rpm])
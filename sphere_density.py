@@ -0,0 +1,119 @@
+import numpy as np
+from matplotlib import cm, colors
+import fibonacci_sphere
+import parallel_scoring
+from time_weighted import nominal_interval, GAP_FACTOR
+
+CHUNK_SIZE = 1 << 18
+
+# Rows (equal steps in y) and columns (equal steps in longitude) of the rendered mesh.
+MESH_ROWS = 60
+MESH_COLUMNS = 120
+
+
+def sample_durations(time_seconds, factor=GAP_FACTOR):
+    """
+    Time each sample stands for: the interval to the next sample.
+
+    Intervals longer than factor times the nominal interval (dropouts) and the last
+    sample count as one nominal interval, so a gap does not pile its duration onto the
+    sample before it.
+    """
+    time_seconds = np.asarray(time_seconds, dtype=np.float64)
+    nominal = nominal_interval(time_seconds) or 1.0
+    durations = np.append(np.diff(time_seconds), nominal)
+    durations[(durations > factor * nominal) | (durations < 0)] = nominal
+    return durations
+
+
+def dwell_time(x, y, z, time_seconds=None, num_points=1000, method='fibonacci', chunk_size=CHUNK_SIZE):
+    """
+    Time the gravity vector spends in each cell of the Fibonacci sphere.
+
+    The cells are those of the distribution score: samples are classified with the
+    scorer's cell IDs (parallel_scoring.cell_ids) and binned by their nearest vertex, the
+    first vertex of the cell's triangle. The Voronoi cells of a Fibonacci lattice have
+    equal areas to within a few percent, so dwell time per cell is a density.
+
+    Parameters:
+    - x, y, z: Path samples
+    - time_seconds: Sample times; each sample is weighted by sample_durations. Without
+      times every sample counts 1.
+    - num_points: Sphere size (as in PathVisualization)
+    - method: 'fibonacci' (true nearest vertex, so cells are the Voronoi cells) or
+      'octant' (the cells of the default score; they are clipped at the octant planes,
+      which moves ~7% of samples on a typical path to a neighbouring vertex)
+    - chunk_size: Samples classified at a time
+
+    Returns:
+    - (num_points,) array of dwell time (seconds, or samples without times) per vertex
+    """
+    path = np.column_stack((x, y, z)).astype(np.float64)
+    weights = sample_durations(time_seconds) if time_seconds is not None else None
+    sphere = fibonacci_sphere.fibonacci_sphere(num_points)
+    dwell = np.zeros(num_points)
+    for start in range(0, len(path), chunk_size):
+        nearest = parallel_scoring.cell_ids(path[start:start + chunk_size], sphere, method) // (num_points * num_points)
+        chunk_weights = weights[start:start + chunk_size] if weights is not None else None
+        dwell += np.bincount(nearest, weights=chunk_weights, minlength=num_points)
+    return dwell
+
+
+def equal_area_mesh(num_points=1000, rows=MESH_ROWS, columns=MESH_COLUMNS):
+    """
+    Unit-sphere mesh with equal-area faces and the Fibonacci vertex each face shows.
+
+    Rows are equal steps in y (the lattice axis) and columns equal steps in longitude;
+    by Archimedes' theorem every face then has the same area, 4π / (rows * columns).
+
+    Returns:
+    - X, Y, Z: (rows + 1, columns + 1) face-corner coordinates
+    - vertex: (rows, columns) index of the Fibonacci vertex nearest each face centre
+    """
+    def sphere_points(y, longitude):
+        radius = np.sqrt(np.clip(1 - y * y, 0.0, None))
+        return np.cos(longitude) * radius, y, np.sin(longitude) * radius
+
+    y_edges = np.linspace(1.0, -1.0, rows + 1)
+    longitude_edges = np.linspace(0.0, 2 * np.pi, columns + 1)
+    X, Y, Z = sphere_points(*np.meshgrid(y_edges, longitude_edges, indexing='ij'))
+    y_centres = 0.5 * (y_edges[1:] + y_edges[:-1])
+    longitude_centres = 0.5 * (longitude_edges[1:] + longitude_edges[:-1])
+    centres = np.stack(sphere_points(*np.meshgrid(y_centres, longitude_centres, indexing='ij')), axis=-1)
+    vertex = fibonacci_sphere.nearest_vertices(centres.reshape(-1, 3), num_points, k=1)[:, 0]
+    return X, Y, Z, vertex.reshape(rows, columns)
+
+
+def plot_sphere_density(ax, dwell, rows=MESH_ROWS, columns=MESH_COLUMNS, cmap='viridis', log=False):
+    """
+    Draw per-cell dwell time on a 3D axes as a coloured sphere.
+
+    The cost depends only on the mesh size, not on the number of path samples.
+
+    Parameters:
+    - ax: 3D axes
+    - dwell: Per-vertex dwell time (see dwell_time)
+    - rows, columns: Mesh resolution
+    - cmap: Colormap name
+    - log: Logarithmic colour scale (empty cells are drawn with the lowest colour)
+
+    Returns:
+    - (surface, mappable): the Poly3DCollection and a ScalarMappable of the fraction of
+      the run spent per cell, for a colorbar
+    """
+    dwell = np.asarray(dwell, dtype=np.float64)
+    fraction = dwell / dwell.sum() if dwell.sum() > 0 else dwell
+    X, Y, Z, vertex = equal_area_mesh(len(dwell), rows, columns)
+    values = fraction[vertex]
+    if log:
+        positive = fraction[fraction > 0]
+        low = positive.min() if len(positive) else 1e-12
+        norm = colors.LogNorm(vmin=low, vmax=max(values.max(), low * 10))
+        values = np.maximum(values, low)
+    else:
+        norm = colors.Normalize(vmin=0.0, vmax=max(values.max(), 1e-12))
+    mappable = cm.ScalarMappable(norm=norm, cmap=cmap)
+    surface = ax.plot_surface(X, Y, Z, facecolors=mappable.to_rgba(values), rstride=1, cstride=1,
+                              linewidth=0, antialiased=False, shade=False)
+    mappable.set_array(values)
+    return surface, mappable
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+import dataCompile
+
+CHUNK_SIZE = 500
+
+
+@pytest.fixture
+def small_chunks():
+    # 0.5 h is 1801 samples: four chunks, so the running-sum carries cross three boundaries
+    # and parallel_scoring scores the path in a two-process pool.
+    dataCompile.register_backend('chunked_small', dataCompile.ChunkedBackend(chunk_size=CHUNK_SIZE, workers=2))
+    yield 'chunked_small'
+    del dataCompile.BACKENDS['chunked_small']
+
+
+def test_backends_match_reference(small_chunks):
+    mismatches = dataCompile.check_backends(2.0, 3.0, 0.5, names=['numpy', 'chunked', small_chunks])
+    assert mismatches == {'numpy': [], 'chunked': [], small_chunks: []}
+
+
+def test_chunked_carries_match_single_pass(small_chunks):
+    time, x, y, z = dataCompile.simulate(2.0, 3.0, 0.5, backend=small_chunks)
+    assert len(time) > 3 * CHUNK_SIZE
+    chunked = dataCompile.time_average(x, y, z, backend=small_chunks)
+    whole = dataCompile.time_average(x, y, z, backend='numpy')
+    for chunked_avg, whole_avg in zip(chunked, whole):
+        assert np.array_equal(chunked_avg, whole_avg)
+    assert dataCompile.distribution_score(x, y, z, backend=small_chunks) == dataCompile.distribution_score(x, y, z, backend='numpy')
+
+
+def test_data_processor_with_chunked_backend(small_chunks):
+    reference = dataCompile.DataProcessor(0.5, 0.75, 0.5, 0.1, 0.4, backend='reference')
+    chunked = dataCompile.DataProcessor(0.5, 0.75, 0.5, 0.1, 0.4, backend=small_chunks)
+    np.testing.assert_allclose(chunked._get_magnitude(*chunked._get_time_avg()),
+                               reference._get_magnitude(*reference._get_time_avg()), rtol=1e-12, atol=1e-15)
+    assert chunked.get_distribution() == reference.get_distribution()
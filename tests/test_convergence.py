@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+from data_compile_v1 import Sim
+from convergence import theoretical_settling_time
+
+
+def dense_settling_hours(inner_rpm, outer_rpm, duration_hours, threshold):
+    magnitude = Sim().gVectorTimeAvg(np.arange(0, int(duration_hours * 3600) + 1), inner_rpm, outer_rpm)[3]
+    above = np.flatnonzero(magnitude >= threshold)
+    if len(above) and above[-1] == len(magnitude) - 1:
+        return None
+    return (above[-1] + 1) / 3600 if len(above) else 0.0
+
+
+@pytest.mark.parametrize('inner_rpm, outer_rpm, duration_hours, threshold', [
+    (2.0, 3.0, 24, 1e-2), (2.0, 3.0, 100, 1e-4), (0.5, 2.7, 50, 5e-3), (1.3, 0.7, 100, 1e-4), (1.0, 1.0, 10, 1e-2),
+])
+def test_theoretical_settling_time_matches_dense_scan(inner_rpm, outer_rpm, duration_hours, threshold):
+    settle, _ = theoretical_settling_time(inner_rpm, outer_rpm, duration_hours, threshold)
+    assert settle == dense_settling_hours(inner_rpm, outer_rpm, duration_hours, threshold)
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+import kernels
+import fibonacci_sphere
+from data_compile_v1 import Sim
+
+pytestmark = pytest.mark.skipif(not kernels.NUMBA_AVAILABLE, reason="numba is not installed")
+
+
+@pytest.fixture(autouse=True)
+def restore_backend():
+    backend = kernels.get_backend()
+    yield
+    kernels.set_backend(backend)
+
+
+def run_backends(function, *args):
+    results = []
+    for backend in ('numba', 'numpy'):
+        kernels.set_backend(backend)
+        results.append(function(*args))
+    return results
+
+
+@pytest.fixture
+def path():
+    vectors = Sim().gVectorAt(np.arange(0, 4 * 3600 + 1), 2.0, 3.0)
+    rng = np.random.default_rng(0)
+    noisy = vectors + rng.normal(scale=0.05, size=vectors.shape)
+    return np.concatenate((vectors, noisy / np.linalg.norm(noisy, axis=1)[:, None]))
+
+
+def test_nearest_triangles_match(path):
+    sphere = fibonacci_sphere.fibonacci_sphere(1000)
+    numba_result, numpy_result = run_backends(kernels.nearest_triangles, path, sphere)
+    assert np.array_equal(numba_result, numpy_result)
+
+
+@pytest.mark.parametrize('num_points', [100, 1000])
+def test_distribution_score_match(path, num_points):
+    sphere = fibonacci_sphere.fibonacci_sphere(num_points)
+    numba_score, numpy_score = run_backends(kernels.distribution_score, path, sphere)
+    assert numba_score == numpy_score
+
+
+def test_first_visits_match(path):
+    sphere = fibonacci_sphere.fibonacci_sphere(1000)
+    cell_ids = kernels.triangle_ids(kernels.nearest_triangles(path, sphere), len(sphere))
+    (numba_cells, numba_first), (numpy_cells, numpy_first) = run_backends(kernels.first_visits, cell_ids)
+    assert np.array_equal(numba_cells, numpy_cells)
+    assert np.array_equal(numba_first, numpy_first)
+
+
+def test_compensated_cumsum_match(path):
+    values = path[:, 0]
+    (numba_sums, numba_carry), (numpy_sums, numpy_carry) = run_backends(kernels.compensated_cumsum, values, (0.25, 1e-17))
+    assert np.array_equal(numba_sums, numpy_sums)
+    assert numba_carry == numpy_carry
+
+
+def test_running_average_match_across_chunks(path):
+    def chunked(values, chunk_size=1000):
+        carry, chunks = (0.0, 0.0), []
+        for start in range(0, len(values), chunk_size):
+            averages, carry = kernels.running_average(values[start:start + chunk_size], carry, start)
+            chunks.append(averages)
+        return np.concatenate(chunks), carry
+
+    for axis in range(3):
+        values = path[:, axis]
+        (numba_averages, numba_carry), (numpy_averages, numpy_carry) = run_backends(chunked, values)
+        assert np.array_equal(numba_averages, numpy_averages)
+        assert numba_carry == numpy_carry
+        whole, _ = kernels.running_average(values)
+        assert np.array_equal(numpy_averages, whole)
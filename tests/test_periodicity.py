@@ -0,0 +1,16 @@
+import numpy as np
+import pytest
+from periodicity import detect_period, mean_running_magnitude, sim_periodic_series
+
+
+def test_detect_period():
+    assert detect_period((2.0, 3.0), 86401) == 60
+    assert detect_period((2.13, 3.07), 86401, max_period=1000) is None
+
+
+@pytest.mark.parametrize('inner_rpm, outer_rpm, duration_hours', [(2.0, 3.0, 24), (2.0, 2.0, 24), (0.5, 2.5, 100), (1.0, 0.0, 2)])
+def test_mean_running_magnitude_matches_per_sample_mean(inner_rpm, outer_rpm, duration_hours):
+    series = sim_periodic_series(inner_rpm, outer_rpm, duration_hours)
+    num_samples = int(duration_hours * 3600) + 1
+    expected = np.mean(series.time_average(np.arange(1, num_samples + 1))[3])
+    assert mean_running_magnitude(series, num_samples) == pytest.approx(expected, rel=1e-11)
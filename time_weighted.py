@@ -0,0 +1,126 @@
+import numpy as np
+import kernels
+
+# An interval longer than GAP_FACTOR times the nominal sampling interval is reported as a gap.
+GAP_FACTOR = 3.0
+
+CHUNK_SIZE = 1 << 18
+
+
+def nominal_interval(time_seconds):
+    """Median positive spacing of a time series (0.0 when there is none)."""
+    dt = np.diff(np.asarray(time_seconds, dtype=np.float64))
+    dt = dt[dt > 0]
+    return float(np.median(dt)) if len(dt) else 0.0
+
+
+def detect_gaps(time_seconds, factor=GAP_FACTOR, nominal=None):
+    """
+    Find dropouts and ordering problems in a sampled time axis.
+
+    Parameters:
+    - time_seconds: Sample times in seconds
+    - factor: Intervals longer than factor * nominal are gaps
+    - nominal: Nominal sampling interval (default: median positive interval)
+
+    Returns:
+    - dict with the nominal interval, the index of the sample before each gap, gap start
+      times and durations, their total, and the number of repeated / backward timestamps
+    """
+    time_seconds = np.asarray(time_seconds, dtype=np.float64)
+    dt = np.diff(time_seconds)
+    if nominal is None:
+        nominal = nominal_interval(time_seconds)
+    gap_index = np.flatnonzero(dt > factor * nominal) if nominal > 0 else np.empty(0, dtype=np.int64)
+    return {
+        'nominal_interval': nominal,
+        'gap_index': gap_index,
+        'gap_start': time_seconds[gap_index],
+        'gap_duration': dt[gap_index],
+        'total_gap': float(np.sum(dt[gap_index])),
+        'repeated': int(np.count_nonzero(dt == 0)),
+        'backward': int(np.count_nonzero(dt < 0)),
+    }
+
+
+def cumulative_integral(time_seconds, values, carry=None, max_interval=None):
+    """
+    Cumulative trapezoidal integral of a series and the elapsed time it covers.
+
+    Chunks of a long log can be processed one after another by passing the returned carry;
+    the concatenated results equal those of a single call. Running sums use the compensated
+    summation from kernels.
+
+    Parameters:
+    - time_seconds: Sample times in seconds (non-decreasing)
+    - values: 1-D series, one value per sample
+    - carry: State returned by the previous chunk (None for the first chunk)
+    - max_interval: Intervals longer than this (seconds) are skipped, contributing neither
+      area nor elapsed time; None integrates across every interval
+
+    Returns:
+    - integral: Integral from the first sample up to each sample
+    - elapsed: Time integrated up to each sample
+    - carry: (last_time, last_value, integral_carry, elapsed_carry) for the next chunk
+    """
+    time_seconds = np.asarray(time_seconds, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return values.copy(), values.copy(), carry
+    if carry is None:
+        carry = (time_seconds[0], values[0], (0.0, 0.0), (0.0, 0.0))
+    last_time, last_value, integral_carry, elapsed_carry = carry
+
+    dt = np.diff(time_seconds, prepend=last_time)
+    if max_interval is not None:
+        dt = np.where(dt > max_interval, 0.0, dt)
+    area = dt * (np.concatenate(([last_value], values[:-1])) + values) / 2
+    integral, integral_carry = kernels.compensated_cumsum(area, integral_carry)
+    elapsed, elapsed_carry = kernels.compensated_cumsum(dt, elapsed_carry)
+    return integral, elapsed, (float(time_seconds[-1]), float(values[-1]), integral_carry, elapsed_carry)
+
+
+def time_weighted_average(time_seconds, values, carry=None, max_interval=None):
+    """
+    Running time-weighted mean: cumulative trapezoidal integral divided by elapsed time.
+
+    Unlike the per-sample mean, each sample is weighted by the time it represents, so
+    dropouts and rate changes do not skew the average. Where no time has elapsed yet (the
+    first sample) the average is the sample itself. On a uniform time axis the result
+    differs from the per-sample mean only by the half weight of the end points.
+
+    Returns:
+    - averages: Time-weighted mean up to each sample
+    - carry: State for the next chunk (see cumulative_integral)
+    """
+    integral, elapsed, carry = cumulative_integral(time_seconds, values, carry, max_interval)
+    averages = np.array(values, dtype=np.float64)
+    np.divide(integral, elapsed, out=averages, where=elapsed > 0)
+    return averages, carry
+
+
+def resample_uniform(time_seconds, columns, step=None, chunk_size=CHUNK_SIZE):
+    """
+    Linearly interpolate series onto a uniform time grid, one chunk of the grid at a time.
+
+    Parameters:
+    - time_seconds: Sample times in seconds (non-decreasing)
+    - columns: Sequence of series sampled at time_seconds
+    - step: Grid spacing in seconds (default: nominal sampling interval)
+    - chunk_size: Grid points per yielded chunk
+
+    Yields:
+    - (grid, resampled) with resampled a list of arrays, one per column
+    """
+    time_seconds = np.asarray(time_seconds, dtype=np.float64)
+    if step is None:
+        step = nominal_interval(time_seconds)
+    if len(time_seconds) == 0 or step <= 0:
+        return
+    num_points = int(np.floor((time_seconds[-1] - time_seconds[0]) / step)) + 1
+    for start in range(0, num_points, chunk_size):
+        grid = time_seconds[0] + step * np.arange(start, min(start + chunk_size, num_points))
+        i0 = max(int(np.searchsorted(time_seconds, grid[0], side='right')) - 1, 0)
+        i1 = int(np.searchsorted(time_seconds, grid[-1], side='left')) + 1
+        source = time_seconds[i0:i1]
+        yield grid, [np.interp(grid, source, np.asarray(column[i0:i1], dtype=np.float64)) for column in columns]